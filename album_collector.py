@@ -0,0 +1,83 @@
+"""
+Pengumpul foto album (media group) Telegram untuk bot.
+
+Telegram mengirim setiap foto di satu album sebagai update terpisah dengan
+media_group_id yang sama, dan tidak memberi tahu kapan album selesai. Foto
+dikumpulkan per kunci (chat_id, media_group_id); grup dianggap lengkap jika
+tidak ada foto baru selama `window` detik sejak foto terakhir, atau langsung
+jika sudah berisi `max_items` foto (batas album Telegram adalah 10). Saat itu
+on_complete(items) dipanggil sekali dengan foto yang diurutkan menurut
+urutannya di album (message_id).
+"""
+import asyncio
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+
+class _Album:
+    __slots__ = ("items", "on_complete", "deadline", "task")
+
+    def __init__(self, on_complete):
+        self.items = []
+        self.on_complete = on_complete
+        self.deadline = 0.0
+        self.task = None
+
+
+class AlbumCollector:
+    def __init__(self, window=1.5, max_items=10):
+        self.window = window
+        self.max_items = max_items
+        self._albums = {}
+        self._tasks = set()
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            window=float(os.getenv("ALBUM_COLLECT_SECONDS", 1.5)),
+            max_items=int(os.getenv("ALBUM_MAX_PHOTOS", 10)),
+        )
+
+    def add(self, key, order, item, on_complete):
+        """
+        Menambahkan satu foto ke album `key`. order menentukan urutan foto di
+        album; on_complete(items) harus mengembalikan coroutine dan hanya
+        dipakai dari foto pertama grup.
+        """
+        loop = asyncio.get_running_loop()
+        album = self._albums.get(key)
+        if album is None:
+            album = self._albums[key] = _Album(on_complete)
+            album.task = loop.create_task(self._wait_and_flush(key, album))
+            self._tasks.add(album.task)
+            album.task.add_done_callback(self._tasks.discard)
+        album.items.append((order, item))
+        album.deadline = loop.time() + self.window
+        if len(album.items) >= self.max_items:
+            # Album penuh: tidak perlu menunggu window habis.
+            album.deadline = 0.0
+            album.task.cancel()
+            self._start_flush(key, album)
+
+    async def _wait_and_flush(self, key, album):
+        loop = asyncio.get_running_loop()
+        while (delay := album.deadline - loop.time()) > 0:
+            await asyncio.sleep(delay)
+        self._start_flush(key, album)
+
+    def _start_flush(self, key, album):
+        if self._albums.get(key) is not album:
+            return
+        del self._albums[key]
+        items = [item for _, item in sorted(album.items, key=lambda entry: entry[0])]
+        task = asyncio.get_running_loop().create_task(self._flush(key, album.on_complete, items))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _flush(self, key, on_complete, items):
+        try:
+            await on_complete(items)
+        except Exception as e:
+            logger.error(f"Gagal memproses album {key} ({len(items)} foto): {e}", exc_info=True)
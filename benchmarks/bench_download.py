@@ -0,0 +1,107 @@
+"""
+Benchmark /api/download untuk file besar di bawah gunicorn: waktu CPU proses
+worker (user dan sistem dari /proc) dan throughput saat body dikirim dengan
+sendfile() dibandingkan dengan dibaca per blok lewat Python
+(GUNICORN_SENDFILE=0), untuk unduhan penuh dan unduhan Range.
+
+Catatan: lewat loopback, pemrosesan TCP sisi penerima ikut terhitung sebagai
+waktu sistem proses pengirim, jadi angka "sistem" lebih tinggi daripada di
+jaringan sungguhan; angka "user" adalah waktu interpreter Python.
+
+Hanya Linux (/proc). Jalankan dari root repo:
+    python benchmarks/bench_download.py [--size-mib 200] [--downloads 5]
+"""
+import argparse
+import http.client
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from load_test import start_server, stop_server, wait_ready  # noqa: E402
+
+FILENAME = "export_besar.json"
+
+
+def worker_pid(master_pid, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        with open(f"/proc/{master_pid}/task/{master_pid}/children") as f:
+            children = f.read().split()
+        if children:
+            return int(children[0])
+        time.sleep(0.1)
+    raise RuntimeError("worker gunicorn tidak ditemukan")
+
+
+def cpu_seconds(pid):
+    """(utime, stime) proses dalam detik."""
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    ticks = os.sysconf("SC_CLK_TCK")
+    return int(fields[11]) / ticks, int(fields[12]) / ticks
+
+
+def download(port, headers):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=120)
+    conn.request("GET", f"/api/download/{FILENAME}", headers=headers)
+    response = conn.getresponse()
+    size = 0
+    while True:
+        block = response.read(1024 * 1024)
+        if not block:
+            break
+        size += len(block)
+    conn.close()
+    return response.status, size
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size-mib", type=int, default=200)
+    parser.add_argument("--downloads", type=int, default=5)
+    parser.add_argument("--port", type=int, default=5078)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench-download-")
+    try:
+        output = os.path.join(workdir, "output")
+        os.makedirs(output)
+        size = args.size_mib * 1024 * 1024
+        with open(os.path.join(output, FILENAME), "wb") as f:
+            line = b'{"Akun": "Kas dan setara kas", "2023": "1.234.567"},\n'
+            f.write(line * (size // len(line)))
+        size = os.path.getsize(os.path.join(output, FILENAME))
+        half = size // 2
+        cases = (("penuh", {}, size), ("range 50%", {"Range": f"bytes={half}-"}, size - half))
+
+        print(f"file {size / 2**20:.0f} MiB, {args.downloads} unduhan per kasus")
+        print(f"{'mode':10s} {'kasus':10s} {'user':>9s} {'sistem':>9s} {'MiB/s':>8s}  (CPU worker per unduhan)")
+        for mode, sendfile in (("sendfile", "1"), ("python", "0")):
+            process = start_server("prod", workdir, args.port, WEB_CONCURRENCY="1", GUNICORN_SENDFILE=sendfile,
+                                   GUNICORN_ACCESS_LOG="")
+            try:
+                wait_ready("127.0.0.1", args.port)
+                pid = worker_pid(process.pid)
+                for label, headers, expected in cases:
+                    cpu_before, start = cpu_seconds(pid), time.perf_counter()
+                    for _ in range(args.downloads):
+                        status, received = download(args.port, headers)
+                        assert status in (200, 206) and received == expected, (status, received)
+                    elapsed = time.perf_counter() - start
+                    cpu_after = cpu_seconds(pid)
+                    user, system = (after - before for after, before in zip(cpu_after, cpu_before))
+                    print(f"{mode:10s} {label:10s} {user / args.downloads * 1e3:6.1f} ms "
+                          f"{system / args.downloads * 1e3:6.1f} ms "
+                          f"{expected * args.downloads / elapsed / 2**20:8.0f}")
+            finally:
+                stop_server(process)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
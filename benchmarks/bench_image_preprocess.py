@@ -0,0 +1,131 @@
+"""
+Benchmark pra-pemrosesan gambar sebelum unggah ke Gemini.
+
+Model Gemini diganti model palsu lokal yang menghitung byte yang benar-benar
+dikirim SDK (lewat content_types.to_blob) dan mensimulasikan waktu unggah
+sesuai bandwidth. Latensi diukur ujung-ke-ujung lewat stream_json_output,
+termasuk waktu pra-pemrosesan yang sebenarnya.
+
+Jalankan dari root repo:
+    python benchmarks/bench_image_preprocess.py [direktori_fixture] [--bandwidth-mbps 8]
+
+Tanpa direktori fixture, dibuat foto sintetis 4032x3024 (sebagian dengan
+orientasi EXIF diputar) di direktori sementara.
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import PIL.Image  # noqa: E402
+import PIL.ImageDraw  # noqa: E402
+from google.generativeai.types import content_types  # noqa: E402
+
+import gemini_vision_extractor  # noqa: E402
+from image_preprocessing import PreprocessConfig  # noqa: E402
+
+
+def make_fixtures(directory, count=4, seed=0):
+    rng = random.Random(seed)
+    paths = []
+    for n in range(count):
+        image = PIL.Image.new("RGB", (4032, 3024), (rng.randint(200, 235),) * 3)
+        draw = PIL.ImageDraw.Draw(image)
+        for row in range(40):
+            y = 150 + row * 70
+            draw.line([(100, y), (3900, y)], fill=(60, 60, 60), width=3)
+            draw.text((140, y + 20), f"Akun baris {row}", fill=(20, 20, 20))
+            draw.text((2400, y + 20), f"Rp {rng.randint(0, 10**9):,}", fill=(20, 20, 20))
+        # Derau sensor supaya ukuran JPEG mendekati foto ponsel sungguhan.
+        noise = PIL.Image.effect_noise((4032, 3024), 24).convert("RGB")
+        image = PIL.Image.blend(image, noise, 0.15)
+        exif = PIL.Image.Exif()
+        if n % 2:
+            exif[0x0112] = 6  # Orientasi: putar 90 derajat
+        path = os.path.join(directory, f"foto_{n}.jpg")
+        image.save(path, quality=95, exif=exif)
+        paths.append(path)
+    return paths
+
+
+class _Chunk:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeModel:
+    """Pengganti GenerativeModel: simulasi unggah (bandwidth) lalu stream jawaban."""
+
+    bandwidth = 8 * 1024 * 1024 / 8  # byte per detik
+    sent_bytes = []
+
+    def __init__(self, model_name):
+        self.model_name = model_name
+
+    async def generate_content_async(self, contents, stream=True):
+        size = 0
+        for part in contents:
+            if not isinstance(part, str):
+                size += len(content_types.to_blob(part).data)
+        FakeModel.sent_bytes.append(size)
+        await asyncio.sleep(size / FakeModel.bandwidth)
+
+        async def chunks():
+            for text in ('[{"Akun": "Kas", ', '"2023": "1.000"}]'):
+                await asyncio.sleep(0.01)
+                yield _Chunk(text)
+        return chunks()
+
+
+async def run(paths, config):
+    gemini_vision_extractor.preprocess_config = config
+    FakeModel.sent_bytes = []
+    latencies = []
+    for path in paths:
+        start = time.perf_counter()
+        async for _ in gemini_vision_extractor.stream_json_output(path):
+            pass
+        latencies.append(time.perf_counter() - start)
+    return FakeModel.sent_bytes, latencies
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("fixtures", nargs="?")
+    parser.add_argument("--bandwidth-mbps", type=float, default=8.0)
+    args = parser.parse_args()
+
+    FakeModel.bandwidth = args.bandwidth_mbps * 1024 * 1024 / 8
+    gemini_vision_extractor.set_model_factory(FakeModel)
+    # Rate limiter produksi tidak relevan untuk model palsu.
+    gemini_vision_extractor._rate_limiter = gemini_vision_extractor.TokenBucket(1e9, 1e9)
+    gemini_vision_extractor.print = lambda *a, **k: None  # Bungkam debug print per chunk.
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.fixtures:
+            paths = sorted(
+                os.path.join(args.fixtures, name) for name in os.listdir(args.fixtures)
+                if name.lower().endswith((".jpg", ".jpeg", ".png"))
+            )
+        else:
+            paths = make_fixtures(tmp)
+
+        configs = [
+            ("tanpa pra-proses", PreprocessConfig(enabled=False)),
+            ("pra-proses default", PreprocessConfig()),
+            ("pra-proses grayscale", PreprocessConfig(grayscale=True)),
+        ]
+        print(f"{len(paths)} gambar, bandwidth simulasi {args.bandwidth_mbps} Mbit/s")
+        for label, config in configs:
+            sent, latencies = asyncio.run(run(paths, config))
+            print(f"{label:22s} rata-rata byte terkirim={sum(sent) / len(sent) / 1024:9.1f} KiB  "
+                  f"latensi rata-rata={sum(latencies) / len(latencies) * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
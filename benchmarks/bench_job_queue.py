@@ -0,0 +1,96 @@
+"""
+Benchmark throughput antrean job persisten terhadap jumlah proses worker.
+
+Setiap job mensimulasikan pipeline ekstraksi: sebagian kerja CPU (parsing)
+dan sebagian menunggu I/O (Gemini/Telegram). Job dimasukkan ke database
+SQLite sementara lalu diproses oleh 1, 2, 4, ... proses worker.py.
+
+Jalankan dari root repo:
+    python benchmarks/bench_job_queue.py [--jobs 200] [--workers 1,2,4] [--cpu-ms 20] [--io-ms 50]
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from job_queue import JobQueue  # noqa: E402
+import worker  # noqa: E402
+
+
+def _burn(ms):
+    end = time.perf_counter() + ms / 1000
+    while time.perf_counter() < end:
+        pass
+
+
+def run_worker(db_path, cpu_ms, io_ms, concurrency):
+    queue = JobQueue(db_path, lease_seconds=30)
+
+    async def handle(job):
+        _burn(cpu_ms)
+        await asyncio.sleep(io_ms / 1000)
+
+    async def main():
+        stop = asyncio.Event()
+
+        async def stop_when_drained():
+            while True:
+                await asyncio.sleep(0.05)
+                stats = await asyncio.to_thread(queue.stats)
+                if not stats["queued"] and not stats["running"]:
+                    stop.set()
+                    return
+
+        await asyncio.gather(
+            worker.work(queue, handle, concurrency=concurrency, poll_interval=0.01, stop=stop),
+            stop_when_drained(),
+        )
+
+    asyncio.run(main())
+
+
+def bench(jobs, workers, cpu_ms, io_ms, concurrency):
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "jobs.sqlite3")
+        queue = JobQueue(db_path)
+        for n in range(jobs):
+            queue.enqueue("pdf", n % 10, n, {"path": f"/tmp/{n}.pdf", "base_filename": str(n), "file_unique_id": str(n)})
+
+        ctx = multiprocessing.get_context("spawn")
+        start = time.perf_counter()
+        procs = [ctx.Process(target=run_worker, args=(db_path, cpu_ms, io_ms, concurrency)) for _ in range(workers)]
+        for proc in procs:
+            proc.start()
+        for proc in procs:
+            proc.join()
+        elapsed = time.perf_counter() - start
+        stats = queue.stats()
+        assert stats["done"] == jobs, stats
+        return jobs / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--jobs", type=int, default=200)
+    parser.add_argument("--workers", default="1,2,4")
+    parser.add_argument("--cpu-ms", type=float, default=20)
+    parser.add_argument("--io-ms", type=float, default=50)
+    parser.add_argument("--concurrency", type=int, default=2, help="job paralel per proses worker")
+    args = parser.parse_args()
+
+    print(f"{args.jobs} job, CPU {args.cpu_ms} ms + I/O {args.io_ms} ms per job, "
+          f"{args.concurrency} job paralel per worker, {os.cpu_count()} CPU")
+    baseline = None
+    for workers in [int(n) for n in args.workers.split(",")]:
+        throughput = bench(args.jobs, workers, args.cpu_ms, args.io_ms, args.concurrency)
+        baseline = baseline or throughput / workers
+        print(f"{workers:2d} worker: {throughput:7.1f} job/detik  (efisiensi skala {throughput / (baseline * workers):.0%})")
+
+
+if __name__ == "__main__":
+    main()
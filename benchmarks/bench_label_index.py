@@ -0,0 +1,73 @@
+"""
+Benchmark pencocokan label 'Akun': varian OCR sintetis (huruf besar/kecil,
+spasi ganda, tanda baca, satu huruf hilang/tertukar) dari label peta akun,
+dicocokkan dengan LabelIndex.resolve().
+
+Dicetak: persentase varian yang kembali ke kunci yang benar (lookup persis
+lama hanya mengenali label yang sama persis), yang salah kunci, serta biaya
+resolve() pertama kali (index trigram) dan berikutnya (memo).
+
+Jalankan dari root repo:
+    python benchmarks/bench_label_index.py [--variants 20000]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from label_index import LABEL_MEMO_MAX, LabelIndex  # noqa: E402
+from statement_schema import SCHEMAS  # noqa: E402
+
+
+def ocr_variant(rng, label):
+    kind = rng.randrange(5)
+    if kind == 0:
+        return label.upper()
+    if kind == 1:
+        return label.replace(" ", "  ", 1) + " "
+    if kind == 2:
+        return label + rng.choice((".", ":", " *"))
+    position = rng.randrange(1, len(label))
+    if kind == 3:
+        return label[:position] + label[position + 1:]
+    return label[:position] + rng.choice("aeinrst") + label[position + 1:]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--variants", type=int, default=20000)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    schema = SCHEMAS["konvesional/laporan-keuangan"]
+    labels = list(schema.account_map)
+    variants = [(label, ocr_variant(rng, label)) for label in rng.choices(labels, k=args.variants)]
+    variants = variants[:LABEL_MEMO_MAX]
+
+    index = LabelIndex(schema.account_map)
+    unique = list(dict.fromkeys(variant for _, variant in variants))
+    start = time.perf_counter()
+    for variant in unique:
+        index.resolve(variant)
+    cold = time.perf_counter() - start
+    start = time.perf_counter()
+    results = [index.resolve(variant) for _, variant in variants]
+    warm = time.perf_counter() - start
+
+    exact = sum(variant in schema.account_map for _, variant in variants)
+    right = sum(key == schema.account_map[label] for (label, _), (key, _) in zip(variants, results))
+    wrong = sum(key is not None and key != schema.account_map[label]
+                for (label, _), (key, _) in zip(variants, results))
+    n = len(variants)
+    print(f"{n} varian label")
+    print(f"  lookup persis (lama)   {exact / n:6.1%} cocok")
+    print(f"  LabelIndex.resolve     {right / n:6.1%} cocok, {wrong / n:6.2%} salah kunci")
+    print(f"  resolve pertama        {cold / len(unique) * 1e6:6.1f} us/label ({len(unique)} label unik)")
+    print(f"  resolve (memo)         {warm / n * 1e9:6.0f} ns/label")
+
+
+if __name__ == "__main__":
+    main()
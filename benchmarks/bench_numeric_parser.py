@@ -0,0 +1,105 @@
+"""
+Benchmark parser angka: clean_value_string lama (rantai .replace() per sel,
+hasil string) dibandingkan numeric_parser.parse_amount per sel dan
+parse_column per kolom (hasil int/Decimal).
+
+Sel dibuat dengan campuran format hasil ekstraksi laporan rupiah (proporsi di
+FORMATS); selain total, waktu per format juga dicetak. Catatan: untuk pecahan
+("1.234,56") fungsi lama membuang koma sehingga hasilnya salah (123456).
+
+Jalankan dari root repo:
+    python benchmarks/bench_numeric_parser.py [--cells 1000000] [--columns 50]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from numeric_parser import parse_amount, parse_column  # noqa: E402
+
+
+def clean_value_string(value):
+    """Salinan fungsi lama dari main.py (mengembalikan string)."""
+    if value is None:
+        return None
+
+    s_value = str(value).strip()
+    is_negative = False
+
+    if s_value.startswith('(') and s_value.endswith(')'):
+        is_negative = True
+        s_value = s_value[1:-1]
+
+    cleaned_value = s_value.replace('Rp', '').replace('.', '').replace(',', '').replace(' ', '').strip()
+
+    if is_negative:
+        return f"-{cleaned_value}"
+    return cleaned_value
+
+
+def _amount(rng):
+    return f"{rng.randint(0, 10**10):,}".replace(",", ".")
+
+
+FORMATS = (
+    ("1.234.567", 0.45, lambda rng: _amount(rng)),
+    ("Rp 1.234.567", 0.15, lambda rng: f"Rp {_amount(rng)}"),
+    ("(1.234.567)", 0.15, lambda rng: f"({_amount(rng)})"),
+    ("-", 0.12, lambda rng: "-"),
+    ("1.234,56", 0.03, lambda rng: f"{_amount(rng)},{rng.randint(1, 99):02d}"),
+    ("kosong/None", 0.10, lambda rng: rng.choice((None, ""))),
+)
+
+
+def make_cells(count, seed=0):
+    rng = random.Random(seed)
+    kinds = rng.choices(range(len(FORMATS)), weights=[weight for _, weight, _ in FORMATS], k=count)
+    return kinds, [FORMATS[kind][2](rng) for kind in kinds]
+
+
+def run(cells, columns, repeat=5):
+    """Waktu terbaik tiap parser; pengulangan diselang-seling supaya adil."""
+    per_column = max(1, len(cells) // columns)
+    chunks = [cells[i:i + per_column] for i in range(0, len(cells), per_column)]
+    contenders = {
+        "clean_value_string (lama)": lambda: [clean_value_string(v) for v in cells],
+        "parse_amount per sel": lambda: [parse_amount(v) for v in cells],
+        "parse_column per kolom": lambda: [parse_column(chunk) for chunk in chunks],
+    }
+    timings = dict.fromkeys(contenders, float("inf"))
+    results = {}
+    for _ in range(repeat):
+        for label, func in contenders.items():
+            start = time.perf_counter()
+            results[label] = func()
+            timings[label] = min(timings[label], time.perf_counter() - start)
+    per_chunk = [value for chunk in results["parse_column per kolom"] for value in chunk]
+    assert results["parse_amount per sel"] == per_chunk
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cells", type=int, default=1_000_000)
+    parser.add_argument("--columns", type=int, default=50)
+    args = parser.parse_args()
+
+    kinds, cells = make_cells(args.cells)
+    print(f"{args.cells} sel, {args.columns} kolom")
+    for label, seconds in run(cells, args.columns).items():
+        print(f"  {label:28s} {seconds:6.3f} s  ({seconds / args.cells * 1e9:6.1f} ns/sel)")
+
+    print("per format (ns/sel: lama / parse_column):")
+    for index, (name, _, _) in enumerate(FORMATS):
+        subset = [cell for kind, cell in zip(kinds, cells) if kind == index]
+        timings = run(subset, args.columns)
+        print(f"  {name:14s} {len(subset):8d} sel  "
+              f"{timings['clean_value_string (lama)'] / len(subset) * 1e9:6.1f} / "
+              f"{timings['parse_column per kolom'] / len(subset) * 1e9:6.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Benchmark format file output: format lama (json.dumps indent=2) dibandingkan
+format ringkas json_stream.dump_rows() (tanpa indentasi, satu baris per
+elemen).
+
+Untuk file sintetis (make_rows di bench_statement_pivot) dicetak ukuran di
+disk dan waktu parse terbaik dari --repeat kali:
+  load     json.load seluruh file (materialize, index line item, file kecil di main.py)
+  stream   pembacaan bertahap file besar di main.py: iter_json_array untuk
+           format lama, iter_rows (per blok baris) untuk format ringkas
+
+Jalankan dari root repo:
+    python benchmarks/bench_output_format.py [--rows 300,3000,30000] [--years 10] [--repeat 5]
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_statement_pivot import make_rows  # noqa: E402
+from json_stream import dump_rows, iter_json_array, iter_rows  # noqa: E402
+from statement_schema import SCHEMAS  # noqa: E402
+
+STATEMENT_TYPE = "konvesional/laporan-keuangan"
+
+
+def best_time(func, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def parse(path, reader):
+    with open(path, "r", encoding="utf-8") as f:
+        if reader is json.load:
+            return reader(f)
+        return list(reader(f))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", default="300,3000,30000")
+    parser.add_argument("--years", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    try:
+        print(f"{'baris':>6s} {'format':8s} {'ukuran':>12s} {'hemat':>7s} {'load':>10s} {'stream':>10s}")
+        for n_rows in (int(n) for n in args.rows.split(",")):
+            rows = make_rows(SCHEMAS[STATEMENT_TYPE], n_rows, args.years, seed=n_rows)
+            pretty_path = os.path.join(tmp, f"pretty_{n_rows}.json")
+            compact_path = os.path.join(tmp, f"compact_{n_rows}.json")
+            with open(pretty_path, "w", encoding="utf-8") as f:
+                f.write(json.dumps(rows, ensure_ascii=False, indent=2))
+            with open(compact_path, "w", encoding="utf-8") as f:
+                dump_rows(rows, f)
+            for path, stream in ((pretty_path, iter_json_array), (compact_path, iter_rows)):
+                assert parse(path, json.load) == rows and parse(path, stream) == rows
+
+            pretty_size = os.path.getsize(pretty_path)
+            for label, path, stream in (("lama", pretty_path, iter_json_array), ("ringkas", compact_path, iter_rows)):
+                size = os.path.getsize(path)
+                load = best_time(lambda: parse(path, json.load), args.repeat)
+                streamed = best_time(lambda: parse(path, stream), args.repeat)
+                print(f"{n_rows:6d} {label:8s} {size:12,d} {(1 - size / pretty_size) * 100:6.1f}% "
+                      f"{load * 1e3:8.2f}ms {streamed * 1e3:8.2f}ms")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
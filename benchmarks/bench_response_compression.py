@@ -0,0 +1,81 @@
+"""
+Benchmark kompresi respons balance-sheet: rasio kompresi dan waktu CPU per
+request untuk setiap content-coding yang tersedia (gzip selalu; br/zstd jika
+paket brotli/zstandard terpasang).
+
+Untuk laporan sintetis multi-tahun (lihat make_file di
+bench_statement_memory) dicetak:
+  rasio        ukuran body terkompresi / body asli
+  kompresi     CPU untuk mengompresi body sekali (request pertama)
+  per request  CPU per request lewat Flask test client setelah body
+               terkompresi ada di cache (request berikutnya)
+  tanpa        CPU per request tanpa kompresi (Accept-Encoding kosong)
+
+Jalankan dari root repo:
+    python benchmarks/bench_response_compression.py [--years 10,50,200] [--rows 500] [--requests 200]
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_statement_memory import STATEMENT_TYPE, make_file  # noqa: E402
+
+
+def cpu_per_request(client, url, headers, requests):
+    start = time.process_time()
+    for _ in range(requests):
+        response = client.get(url, headers=headers)
+        response.get_data()
+    return (time.process_time() - start) / requests
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--years", default="10,50,200")
+    parser.add_argument("--rows", type=int, default=500)
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    os.environ["LINE_ITEM_DB_PATH"] = os.path.join(tmp, "line_items.sqlite3")
+    import main as app_module
+    import response_compression
+    from statement_schema import get_schema
+
+    app_module.app.config["OUTPUT_FOLDER"] = tmp
+    client = app_module.app.test_client()
+    schema = get_schema(STATEMENT_TYPE)
+
+    print(f"codec tersedia: {', '.join(response_compression.ENCODINGS)}")
+    print(f"{'tahun':>6} {'codec':>6} {'body':>9} {'terkompresi':>11} {'rasio':>6} "
+          f"{'kompresi':>9} {'per request':>11} {'tanpa':>8}")
+    try:
+        for years in [int(n) for n in args.years.split(",")]:
+            filename = f"laporan_{years}.json"
+            make_file(os.path.join(tmp, filename), schema, args.rows, years)
+            url = f"/balance-sheet/ep/{STATEMENT_TYPE}/{filename}"
+            body = client.get(url).get_data()
+            identity = cpu_per_request(client, url, {}, args.requests)
+            for encoding in response_compression.ENCODINGS:
+                start = time.process_time()
+                compressed = response_compression.compress(body, encoding)
+                compress_cpu = time.process_time() - start
+                response = client.get(url, headers={"Accept-Encoding": encoding})
+                assert response.headers.get("Content-Encoding") == encoding
+                assert response.get_data() == compressed
+                cached = cpu_per_request(client, url, {"Accept-Encoding": encoding}, args.requests)
+                print(f"{years:6d} {encoding:>6} {len(body) / 1024:7.1f}Ki {len(compressed) / 1024:9.1f}Ki "
+                      f"{len(compressed) / len(body):6.3f} {compress_cpu * 1e3:7.2f}ms "
+                      f"{cached * 1e3:9.3f}ms {identity * 1e3:6.3f}ms")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
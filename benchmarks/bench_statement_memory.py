@@ -0,0 +1,109 @@
+"""
+Benchmark memori puncak endpoint balance-sheet untuk file output besar.
+
+Membandingkan (tracemalloc, puncak alokasi Python):
+  lama      json.load + build_statement_payload + json.dumps + encode (satu body utuh)
+  stream    _serve_statement saat view belum ada: baris dibaca bertahap, body
+            di-stream per record tahun sambil ditulis ke view
+  view      _serve_statement saat view sudah ada: body di-stream dari disk
+
+File sintetis berisi banyak tabel (baris) dengan banyak kolom tahun, dan
+body hasil streaming dipastikan identik byte demi byte dengan cara lama.
+
+Jalankan dari root repo:
+    python benchmarks/bench_statement_memory.py [--rows 5000,20000,80000] [--years 30]
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+STATEMENT_TYPE = "konvesional/laporan-keuangan"
+
+
+def make_file(path, schema, rows, years, seed=0):
+    rng = random.Random(seed)
+    labels = list(schema.account_map) + [f"Akun lain {n}" for n in range(50)]
+    first_year = 2024 - years
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("[\n")
+        for n in range(rows):
+            row = {"Akun": rng.choice(labels)}
+            for year in range(first_year, 2024):
+                row[str(year)] = f"{rng.randint(0, 10**9):,}".replace(",", ".")
+            row["_page"] = n // 40 + 1
+            f.write(("  " if n == 0 else ",\n  ") + json.dumps(row, ensure_ascii=False))
+        f.write("\n]\n")
+
+
+def measure(func):
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    result = func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, peak
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", default="5000,20000,80000")
+    parser.add_argument("--years", type=int, default=30)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    os.environ["LINE_ITEM_DB_PATH"] = os.path.join(tmp, "line_items.sqlite3")
+    import main as app_module
+    from numeric_parser import json_default
+    from statement_schema import build_statement_payload, get_schema
+
+    app_module.app.config["OUTPUT_FOLDER"] = tmp
+    schema = get_schema(STATEMENT_TYPE)
+
+    print(f"{'baris':>7} {'file':>9} {'body':>9} {'lama':>10} {'stream':>10} {'view':>10}")
+    try:
+        for rows in [int(n) for n in args.rows.split(",")]:
+            filename = f"besar_{rows}.json"
+            path = os.path.join(tmp, filename)
+            make_file(path, schema, rows, args.years)
+
+            def legacy():
+                with open(path, "r", encoding="utf-8") as f:
+                    payload, _ = build_statement_payload(json.load(f), STATEMENT_TYPE)
+                return json.dumps(payload, sort_keys=False, default=json_default).encode("utf-8")
+
+            def streamed():
+                with app_module.app.test_request_context():
+                    response = app_module._serve_statement(filename, STATEMENT_TYPE)
+                    size = 0
+                    for chunk in response.response:
+                        size += len(chunk)
+                    response.close()
+                return size
+
+            body, legacy_peak = measure(legacy)
+            app_module.report_cache.clear()
+            shutil.rmtree(os.path.join(tmp, ".views"), ignore_errors=True)
+            size, stream_peak = measure(streamed)
+            app_module.report_cache.clear()
+            _, view_peak = measure(streamed)
+
+            with app_module.app.test_request_context():
+                streamed_body = b"".join(app_module._serve_statement(filename, STATEMENT_TYPE).response)
+            assert streamed_body == body and size == len(body)
+
+            mib = 1024 * 1024
+            print(f"{rows:7d} {os.path.getsize(path) / mib:7.1f}Mi {len(body) / mib:7.2f}Mi "
+                  f"{legacy_peak / mib:8.1f}Mi {stream_peak / mib:8.1f}Mi {view_peak / mib:8.2f}Mi")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
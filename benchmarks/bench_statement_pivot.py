@@ -0,0 +1,80 @@
+"""
+Micro-benchmark pivot laporan: handler lama (scan ulang semua baris per tahun)
+dibandingkan dengan StatementSchema.pivot (satu lintasan).
+
+Jalankan dari root repo:
+    python benchmarks/bench_statement_pivot.py
+"""
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from numeric_parser import format_amount, parse_amount  # noqa: E402
+from statement_schema import SCHEMAS  # noqa: E402
+
+
+def legacy_pivot(full_data_from_file, account_to_output_key_map, desired_output_keys_order):
+    """
+    Salinan loop per tahun dari handler balance-sheet sebelum registry skema;
+    nilai di-parse per sel dengan parse_amount (dikirim lewat format_amount) dan "conUidence" diisi 1.0
+    (label persis) supaya hasilnya sebanding.
+    """
+    read = []
+    available_years = set()
+    for item in full_data_from_file:
+        for key in item:
+            if key.isdigit() and len(key) == 4:
+                available_years.add(key)
+    for year in sorted(list(available_years)):
+        year_data_entry = {}
+        temp_data_storage = {}
+        for item in full_data_from_file:
+            akun_value = item.get('Akun')
+            if akun_value in account_to_output_key_map and year in item:
+                output_key = account_to_output_key_map[akun_value]
+                temp_data_storage[output_key] = {
+                    "value": format_amount(parse_amount(item.get(year))),
+                    "conUidence": 1.0
+                }
+        for key in desired_output_keys_order:
+            if key == "year":
+                year_data_entry['year'] = int(year)
+            elif key in temp_data_storage:
+                year_data_entry[key] = temp_data_storage[key]
+            else:
+                year_data_entry[key] = {"value": None, "conUidence": None}
+        read.append(year_data_entry)
+    return read
+
+
+def make_rows(schema, n_rows, n_years, seed=0):
+    rng = random.Random(seed)
+    labels = list(schema.account_map) + [f"Akun lain {i}" for i in range(50)]
+    years = [str(2000 + i) for i in range(n_years)]
+    rows = []
+    for _ in range(n_rows):
+        row = {"No": str(rng.randint(1, 99)), "Akun": rng.choice(labels)}
+        for year in years:
+            row[year] = f"Rp {rng.randint(0, 10**9):,}".replace(",", ".")
+        rows.append(row)
+    return rows
+
+
+def main():
+    schema = SCHEMAS["konvesional/laporan-keuangan"]
+    for n_rows, n_years in ((50, 2), (300, 5), (800, 10)):
+        rows = make_rows(schema, n_rows, n_years)
+        assert legacy_pivot(rows, schema.account_map, schema.key_order) == schema.pivot(rows)
+        number = max(1, 2000 // n_rows)
+        old = min(timeit.repeat(lambda: legacy_pivot(rows, schema.account_map, schema.key_order),
+                                number=number, repeat=5)) / number
+        new = min(timeit.repeat(lambda: schema.pivot(rows), number=number, repeat=5)) / number
+        print(f"rows={n_rows:4d} years={n_years:2d}  lama={old * 1e3:8.3f} ms  "
+              f"baru={new * 1e3:8.3f} ms  speedup={old / new:5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+"""
+Load test API Flask: server development lama (`python main.py`, debug +
+reloader) dibandingkan server produksi (gunicorn -c gunicorn.conf.py wsgi:app).
+
+Server dijalankan sebagai subproses di direktori sementara berisi file output
+sintetis, lalu sejumlah thread klien (koneksi keep-alive) mengirim request
+campuran /api/files, endpoint balance-sheet, dan /api/ready selama --duration
+detik. Dicetak request/detik, latensi p50/p99, dan jumlah error per mode.
+
+Jalankan dari root repo:
+    python benchmarks/load_test.py [--serve dev,prod] [--duration 15] [--concurrency 32]
+    python benchmarks/load_test.py --serve none --url http://host:5000 --file NAMA.json
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from urllib.parse import urlsplit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bench_statement_pivot import make_rows  # noqa: E402
+from statement_schema import SCHEMAS  # noqa: E402
+
+STATEMENT_TYPE = "konvesional/laporan-keuangan"
+
+
+def make_output(folder, files, rows, years):
+    os.makedirs(folder, exist_ok=True)
+    names = []
+    for n in range(files):
+        name = f"loadtest_{n:04d}.json"
+        with open(os.path.join(folder, name), "w", encoding="utf-8") as f:
+            json.dump(make_rows(SCHEMAS[STATEMENT_TYPE], rows, years, seed=n), f)
+        names.append(name)
+    return names
+
+
+def start_server(mode, workdir, port, **extra_env):
+    env = dict(os.environ, PORT=str(port), PYTHONUNBUFFERED="1", **extra_env)
+    if mode == "dev":
+        command = [sys.executable, os.path.join(ROOT, "main.py")]
+    else:
+        command = [sys.executable, "-m", "gunicorn", "-c", os.path.join(ROOT, "gunicorn.conf.py"),
+                   "--pythonpath", ROOT, "wsgi:app"]
+    log = open(os.path.join(workdir, f"{mode}.log"), "wb")
+    # Sesi baru supaya proses anak (reloader, worker) ikut dihentikan.
+    return subprocess.Popen(command, cwd=workdir, env=env, stdout=log, stderr=subprocess.STDOUT,
+                            start_new_session=True)
+
+
+def stop_server(process):
+    try:
+        os.killpg(process.pid, signal.SIGTERM)
+        process.wait(timeout=30)
+    except ProcessLookupError:
+        pass
+    except subprocess.TimeoutExpired:
+        os.killpg(process.pid, signal.SIGKILL)
+        process.wait()
+
+
+def wait_ready(host, port, timeout=60.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection(host, port, timeout=2)
+            conn.request("GET", "/api/ready")
+            response = conn.getresponse()
+            response.read()
+            conn.close()
+            # Server dev lama belum punya /api/ready; 404 berarti sudah melayani.
+            if response.status in (200, 404):
+                return
+        except OSError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"server {host}:{port} tidak siap dalam {timeout} detik")
+
+
+def client(host, port, paths, deadline, seed, latencies, errors):
+    rng = random.Random(seed)
+    conn = None
+    while time.monotonic() < deadline:
+        path = rng.choice(paths)
+        start = time.perf_counter()
+        try:
+            if conn is None:
+                conn = http.client.HTTPConnection(host, port, timeout=30)
+            conn.request("GET", path)
+            response = conn.getresponse()
+            response.read()
+            if response.status >= 400:
+                errors.append(response.status)
+            else:
+                latencies.append(time.perf_counter() - start)
+            if response.will_close:
+                conn.close()
+                conn = None
+        except (OSError, http.client.HTTPException) as e:
+            errors.append(type(e).__name__)
+            if conn is not None:
+                conn.close()
+            conn = None
+    if conn is not None:
+        conn.close()
+
+
+def run_load(host, port, paths, duration, concurrency):
+    latencies, errors = [], []
+    deadline = time.monotonic() + duration
+    threads = [
+        threading.Thread(target=client, args=(host, port, paths, deadline, n, latencies, errors))
+        for n in range(concurrency)
+    ]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+
+    def percentile(p):
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1e3 if latencies else float("nan")
+
+    return {
+        "requests": len(latencies),
+        "rps": len(latencies) / elapsed,
+        "p50_ms": percentile(0.50),
+        "p99_ms": percentile(0.99),
+        "errors": len(errors),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--serve", default="dev,prod", help="dev, prod, atau none (pakai --url)")
+    parser.add_argument("--url", default=None)
+    parser.add_argument("--port", type=int, default=5077)
+    parser.add_argument("--file", action="append", default=[], help="file output untuk --serve none")
+    parser.add_argument("--files", type=int, default=20)
+    parser.add_argument("--rows", type=int, default=300)
+    parser.add_argument("--years", type=int, default=5)
+    parser.add_argument("--duration", type=float, default=15.0)
+    parser.add_argument("--concurrency", type=int, default=32)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="loadtest-")
+    try:
+        if args.serve == "none":
+            if not args.url:
+                parser.error("--serve none membutuhkan --url")
+            modes, names = ["none"], args.file
+        else:
+            modes = args.serve.split(",")
+            names = make_output(os.path.join(workdir, "output"), args.files, args.rows, args.years)
+        paths = ["/api/files?limit=100"] + [f"/balance-sheet/ep/{STATEMENT_TYPE}/{name}" for name in names]
+
+        print(f"{len(paths)} path, {args.concurrency} koneksi, {args.duration:.0f} detik per mode")
+        print(f"{'mode':6s} {'request':>9s} {'req/s':>9s} {'p50':>9s} {'p99':>9s} {'error':>7s}")
+        for mode in modes:
+            if mode == "none":
+                split = urlsplit(args.url)
+                host, port, process = split.hostname, split.port or 80, None
+            else:
+                host, port = "127.0.0.1", args.port
+                process = start_server(mode, workdir, port)
+            try:
+                try:
+                    wait_ready(host, port)
+                except RuntimeError:
+                    if process is not None:
+                        with open(os.path.join(workdir, f"{mode}.log"), "rb") as log:
+                            sys.stderr.write(log.read()[-4000:].decode("utf-8", "replace"))
+                    raise
+                result = run_load(host, port, paths, args.duration, args.concurrency)
+            finally:
+                if process is not None:
+                    stop_server(process)
+            print(f"{mode:6s} {result['requests']:9d} {result['rps']:9.1f} {result['p50_ms']:7.1f}ms "
+                  f"{result['p99_ms']:7.1f}ms {result['errors']:7d}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,20 +2,36 @@
 Bot Telegram untuk mengubah gambar tabel menjadi file JSON menggunakan Gemini Vision API.
 """
 import asyncio
+import collections
+import contextlib
+import hashlib
 import json
 import logging
 import os
+import time
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-import docx
-import pdfplumber
 from dotenv import load_dotenv
 from telegram import Update
 from telegram.constants import ParseMode
+from telegram.error import TelegramError
 from telegram.ext import (Application, CommandHandler, ContextTypes,
                           MessageHandler, filters)
 
 import gemini_vision_extractor
+import precompressed
+import statement_views
+from album_collector import AlbumCollector
+from extraction_cache import ExtractionCache, file_sha256
+from extraction_pool import ExtractionPool, ExtractionTimeout
+from job_queue import JobQueue
+from job_scheduler import JobScheduler, QueueFull
+from json_stream import IncrementalRowParser, JSONStreamError, NotJSONArrayError, dumps_rows
+from line_item_store import LineItemStore
+from table_extractor import (EXTRACTOR_VERSION, TableStitcher, describe_source,
+                             docx_to_json, extract_pdf_page_tables,
+                             iter_table_rows, pdf_page_count)
 
 load_dotenv()
 
@@ -31,6 +47,44 @@ if not TELEGRAM_BOT_TOKEN:
 if not GEMINI_API_KEY:
     raise ValueError("GEMINI_API_KEY tidak ditemukan di file .env")
 
+# Ekstraksi PDF/DOCX dijalankan di process pool agar tidak memblokir polling Telegram.
+extraction_pool = ExtractionPool.from_env()
+# Jumlah halaman PDF per job; halaman dibagi ke beberapa worker secara paralel.
+PDF_PAGES_PER_JOB = int(os.getenv("PDF_PAGES_PER_JOB", 8))
+# Jumlah job halaman satu PDF yang berjalan/menunggu hasil bersamaan (default:
+# jumlah worker ekstraksi), supaya memori mengikuti window ini, bukan jumlah halaman.
+PDF_CHUNK_WINDOW = int(os.getenv("PDF_CHUNK_WINDOW", 0)) or extraction_pool.max_workers
+# Batas upload PDF di memori; lebih kecil dari INTAKE_MEMORY_MAX_BYTES (yang
+# berlaku untuk DOCX/gambar) karena bytes PDF di-pickle ke setiap job halaman,
+# sedangkan path cukup dikirim sekali. Batas yang lebih kecil dari keduanya
+# yang berlaku; PDF di atasnya langsung diunduh ke file sementara.
+PDF_MEMORY_MAX_BYTES = int(os.getenv("PDF_MEMORY_MAX_BYTES", 1024 * 1024))
+# Cache hasil ekstraksi berdasarkan isi file, untuk dokumen/foto yang dikirim ulang.
+extraction_cache = ExtractionCache.from_env()
+# Jeda minimum (detik) antar edit pesan progres, supaya tidak terkena rate limit Telegram.
+PROGRESS_UPDATE_INTERVAL = float(os.getenv("PROGRESS_UPDATE_INTERVAL", 2.0))
+# Batas job berjalan (global dan per jenis dokumen) serta antrean yang adil antar chat.
+job_scheduler = JobScheduler.from_env()
+# JOB_BACKEND=sqlite: handler hanya memasukkan job ke antrean persisten yang
+# diproses oleh worker.py; default "local" memproses di proses bot ini.
+JOB_BACKEND = os.getenv("JOB_BACKEND", "local")
+job_queue = JobQueue.from_env() if JOB_BACKEND == "sqlite" else None
+# Upload sampai ukuran ini diunduh ke memori dan diteruskan langsung ke
+# extractor; yang lebih besar (atau ukurannya tidak diketahui) disimpan ke
+# disk. Dengan JOB_BACKEND=sqlite upload selalu ke disk karena job diproses
+# proses lain (worker.py). PDF memakai PDF_MEMORY_MAX_BYTES jika lebih kecil.
+INTAKE_MEMORY_MAX_BYTES = int(os.getenv("INTAKE_MEMORY_MAX_BYTES", 8 * 1024 * 1024))
+# Foto dari satu album Telegram (media group) dikumpulkan lalu diekstrak
+# bersama dalam satu request Gemini multi-gambar dan satu file JSON.
+album_collector = AlbumCollector.from_env()
+# Store line item untuk query lintas file di main.py, diperbarui setiap file output baru.
+line_item_store = LineItemStore.from_env()
+# Penyimpanan file output ke folder output/ (beserta view, varian terkompresi,
+# dan indeks) berjalan di thread latar; hasil dikirim ke pengguna dari memori
+# tanpa menunggu disk.
+OUTPUT_WRITER_THREADS = int(os.getenv("OUTPUT_WRITER_THREADS", 2))
+output_writer = ThreadPoolExecutor(max_workers=OUTPUT_WRITER_THREADS, thread_name_prefix="output-writer")
+
 
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     user = update.effective_user
@@ -38,63 +92,273 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         rf"Halo {user.mention_html()}! Kirimkan gambar tabel. Saya akan mengonversinya menjadi file JSON menggunakan AI.",
     )
 
-def pdf_to_json(pdf_path):
+async def cache_stats(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    stats = await asyncio.to_thread(extraction_cache.stats)
+    await update.message.reply_text(json.dumps(stats, indent=2))
+
+async def job_stats(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    if job_queue is not None:
+        stats = await asyncio.to_thread(job_queue.stats)
+    else:
+        stats = job_scheduler.stats()
+    await update.message.reply_text(json.dumps(stats, indent=2))
+
+
+async def schedule_job(context: ContextTypes.DEFAULT_TYPE, chat_id: int, doc_type: str, message_id: int, source,
+                       base_filename: str, file_unique_id: str):
+    """
+    Mendaftarkan job ke antrean persisten (JOB_BACKEND=sqlite) atau ke scheduler
+    lokal. source adalah path file sementara atau bytes upload (lihat
+    download_upload), atau list keduanya untuk album foto. Jika harus
+    menunggu, pengguna diberi tahu posisinya di antrean; jika antrean lokal
+    penuh, file sementara dihapus.
+    """
+    payload = {"base_filename": base_filename, "file_unique_id": file_unique_id}
+    sources = source if isinstance(source, list) else [source]
+    if all(isinstance(item, str) for item in sources):
+        paths = [os.path.abspath(item) for item in sources]
+        payload["path"] = paths if isinstance(source, list) else paths[0]
+    else:
+        payload["data"] = source
+    if job_queue is not None:
+        job_id = await asyncio.to_thread(job_queue.enqueue, doc_type, chat_id, message_id, payload)
+        position = await asyncio.to_thread(job_queue.position, job_id)
+        logger.info(f"Job {job_id} ({doc_type}) dari chat_id {chat_id} masuk antrean persisten.")
+    else:
+        try:
+            position = job_scheduler.submit(
+                chat_id, doc_type, lambda: run_job(context, doc_type, chat_id, message_id, payload)
+            )
+        except QueueFull:
+            logger.warning(f"Antrean penuh, menolak job {doc_type} dari chat_id: {chat_id}")
+            discard_upload(source, doc_type)
+            await context.bot.edit_message_text(
+                text="🚫 Antrean sedang penuh. Silakan kirim ulang file beberapa saat lagi.",
+                chat_id=chat_id,
+                message_id=message_id
+            )
+            return
+    if position:
+        await context.bot.edit_message_text(
+            text=f"⌛ File masuk antrean, posisi {position}. Akan diproses segera setelah slot tersedia.",
+            chat_id=chat_id,
+            message_id=message_id
+        )
+
+
+async def run_job(context, doc_type: str, chat_id: int, message_id: int, payload: dict,
+                  keep_upload_on_failure: bool = False):
     """
-    Ekstrak tabel dari PDF dan konversi ke JSON array of objects.
-    Hanya mengambil tabel pertama di halaman pertama.
+    Menjalankan pipeline sesuai jenis dokumen; dipakai scheduler lokal maupun
+    worker.py. Kegagalan dilempar ulang supaya antrean mencatatnya. Upload
+    sementara dihapus setelah job selesai, kecuali jika job gagal dan akan
+    dicoba lagi (keep_upload_on_failure) atau dibatalkan karena lease-nya
+    diambil alih worker lain (CancelledError): worker berikutnya masih
+    membutuhkan file tersebut.
     """
-    logger.info(f"Membuka PDF: {pdf_path}")
-    with pdfplumber.open(pdf_path) as pdf:
-        first_page = pdf.pages[0]
-        tables = first_page.extract_tables()
-        if not tables:
-            logger.warning(f"Tidak ditemukan tabel di PDF: {pdf_path}")
-            return []
-        table = tables[0]
-        headers = table[0]
-        data = []
-        for row in table[1:]:
-            obj = {}
-            for i, cell in enumerate(row):
-                key = headers[i] if i < len(headers) else f"col_{i+1}"
-                obj[key] = cell if cell not in [None, ""] else None
-            data.append(obj)
-        logger.info(f"Berhasil mengekstrak {len(data)} baris dari PDF.")
+    processors = {
+        "pdf": process_pdf_and_send_json,
+        "docx": process_docx_and_send_json,
+        "image": process_image_and_send_json,
+    }
+    # Upload di memori hanya ada di job scheduler lokal; job persisten selalu punya path.
+    source = payload["data"] if "data" in payload else payload["path"]
+    try:
+        await processors[doc_type](
+            context, chat_id, source, message_id, payload["base_filename"], payload["file_unique_id"]
+        )
+    except Exception:
+        if not keep_upload_on_failure:
+            discard_upload(source, doc_type)
+        raise
+    discard_upload(source, doc_type)
+
+
+async def download_upload(telegram_file, temp_path: str, memory_max_bytes: int = None):
+    """
+    Mengunduh file Telegram. Jika ukurannya diketahui dan tidak melebihi
+    INTAKE_MEMORY_MAX_BYTES maupun memory_max_bytes (dan job diproses di proses
+    ini), isinya dikembalikan sebagai bytes tanpa menyentuh disk; selain itu
+    file disimpan ke temp_path dan path-nya dikembalikan.
+    """
+    size = telegram_file.file_size
+    limit = INTAKE_MEMORY_MAX_BYTES if memory_max_bytes is None else min(INTAKE_MEMORY_MAX_BYTES, memory_max_bytes)
+    if job_queue is None and size is not None and size <= limit:
+        data = bytes(await telegram_file.download_as_bytearray())
+        logger.info(f"Upload {telegram_file.file_id} ({len(data)} byte) diunduh ke memori.")
         return data
+    os.makedirs(os.path.dirname(temp_path), exist_ok=True)
+    await telegram_file.download_to_drive(temp_path)
+    logger.info(f"Upload {telegram_file.file_id} disimpan sementara di: {temp_path}")
+    return temp_path
+
+
+def discard_upload(source, kind: str):
+    """Menghapus file sementara upload; upload di memori cukup dilepas."""
+    if isinstance(source, list):
+        for item in source:
+            discard_upload(item, kind)
+    elif isinstance(source, str) and os.path.exists(source):
+        os.remove(source)
+        logger.info(f"Menghapus file sementara {kind}: {source}")
+
 
-def docx_to_json(docx_path):
+def write_output_json(output_json_path: str, data, payload: bytes = None):
     """
-    Ekstrak tabel dari DOCX dan konversi ke JSON array of objects.
-    Hanya mengambil tabel pertama.
+    Menulis file JSON output dalam format ringkas (json_stream.dump_rows) lalu
+    mematerialisasi view laporan (laba-rugi/laporan keuangan), membuat varian
+    terkompresi untuk /api/download, dan mengindeks line item-nya untuk
+    main.py. payload adalah data yang sudah diserialisasi, jika ada.
+
+    File ditulis ke nama sementara berawalan titik (bukan *.json, sehingga
+    diabaikan katalog dan rebuild) lalu di-rename, jadi pembaca tidak pernah
+    melihat file setengah jadi. Kegagalan di langkah turunan tidak
+    menggagalkan job: view dan indeks dibangun ulang saat dibaca, dan tanpa
+    varian terkompresi file dikirim apa adanya.
     """
-    logger.info(f"Membuka DOCX: {docx_path}")
-    doc = docx.Document(docx_path)
-    if not doc.tables:
-        logger.warning(f"Tidak ditemukan tabel di DOCX: {docx_path}")
-        return []
-    table = doc.tables[0]
-    rows = list(table.rows)
-    headers = [cell.text.strip() for cell in rows[0].cells]
+    if payload is None:
+        payload = dumps_rows(data).encode("utf-8")
+    folder, filename = os.path.split(output_json_path)
+    tmp_path = os.path.join(folder, f".{filename}.tmp")
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(payload)
+        os.replace(tmp_path, output_json_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    logger.info(f"JSON berhasil ditulis ke: {output_json_path}")
+    try:
+        statement_views.materialize(folder, filename, data)
+    except Exception as e:
+        logger.warning(f"Gagal mematerialisasi view laporan untuk {output_json_path}: {e}")
+    try:
+        precompressed.write_variants(folder, filename)
+    except Exception as e:
+        logger.warning(f"Gagal membuat varian terkompresi untuk {output_json_path}: {e}")
+    try:
+        line_item_store.index_file(folder, filename, data)
+    except Exception as e:
+        logger.warning(f"Gagal mengindeks line item untuk {output_json_path}: {e}")
+
+
+def _log_write_failure(output_json_path, future):
+    e = future.exception()
+    if e is not None:
+        logger.error(f"Gagal menyimpan JSON output ke {output_json_path}: {e}", exc_info=e)
+
+
+async def send_output_json(context, chat_id: int, message_id: int, original_base_filename: str, data, caption: str):
+    """
+    Mengirim hasil ekstraksi sebagai dokumen JSON langsung dari memori, sementara
+    salinannya disimpan ke output/ oleh output_writer. Mengembalikan path file
+    output (mungkin belum selesai ditulis saat fungsi ini kembali).
+    """
+    # Gunakan nama file asli sebagai nama file JSON
+    timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+    unique_id = uuid.uuid4().hex[:8]
+    output_json_path = os.path.join("output", f"{original_base_filename}_{timestamp}_{unique_id}.json")
+    logger.info(f"Akan menyimpan JSON ke: {output_json_path}")
+
+    payload = await asyncio.to_thread(lambda: dumps_rows(data).encode("utf-8"))
+    future = output_writer.submit(write_output_json, output_json_path, data, payload)
+    future.add_done_callback(lambda f: _log_write_failure(output_json_path, f))
+
+    await context.bot.edit_message_text(
+        text="✅ JSON berhasil dibuat. Mengirim file ke Anda...",
+        chat_id=chat_id,
+        message_id=message_id
+    )
+    await context.bot.send_document(
+        chat_id=chat_id,
+        document=payload,
+        filename=os.path.basename(output_json_path), # Pastikan nama file benar untuk Telegram
+        caption=caption
+    )
+    return output_json_path
+
+
+async def cached_extraction(doc_type, source, file_unique_id, version, extract):
+    """
+    Mengembalikan hasil ekstraksi dari cache jika file yang sama pernah diproses,
+    selain itu menjalankan extract() dan menyimpan hasilnya (jika tidak kosong).
+    """
+    if isinstance(source, list):
+        # Album: hash dari hash setiap foto sesuai urutannya.
+        hashes = await asyncio.to_thread(lambda: [file_sha256(item) for item in source])
+        content_hash = hashlib.sha256("".join(hashes).encode("ascii")).hexdigest()
+    else:
+        content_hash = await asyncio.to_thread(file_sha256, source)
+    key = ExtractionCache.make_key(doc_type, content_hash, file_unique_id, version)
+    cached = await asyncio.to_thread(extraction_cache.get, doc_type, key)
+    if cached is not None:
+        logger.info(f"Hasil ekstraksi {doc_type} diambil dari cache: {key}")
+        return json.loads(cached)
+    data = await extract()
+    if data:
+        payload = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        await asyncio.to_thread(extraction_cache.put, key, payload)
+    return data
+
+
+async def extract_pdf_rows(pdf_source):
+    """
+    Ekstrak semua tabel PDF dengan membagi halaman ke beberapa worker, lalu
+    menggabungkan tabel lanjutan antar halaman sesuai urutan halaman. Paling
+    banyak PDF_CHUNK_WINDOW job halaman berjalan sekaligus; hasilnya
+    digabungkan begitu tiba (berurutan), tidak dikumpulkan dulu semuanya.
+    """
+    page_count = await extraction_pool.run(pdf_page_count, pdf_source)
+    logger.info(f"PDF {describe_source(pdf_source)} memiliki {page_count} halaman.")
+    starts = iter(range(0, page_count, PDF_PAGES_PER_JOB))
+    window = collections.deque()
+
+    def submit_next():
+        start = next(starts, None)
+        if start is not None:
+            window.append(asyncio.create_task(extraction_pool.run(
+                extract_pdf_page_tables, pdf_source, start, min(start + PDF_PAGES_PER_JOB, page_count)
+            )))
+
+    stitcher = TableStitcher()
     data = []
-    for row in rows[1:]:
-        obj = {}
-        for i, cell in enumerate(row.cells):
-            key = headers[i] if i < len(headers) else f"col_{i+1}"
-            value = cell.text.strip()
-            obj[key] = value if value else None
-        data.append(obj)
-    logger.info(f"Berhasil mengekstrak {len(data)} baris dari DOCX.")
+    table_count = 0
+
+    def add_rows(stitched):
+        nonlocal table_count
+        stitched = list(stitched)
+        data.extend(iter_table_rows(stitched, start=table_count + 1))
+        table_count += len(stitched)
+
+    try:
+        for _ in range(PDF_CHUNK_WINDOW):
+            submit_next()
+        while window:
+            tables = await window[0]
+            window.popleft()
+            submit_next()
+            add_rows(stitcher.feed(tables))
+        add_rows(stitcher.close())
+    finally:
+        # Jika satu potongan gagal, job yang masih di window dibatalkan.
+        for task in window:
+            task.cancel()
+        await asyncio.gather(*window, return_exceptions=True)
+    logger.info(f"Berhasil mengekstrak {len(data)} baris dari PDF.")
     return data
 
-async def process_pdf_and_send_json(context, chat_id, temp_pdf_path, message_id, original_base_filename):
-    output_json_path = None
+
+async def process_pdf_and_send_json(context, chat_id, pdf_source, message_id, original_base_filename, file_unique_id):
     try:
         await context.bot.edit_message_text(
             text="⏳ Memproses PDF untuk menghasilkan JSON...",
             chat_id=chat_id,
             message_id=message_id
         )
-        data = pdf_to_json(temp_pdf_path)
+        data = await cached_extraction(
+            "pdf", pdf_source, file_unique_id, EXTRACTOR_VERSION,
+            lambda: extract_pdf_rows(pdf_source)
+        )
         data = fix_empty_key(data, new_key="Akun")
         if not data:
             await context.bot.edit_message_text(
@@ -105,30 +369,17 @@ async def process_pdf_and_send_json(context, chat_id, temp_pdf_path, message_id,
             logger.info("Tidak ada data tabel yang diekstrak dari PDF.")
             return
         
-        # Gunakan nama file asli sebagai nama file JSON
-        timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-        unique_id = uuid.uuid4().hex[:8] 
-        output_json_path = os.path.join("output", f"{original_base_filename}_{timestamp}_{unique_id}.json")
-        logger.info(f"Akan menyimpan JSON ke: {output_json_path}")
-        
-        with open(output_json_path, "w", encoding="utf-8") as f:
-            json_to_write = json.dumps(data, ensure_ascii=False, indent=2)
-            f.write(json_to_write)
-        logger.info(f"JSON berhasil ditulis ke: {output_json_path}")
+        await send_output_json(context, chat_id, message_id, original_base_filename, data,
+                               "Berikut adalah hasil konversi tabel PDF dalam format JSON.")
+        logger.info(f"File JSON PDF berhasil dikirim ke chat_id: {chat_id}")
 
+    except ExtractionTimeout:
         await context.bot.edit_message_text(
-            text="✅ JSON berhasil dibuat. Mengirim file ke Anda...",
+            text="⏱️ Waktu pemrosesan PDF habis. Coba kirim dokumen yang lebih kecil.",
             chat_id=chat_id,
             message_id=message_id
         )
-        await context.bot.send_document(
-            chat_id=chat_id,
-            document=open(output_json_path, 'rb'),
-            filename=os.path.basename(output_json_path), # Pastikan nama file benar untuk Telegram
-            caption="Berikut adalah hasil konversi tabel PDF dalam format JSON."
-        )
-        logger.info(f"File JSON PDF berhasil dikirim ke chat_id: {chat_id}")
-
+        raise
     except Exception as e:
         logger.error(f"Gagal memproses PDF: {e}", exc_info=True)
         await context.bot.edit_message_text(
@@ -136,19 +387,10 @@ async def process_pdf_and_send_json(context, chat_id, temp_pdf_path, message_id,
             chat_id=chat_id,
             message_id=message_id
         )
-    finally:
-        if os.path.exists(temp_pdf_path):
-            os.remove(temp_pdf_path)
-            logger.info(f"Menghapus file sementara PDF: {temp_pdf_path}")
-        if output_json_path and os.path.exists(output_json_path):
-            # os.remove(output_json_path) # Biarkan terkomentar untuk debugging
-            logger.info(f"File JSON output PDF tetap ada di: {output_json_path}")
-        elif output_json_path:
-            logger.warning(f"File JSON output PDF tidak ditemukan untuk dihapus: {output_json_path}")
+        raise
 
 
 async def handle_pdf(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-    os.makedirs("temp_files", exist_ok=True)
     os.makedirs("output", exist_ok=True)
     chat_id = update.effective_chat.id
     logger.info(f"Menerima PDF dari chat_id: {chat_id}")
@@ -159,172 +401,267 @@ async def handle_pdf(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None
     # Dapatkan nama dasar tanpa ekstensi
     base_filename = os.path.splitext(original_filename)[0]
 
-    temp_pdf_path = os.path.join("temp_files", f"{pdf_file.file_id}.pdf")
-    await pdf_file.download_to_drive(temp_pdf_path)
-    logger.info(f"PDF disimpan sementara di: {temp_pdf_path}")
+    pdf_source = await download_upload(pdf_file, os.path.join("temp_files", f"{pdf_file.file_id}.pdf"),
+                                       memory_max_bytes=PDF_MEMORY_MAX_BYTES)
     status_message = await context.bot.send_message(
         chat_id=chat_id,
         text="✅ File PDF diterima. Memulai ekstraksi tabel..."
     )
-    context.application.create_task(
-        process_pdf_and_send_json(context, chat_id, temp_pdf_path, status_message.message_id, base_filename)
-    )
+    await schedule_job(context, chat_id, "pdf", status_message.message_id, pdf_source, base_filename,
+                       update.message.document.file_unique_id)
 
-async def handle_docx(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-    os.makedirs("temp_files", exist_ok=True)
-    os.makedirs("output", exist_ok=True)
-    chat_id = update.effective_chat.id
-    logger.info(f"Menerima DOCX dari chat_id: {chat_id}")
-    docx_file = await update.message.document.get_file()
-    
-    # Ambil nama file asli dari dokumen yang diunggah
-    original_filename = update.message.document.file_name
-    # Dapatkan nama dasar tanpa ekstensi
-    base_filename = os.path.splitext(original_filename)[0]
-
-    temp_docx_path = os.path.join("temp_files", f"{docx_file.file_id}.docx")
-    await docx_file.download_to_drive(temp_docx_path)
-    logger.info(f"DOCX disimpan sementara di: {temp_docx_path}")
-    status_message = await context.bot.send_message(
-        chat_id=chat_id,
-        text="✅ File DOCX diterima. Memulai ekstraksi tabel..."
-    )
-    output_json_path = None
+async def process_docx_and_send_json(context, chat_id, docx_source, message_id, original_base_filename, file_unique_id):
     try:
-        data = docx_to_json(temp_docx_path)
+        await context.bot.edit_message_text(
+            text="⏳ Memproses DOCX untuk menghasilkan JSON...",
+            chat_id=chat_id,
+            message_id=message_id
+        )
+        data = await cached_extraction(
+            "docx", docx_source, file_unique_id, EXTRACTOR_VERSION,
+            lambda: extraction_pool.run(docx_to_json, docx_source)
+        )
         data = fix_empty_key(data, new_key="Akun")
         if not data:
             await context.bot.edit_message_text(
                 text="⚠️ Tidak ditemukan tabel pada DOCX.",
                 chat_id=chat_id,
-                message_id=status_message.message_id
+                message_id=message_id
             )
             logger.info("Tidak ada data tabel yang diekstrak dari DOCX.")
             return
         
-        # Gunakan nama file asli sebagai nama file JSON
-        timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-        unique_id = uuid.uuid4().hex[:8] 
-        output_json_path = os.path.join("output", f"{base_filename}_{timestamp}_{unique_id}.json")
-        logger.info(f"Akan menyimpan JSON ke: {output_json_path}")
-
-        with open(output_json_path, "w", encoding="utf-8") as f:
-            json_to_write = json.dumps(data, ensure_ascii=False, indent=2)
-            f.write(json_to_write)
-        logger.info(f"JSON berhasil ditulis ke: {output_json_path}")
+        await send_output_json(context, chat_id, message_id, original_base_filename, data,
+                               "Berikut adalah hasil konversi tabel DOCX dalam format JSON.")
+        logger.info(f"File JSON DOCX berhasil dikirim ke chat_id: {chat_id}")
 
+    except ExtractionTimeout:
         await context.bot.edit_message_text(
-            text="✅ JSON berhasil dibuat. Mengirim file ke Anda...",
-            chat_id=chat_id,
-            message_id=status_message.message_id
-        )
-        await context.bot.send_document(
+            text="⏱️ Waktu pemrosesan DOCX habis. Coba kirim dokumen yang lebih kecil.",
             chat_id=chat_id,
-            document=open(output_json_path, 'rb'),
-            filename=os.path.basename(output_json_path), # Pastikan nama file benar untuk Telegram
-            caption="Berikut adalah hasil konversi tabel DOCX dalam format JSON."
+            message_id=message_id
         )
-        logger.info(f"File JSON DOCX berhasil dikirim ke chat_id: {chat_id}")
-
+        raise
     except Exception as e:
         logger.error(f"Gagal memproses DOCX: {e}", exc_info=True)
         await context.bot.edit_message_text(
             text="❌ Terjadi kesalahan saat memproses DOCX.",
             chat_id=chat_id,
-            message_id=status_message.message_id
+            message_id=message_id
         )
-    finally:
-        if os.path.exists(temp_docx_path):
-            os.remove(temp_docx_path)
-            logger.info(f"Menghapus file sementara DOCX: {temp_docx_path}")
-        if output_json_path and os.path.exists(output_json_path):
-            # os.remove(output_json_path) # Biarkan terkomentar untuk debugging
-            logger.info(f"File JSON output DOCX tetap ada di: {output_json_path}")
-        elif output_json_path:
-            logger.warning(f"File JSON output DOCX tidak ditemukan untuk dihapus: {output_json_path}")
+        raise
+
+
+async def handle_docx(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    os.makedirs("output", exist_ok=True)
+    chat_id = update.effective_chat.id
+    logger.info(f"Menerima DOCX dari chat_id: {chat_id}")
+    docx_file = await update.message.document.get_file()
+    
+    # Ambil nama file asli dari dokumen yang diunggah
+    original_filename = update.message.document.file_name
+    # Dapatkan nama dasar tanpa ekstensi
+    base_filename = os.path.splitext(original_filename)[0]
+
+    docx_source = await download_upload(docx_file, os.path.join("temp_files", f"{docx_file.file_id}.docx"))
+    status_message = await context.bot.send_message(
+        chat_id=chat_id,
+        text="✅ File DOCX diterima. Memulai ekstraksi tabel..."
+    )
+    await schedule_job(context, chat_id, "docx", status_message.message_id, docx_source, base_filename,
+                       update.message.document.file_unique_id)
 
 
 async def handle_image(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-    os.makedirs("temp_images", exist_ok=True)
     os.makedirs("output", exist_ok=True)
 
     chat_id = update.effective_chat.id
     logger.info(f"Menerima gambar dari chat_id: {chat_id}")
-    photo_file = await update.message.photo[-1].get_file()
+    photo = update.message.photo[-1]
+
+    media_group_id = update.message.media_group_id
+    if media_group_id:
+        # Foto album didaftarkan sebelum diunduh: unduhan yang lambat tidak
+        # boleh membuat window pengumpul habis dan memecah album.
+        album_collector.add(
+            (chat_id, media_group_id), update.message.message_id, photo,
+            lambda photos: schedule_album(context, chat_id, media_group_id, photos)
+        )
+        return
+
+    photo_file = await photo.get_file()
     
     # Untuk foto, Telegram tidak menyediakan nama file asli.
     # Kita akan menggunakan file_unique_id sebagai nama dasar.
     base_filename = photo_file.file_unique_id
 
-    temp_image_path = os.path.join("temp_images", f"{photo_file.file_id}.jpg")
-    await photo_file.download_to_drive(temp_image_path)
-    logger.info(f"Gambar disimpan sementara di: {temp_image_path}")
+    image_source = await download_upload(photo_file, os.path.join("temp_images", f"{photo_file.file_id}.jpg"))
 
     status_message = await context.bot.send_message(
         chat_id=chat_id,
         text="✅ Gambar diterima. Memulai analisis AI..."
     )
 
-    context.application.create_task(
-        process_image_and_send_json(context, chat_id, temp_image_path, status_message.message_id, base_filename)
-    )
+    await schedule_job(context, chat_id, "image", status_message.message_id, image_source, base_filename,
+                       photo_file.file_unique_id)
 
 
-async def process_image_and_send_json(context: ContextTypes.DEFAULT_TYPE, chat_id: int, temp_image_path: str, message_id: int, original_base_filename: str):
-    output_json_path = None
+async def schedule_album(context: ContextTypes.DEFAULT_TYPE, chat_id: int, media_group_id: str, photos):
+    """
+    Mengunduh semua foto album (list PhotoSize sesuai urutan di album) secara
+    paralel lalu menjadwalkan satu job untuk semuanya. Album berisi satu foto
+    diproses seperti foto biasa. Jika unduhan atau pesan status gagal, foto
+    yang sudah terunduh dihapus lagi dan pengguna diberi tahu lewat pesan
+    error; exception dilempar ulang supaya dicatat AlbumCollector.
+    """
+    logger.info(f"Album {media_group_id} dari chat_id {chat_id} berisi {len(photos)} foto.")
+    sources = [None] * len(photos)
 
+    async def download(index, photo):
+        photo_file = await photo.get_file()
+        sources[index] = await download_upload(photo_file, os.path.join("temp_images", f"{photo_file.file_id}.jpg"))
+
+    scheduled = False
+    status_message = None
     try:
+        # Semua unduhan ditunggu selesai dulu supaya tidak ada file yang
+        # terunduh setelah pembersihan di bawah.
+        results = await asyncio.gather(*(download(index, photo) for index, photo in enumerate(photos)),
+                                       return_exceptions=True)
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+        if len(photos) == 1:
+            source, = sources
+            file_unique_id = base_filename = photos[0].file_unique_id
+            text = "✅ Gambar diterima. Memulai analisis AI..."
+        else:
+            source = sources
+            file_unique_id = ",".join(photo.file_unique_id for photo in photos)
+            base_filename = f"album_{media_group_id}"
+            text = f"✅ Album {len(photos)} gambar diterima. Memulai analisis AI..."
+        status_message = await context.bot.send_message(chat_id=chat_id, text=text)
+        scheduled = True
+        await schedule_job(context, chat_id, "image", status_message.message_id, source, base_filename,
+                           file_unique_id)
+    except Exception:
+        text = "❌ Terjadi kesalahan saat memproses album. Silakan kirim ulang foto."
+        try:
+            if status_message is None:
+                await context.bot.send_message(chat_id=chat_id, text=text)
+            else:
+                await context.bot.edit_message_text(text=text, chat_id=chat_id, message_id=status_message.message_id)
+        except Exception as e:
+            logger.error(f"Gagal memberi tahu kegagalan album {media_group_id} ke chat_id {chat_id}: {e}")
+        raise
+    finally:
+        if not scheduled:
+            discard_upload([source for source in sources if source is not None], "gambar")
+
+
+def order_album_rows(rows, page_count):
+    """
+    Mengurutkan baris hasil album per halaman (key "_page", stabil). Baris
+    tanpa nomor halaman yang valid dianggap berada di halaman baris
+    sebelumnya.
+    """
+    page = 1
+    for row in rows:
+        try:
+            value = int(row.get("_page"))
+        except (TypeError, ValueError):
+            value = None
+        if value is not None and 1 <= value <= page_count:
+            page = value
+        row["_page"] = page
+    rows.sort(key=lambda row: row["_page"])
+    return rows
+
+
+async def gemini_image_rows(context: ContextTypes.DEFAULT_TYPE, chat_id: int, message_id: int, image_source):
+    """
+    Streaming hasil Gemini untuk satu gambar, atau semua foto album (list) dalam
+    satu request, dan parsing menjadi list object secara inkremental; baris
+    album diurutkan per halaman. Jumlah baris yang sudah diterima ditampilkan ke pengguna
+    selama streaming. Mengembalikan None (setelah memberi tahu pengguna) jika
+    hasil bukan JSON array; stream langsung dihentikan begitu hal itu terdeteksi.
+    """
+    parser = IncrementalRowParser()
+    data = []
+    last_update = time.monotonic()
+    if isinstance(image_source, list):
+        logger.info(f"Memulai streaming JSON dari Gemini untuk album {len(image_source)} gambar.")
+    else:
+        logger.info(f"Memulai streaming JSON dari Gemini untuk gambar: {describe_source(image_source)}")
+    try:
+        async with contextlib.aclosing(gemini_vision_extractor.stream_json_output(image_source)) as stream:
+            async for chunk in stream:
+                rows = parser.feed(chunk)
+                if not rows:
+                    continue
+                data.extend(rows)
+                now = time.monotonic()
+                if now - last_update >= PROGRESS_UPDATE_INTERVAL:
+                    last_update = now
+                    await update_progress(
+                        context, chat_id, message_id,
+                        f"⏳ AI sedang memproses gambar... {len(data)} baris diterima."
+                    )
+        parser.close()
+    except NotJSONArrayError as e:
         await context.bot.edit_message_text(
-            text="⏳ AI sedang memproses gambar untuk menghasilkan JSON...",
+            text="⚠️ Maaf, AI tidak dapat menghasilkan JSON dari gambar ini (hasil tidak dimulai dengan '[').",
             chat_id=chat_id,
             message_id=message_id
         )
+        logger.warning(f"Hasil Gemini bukan JSON array: {e}")
+        return None
+    except JSONStreamError as e:
+        logger.error(f"Gagal parsing JSON hasil Gemini: {e}.")
+        await context.bot.edit_message_text(
+            text=f"⚠️ Terjadi kesalahan saat memproses JSON dari AI. Coba lagi atau pastikan gambar tabel jelas. Error: {e}",
+            chat_id=chat_id,
+            message_id=message_id
+        )
+        return None
 
-        json_result = ""
-        logger.info(f"Memulai streaming JSON dari Gemini untuk gambar: {temp_image_path}")
-        async for chunk in gemini_vision_extractor.stream_json_output(temp_image_path):
-            json_result += chunk
-        logger.info(f"Selesai streaming dari Gemini. Ukuran hasil: {len(json_result)} karakter.")
+    logger.info(f"Selesai streaming dari Gemini. Berhasil parsing {len(data)} baris.")
+    if isinstance(image_source, list):
+        data = order_album_rows(data, len(image_source))
+    return data
 
-        print("DEBUG OUTPUT GEMINI (Raw):", json_result)
 
-        if json_result.strip().startswith("```"):
-            logger.info("Mendeteksi format markdown code block, membersihkan.")
-            json_result = json_result.strip().lstrip("`json").lstrip("`").strip()
-            if json_result.endswith("```"):
-                json_result = json_result[:json_result.rfind("```")].strip()
-            logger.info(f"Setelah membersihkan markdown. Ukuran hasil: {len(json_result)} karakter.")
+async def update_progress(context: ContextTypes.DEFAULT_TYPE, chat_id: int, message_id: int, text: str):
+    """Memperbarui pesan status; kegagalan (mis. rate limit edit) diabaikan."""
+    try:
+        await context.bot.edit_message_text(text=text, chat_id=chat_id, message_id=message_id)
+    except TelegramError as e:
+        logger.debug(f"Gagal memperbarui pesan progres: {e}")
 
 
-        if not json_result.strip().startswith("["):
-            await context.bot.edit_message_text(
-                text="⚠️ Maaf, AI tidak dapat menghasilkan JSON dari gambar ini (hasil tidak dimulai dengan '[').",
-                chat_id=chat_id,
-                message_id=message_id
-            )
-            logger.warning(f"Hasil Gemini bukan JSON array: {json_result[:100]}...")
+async def process_image_and_send_json(context: ContextTypes.DEFAULT_TYPE, chat_id: int, image_source, message_id: int, original_base_filename: str, file_unique_id: str):
+    try:
+        await context.bot.edit_message_text(
+            text="⏳ AI sedang memproses gambar untuk menghasilkan JSON...",
+            chat_id=chat_id,
+            message_id=message_id
+        )
+
+        data = await cached_extraction(
+            "image", image_source, file_unique_id,
+            gemini_vision_extractor.ALBUM_PROMPT_VERSION if isinstance(image_source, list)
+            else gemini_vision_extractor.PROMPT_VERSION,
+            lambda: gemini_image_rows(context, chat_id, message_id, image_source)
+        )
+        if data is None:
             return
 
         # --- Tambahan: Perbaiki key kosong ---
-        data = []
         try:
-            data = json.loads(json_result)
-            logger.info("Berhasil parsing JSON dari hasil Gemini.")
             data = fix_empty_key(data, new_key="Akun")
-            json_result_fixed = json.dumps(data, ensure_ascii=False, indent=2)
-            logger.info("Berhasil memperbaiki key kosong dan memformat ulang JSON.")
-        except json.JSONDecodeError as jde:
-            logger.error(f"Gagal parsing JSON hasil Gemini: {jde}. Menggunakan hasil mentah.", exc_info=True)
-            json_result_fixed = json_result.strip()
-            await context.bot.edit_message_text(
-                text=f"⚠️ Terjadi kesalahan saat memproses JSON dari AI. Coba lagi atau pastikan gambar tabel jelas. Error: {jde}",
-                chat_id=chat_id,
-                message_id=message_id
-            )
-            return
+            logger.info("Berhasil memperbaiki key kosong pada JSON.")
         except Exception as e:
             logger.error(f"Gagal memproses JSON hasil Gemini (selain JSONDecodeError): {e}", exc_info=True)
-            json_result_fixed = json_result.strip()
             await context.bot.edit_message_text(
                 text=f"⚠️ Terjadi kesalahan tidak terduga saat memproses JSON dari AI. Error: {e}",
                 chat_id=chat_id,
@@ -333,28 +670,19 @@ async def process_image_and_send_json(context: ContextTypes.DEFAULT_TYPE, chat_i
             return
         # --------------------------------------
 
-        # Gunakan nama file asli sebagai nama file JSON
-        timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-        unique_id = uuid.uuid4().hex[:8]
-        output_json_path = os.path.join("output", f"{original_base_filename}_{timestamp}_{unique_id}.json")
-
-        with open(output_json_path, "w", encoding="utf-8") as f:
-            f.write(json_result_fixed)
-        logger.info(f"JSON berhasil ditulis ke: {output_json_path}")
+        await send_output_json(context, chat_id, message_id, original_base_filename, data,
+                               "Berikut adalah hasil konversi tabel dalam format JSON.")
+        logger.info(f"File JSON gambar berhasil dikirim ke chat_id: {chat_id}")
 
+    except gemini_vision_extractor.RETRYABLE_ERRORS as e:
+        # Percobaan ulang ke Gemini sudah habis (kuota/layanan sibuk).
+        logger.error(f"Gemini tidak tersedia untuk gambar: {e}")
         await context.bot.edit_message_text(
-            text="✅ JSON berhasil dibuat. Mengirim file ke Anda...",
+            text="⏳ Layanan AI sedang sibuk atau kuota habis. Silakan kirim ulang gambar beberapa saat lagi.",
             chat_id=chat_id,
             message_id=message_id
         )
-        await context.bot.send_document(
-            chat_id=chat_id,
-            document=open(output_json_path, 'rb'),
-            filename=os.path.basename(output_json_path), # Pastikan nama file benar untuk Telegram
-            caption="Berikut adalah hasil konversi tabel dalam format JSON."
-        )
-        logger.info(f"File JSON gambar berhasil dikirim ke chat_id: {chat_id}")
-
+        raise
     except Exception as e:
         logger.error(f"Gagal memproses gambar: {e}", exc_info=True)
         await context.bot.edit_message_text(
@@ -362,15 +690,7 @@ async def process_image_and_send_json(context: ContextTypes.DEFAULT_TYPE, chat_i
             chat_id=chat_id,
             message_id=message_id
         )
-    finally:
-        if os.path.exists(temp_image_path):
-            os.remove(temp_image_path)
-            logger.info(f"Menghapus file sementara gambar: {temp_image_path}")
-        if output_json_path and os.path.exists(output_json_path):
-            # os.remove(output_json_path) # Biarkan terkomentar untuk debugging
-            logger.info(f"File JSON output gambar tetap ada di: {output_json_path}")
-        elif output_json_path:
-            logger.warning(f"File JSON output gambar tidak ditemukan untuk dihapus: {output_json_path}")
+        raise
 
 
 def fix_empty_key(json_data, new_key="Akun"):
@@ -384,11 +704,24 @@ def fix_empty_key(json_data, new_key="Akun"):
     return json_data
 
 
+async def shutdown_pools(application: Application) -> None:
+    extraction_pool.shutdown()
+    # Menunggu file output yang belum selesai disimpan.
+    output_writer.shutdown(wait=True)
+
+
 def main() -> None:
-    application = Application.builder().token(TELEGRAM_BOT_TOKEN).build()
+    application = (
+        Application.builder()
+        .token(TELEGRAM_BOT_TOKEN)
+        .post_shutdown(shutdown_pools)
+        .build()
+    )
     application.add_handler(MessageHandler(filters.Document.PDF, handle_pdf))
     application.add_handler(MessageHandler(filters.Document.DOCX, handle_docx))
     application.add_handler(CommandHandler("start", start))
+    application.add_handler(CommandHandler("cachestats", cache_stats))
+    application.add_handler(CommandHandler("jobstats", job_stats))
     application.add_handler(MessageHandler(filters.PHOTO, handle_image))
 
     print("="*50)
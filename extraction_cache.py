@@ -0,0 +1,135 @@
+"""
+Cache hasil ekstraksi di disk, dialamatkan berdasarkan isi file.
+
+Kunci cache adalah hash dari: jenis dokumen, hash isi file, file_unique_id
+Telegram, dan versi extractor/prompt. Jika pengguna mengirim ulang foto atau
+PDF yang sama, hasil JSON yang tersimpan langsung dipakai tanpa memanggil
+Gemini/pdfplumber lagi. Ukuran total dibatasi; entri yang paling lama tidak
+dipakai (mtime) dibuang lebih dulu.
+"""
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+def file_sha256(path, chunk_size=1024 * 1024):
+    """SHA-256 isi file; path boleh berupa bytes isi file itu sendiri (upload di memori)."""
+    if isinstance(path, (bytes, bytearray)):
+        return hashlib.sha256(path).hexdigest()
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(chunk_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ExtractionCache:
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._stats = {}
+        self._sizes = None
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            os.getenv("EXTRACTION_CACHE_DIR", os.path.join("cache", "extraction")),
+            int(os.getenv("EXTRACTION_CACHE_MAX_BYTES", 512 * 1024 * 1024)),
+        )
+
+    @staticmethod
+    def make_key(doc_type, content_hash, file_unique_id, version):
+        raw = "|".join([doc_type, content_hash, file_unique_id or "", str(version)])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    def _load_sizes(self):
+        # Dipanggil dengan _lock dipegang.
+        if self._sizes is None:
+            os.makedirs(self.directory, exist_ok=True)
+            self._sizes = {}
+            with os.scandir(self.directory) as it:
+                for entry in it:
+                    if entry.name.endswith(".json"):
+                        self._sizes[entry.name[:-5]] = entry.stat().st_size
+        return self._sizes
+
+    def _count(self, doc_type, hit):
+        counters = self._stats.setdefault(doc_type, {"hits": 0, "misses": 0})
+        counters["hits" if hit else "misses"] += 1
+
+    def get(self, doc_type, key):
+        """Mengembalikan bytes JSON tersimpan atau None."""
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)  # Tandai sebagai baru dipakai untuk eviksi LRU.
+        except FileNotFoundError:
+            with self._lock:
+                self._count(doc_type, hit=False)
+            return None
+        with self._lock:
+            self._count(doc_type, hit=True)
+        return data
+
+    def put(self, key, data):
+        """Menyimpan bytes JSON secara atomik lalu mengeviksi jika melewati batas."""
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            sizes = self._load_sizes()
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, self._path(key))
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        with self._lock:
+            sizes[key] = len(data)
+            self._evict(sizes)
+
+    def _evict(self, sizes):
+        total = sum(sizes.values())
+        if total <= self.max_bytes:
+            return
+        by_age = []
+        for key in sizes:
+            try:
+                by_age.append((os.stat(self._path(key)).st_mtime, key))
+            except FileNotFoundError:
+                by_age.append((0, key))
+        by_age.sort()
+        for _, key in by_age:
+            if total <= self.max_bytes:
+                break
+            total -= sizes.pop(key)
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass
+            logger.info(f"Mengeluarkan entri cache ekstraksi: {key}")
+
+    def stats(self):
+        with self._lock:
+            sizes = self._load_sizes()
+            per_type = {}
+            for doc_type, counters in self._stats.items():
+                lookups = counters["hits"] + counters["misses"]
+                per_type[doc_type] = dict(counters, hit_rate=round(counters["hits"] / lookups, 4) if lookups else None)
+            return {
+                "entries": len(sizes),
+                "bytes": sum(sizes.values()),
+                "max_bytes": self.max_bytes,
+                "per_type": per_type,
+            }
@@ -0,0 +1,121 @@
+"""
+Process pool untuk ekstraksi tabel yang berat CPU (pdfplumber, python-docx),
+supaya event loop bot hanya menunggu hasil dan tetap responsif untuk chat lain.
+
+- Jumlah worker, timeout per job, dan daur ulang worker setelah N job dapat
+  dikonfigurasi (EXTRACTION_WORKERS, EXTRACTION_TIMEOUT,
+  EXTRACTION_MAX_TASKS_PER_CHILD).
+- Worker didaur ulang setelah rata-rata N job per worker untuk membatasi
+  pertumbuhan memori pdfplumber: executor lama berhenti menerima job,
+  menyelesaikan job yang sudah masuk, lalu prosesnya keluar. (Parameter
+  max_tasks_per_child bawaan ProcessPoolExecutor bisa deadlock di Python
+  3.11 saat worker keluar sementara masih ada job antre.)
+- Timeout dihitung di dalam worker sejak job mulai berjalan (bukan sejak
+  masuk antrean), memakai SIGALRM, sehingga job yang macet dihentikan tanpa
+  membunuh worker.
+- Jika proses worker mati mendadak (OOM kill, segfault di library PDF),
+  executor menjadi rusak (BrokenProcessPool) dan langsung diganti; job yang
+  sedang berjalan di executor itu dilaporkan gagal, job berikutnya memakai
+  executor baru.
+"""
+import asyncio
+import logging
+import multiprocessing
+import os
+import signal
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+logger = logging.getLogger(__name__)
+
+
+class ExtractionTimeout(Exception):
+    """Job ekstraksi melewati batas waktu."""
+
+
+def _run_with_deadline(func, args, timeout):
+    """Dijalankan di proses worker (thread utama), jadi SIGALRM bisa dipakai."""
+    if not timeout or not hasattr(signal, "setitimer"):
+        return func(*args)
+
+    def on_alarm(signum, frame):
+        raise ExtractionTimeout(f"{func.__name__} melewati batas waktu {timeout} detik")
+
+    previous = signal.signal(signal.SIGALRM, on_alarm)
+    signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        return func(*args)
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+class ExtractionPool:
+    def __init__(self, max_workers=None, timeout=120.0, max_tasks_per_child=20):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.timeout = timeout
+        self.max_tasks_per_child = max_tasks_per_child
+        self._executor = None
+        self._jobs_on_executor = 0
+
+    @classmethod
+    def from_env(cls):
+        workers = os.getenv("EXTRACTION_WORKERS")
+        return cls(
+            max_workers=int(workers) if workers else None,
+            timeout=float(os.getenv("EXTRACTION_TIMEOUT", 120)),
+            max_tasks_per_child=int(os.getenv("EXTRACTION_MAX_TASKS_PER_CHILD", 20)),
+        )
+
+    def _get_executor(self):
+        if (self._executor is not None and self.max_tasks_per_child
+                and self._jobs_on_executor >= self.max_tasks_per_child * self.max_workers):
+            logger.info("Mendaur ulang worker ekstraksi.")
+            self._executor.shutdown(wait=False)
+            self._executor = None
+        if self._executor is None:
+            # 'spawn' supaya worker tidak mewarisi thread/koneksi milik bot.
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+            self._jobs_on_executor = 0
+        self._jobs_on_executor += 1
+        return self._executor
+
+    async def run(self, func, *args, timeout=None):
+        """
+        Menjalankan func(*args) di proses worker dan menunggu hasilnya.
+        func harus fungsi level modul (bisa di-pickle). ExtractionTimeout
+        dilempar jika job berjalan lebih lama dari timeout, BrokenProcessPool
+        jika proses worker mati saat job berjalan.
+        """
+        loop = asyncio.get_running_loop()
+        call = (_run_with_deadline, func, args, timeout or self.timeout)
+        executor = self._get_executor()
+        try:
+            future = loop.run_in_executor(executor, *call)
+        except BrokenProcessPool:
+            # Executor sudah rusak sebelum job ini masuk; job belum berjalan,
+            # jadi aman dicoba sekali di executor baru.
+            self._discard_executor(executor)
+            executor = self._get_executor()
+            future = loop.run_in_executor(executor, *call)
+        try:
+            return await future
+        except BrokenProcessPool:
+            # Job ini (atau job lain di executor yang sama) mematikan worker.
+            # Tidak diulang supaya job penyebab crash tidak merusak executor baru.
+            logger.error(f"Worker ekstraksi mati saat menjalankan {func.__name__}; executor diganti.")
+            self._discard_executor(executor)
+            raise
+
+    def _discard_executor(self, executor):
+        if self._executor is executor:
+            self._executor = None
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
@@ -1,18 +1,145 @@
 """
 Modul untuk mengekstrak tabel dari gambar menggunakan Google Gemini Vision API,
 dan mengubahnya menjadi JSON mentah.
+
+Client Gemini dikonfigurasi sekali dan model di-cache per nama. Semua panggilan
+melewati rate limiter token-bucket (request/menit) dan semaphore konkurensi,
+sehingga job bot menunggu kapasitas alih-alih gagal karena kuota. Error yang
+bisa dicoba ulang diulang dengan exponential backoff + jitter; jika percobaan
+habis, error terakhir diteruskan ke pemanggil. Lock dan semaphore dibuat per
+event loop saat pertama dipakai, sehingga modul aman dipakai dari beberapa
+asyncio.run() berturut-turut.
+
+Untuk pengujian lokal, set_model_factory() bisa diisi dengan model palsu yang
+memiliki method async generate_content_async(contents, stream=True).
 """
+import asyncio
+import contextlib
+import hashlib
+import io
+import logging
 import os
+import random
+import time
+import weakref
+
 import google.generativeai as genai
 import PIL.Image
-import asyncio
+from google.api_core import exceptions as google_exceptions
+
+from image_preprocessing import PreprocessConfig, preprocess_image
+
+logger = logging.getLogger(__name__)
+
+GEMINI_REQUESTS_PER_MINUTE = float(os.getenv("GEMINI_REQUESTS_PER_MINUTE", 15))
+GEMINI_BURST = float(os.getenv("GEMINI_BURST", 3))
+GEMINI_MAX_CONCURRENCY = int(os.getenv("GEMINI_MAX_CONCURRENCY", 4))
+GEMINI_MAX_RETRIES = int(os.getenv("GEMINI_MAX_RETRIES", 5))
+GEMINI_BACKOFF_BASE = float(os.getenv("GEMINI_BACKOFF_BASE", 1.0))
+GEMINI_BACKOFF_MAX = float(os.getenv("GEMINI_BACKOFF_MAX", 30.0))
+
+RETRYABLE_ERRORS = (
+    google_exceptions.ResourceExhausted,
+    google_exceptions.TooManyRequests,
+    google_exceptions.ServiceUnavailable,
+    google_exceptions.InternalServerError,
+    google_exceptions.DeadlineExceeded,
+    google_exceptions.GatewayTimeout,
+    asyncio.TimeoutError,
+    ConnectionError,
+)
+
+
+class TokenBucket:
+    """
+    Rate limiter token-bucket async. Token bertambah rate_per_minute/60 per
+    detik sampai kapasitas; acquire() menunggu sampai ada token. Saldo token
+    dipakai bersama, lock penjaga urutan dibuat per event loop.
+    """
+
+    def __init__(self, rate_per_minute, capacity=1.0):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = max(1.0, capacity)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._locks = weakref.WeakKeyDictionary()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self):
+        # Lock menjaga urutan FIFO antar penunggu.
+        loop = asyncio.get_running_loop()
+        lock = self._locks.get(loop)
+        if lock is None:
+            lock = self._locks[loop] = asyncio.Lock()
+        async with lock:
+            while True:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+_configured = False
+_model_factory = None
+_models = {}
+_rate_limiter = TokenBucket(GEMINI_REQUESTS_PER_MINUTE, GEMINI_BURST)
+_semaphores = weakref.WeakKeyDictionary()
+preprocess_config = PreprocessConfig.from_env()
+
+
+def _concurrency():
+    """Semaphore GEMINI_MAX_CONCURRENCY untuk event loop yang sedang berjalan."""
+    loop = asyncio.get_running_loop()
+    semaphore = _semaphores.get(loop)
+    if semaphore is None:
+        semaphore = _semaphores[loop] = asyncio.Semaphore(GEMINI_MAX_CONCURRENCY)
+    return semaphore
+
 
 def configure_gemini():
-    """Konfigurasi Gemini API dengan kunci dari environment variables."""
+    """Konfigurasi Gemini API dengan kunci dari environment variables (sekali saja)."""
+    global _configured
+    if _configured:
+        return
     api_key = os.getenv("GEMINI_API_KEY")
     if not api_key:
         raise ValueError("GEMINI_API_KEY tidak ditemukan di file .env")
     genai.configure(api_key=api_key)
+    _configured = True
+
+
+def set_model_factory(factory):
+    """
+    Mengganti pembuat model (default genai.GenerativeModel), misalnya dengan
+    model palsu lokal. None mengembalikan ke default. Cache model dikosongkan.
+    """
+    global _model_factory
+    _model_factory = factory
+    _models.clear()
+
+
+def get_model(model_name):
+    """Model di-cache per nama supaya tidak dibuat ulang untuk setiap gambar."""
+    model = _models.get(model_name)
+    if model is None:
+        if _model_factory is None:
+            configure_gemini()
+            model = genai.GenerativeModel(model_name)
+        else:
+            model = _model_factory(model_name)
+        _models[model_name] = model
+    return model
+
+
+def backoff_delay(attempt):
+    """Full jitter: acak antara 0 dan base * 2^attempt, dibatasi GEMINI_BACKOFF_MAX."""
+    return random.uniform(0, min(GEMINI_BACKOFF_MAX, GEMINI_BACKOFF_BASE * (2 ** attempt)))
+
 
 def generate_gemini_prompt():
     return """
@@ -28,23 +155,89 @@ def generate_gemini_prompt():
     ]
     """
 
-async def stream_json_output(image_path: str, model_name: str = 'gemini-1.5-flash'):
+
+def generate_album_prompt():
+    """Prompt untuk beberapa gambar sekaligus (halaman berurutan dari satu dokumen)."""
+    return generate_gemini_prompt() + """
+    - Gambar-gambar ini adalah halaman berurutan dari SATU dokumen; gambar pertama adalah halaman 1,
+      gambar kedua halaman 2, dan seterusnya.
+    - Gabungkan baris dari semua halaman menjadi SATU JSON array, urut per halaman.
+    - Tambahkan key "_page" (nomor halaman, angka mulai 1) di setiap object.
+    - Jika tabel berlanjut ke halaman berikutnya tanpa header, gunakan header dari halaman sebelumnya.
+    """
+
+
+# Versi prompt dihitung dari isi prompt, dipakai sebagai bagian kunci cache hasil.
+PROMPT_VERSION = hashlib.sha1(generate_gemini_prompt().encode("utf-8")).hexdigest()[:12]
+ALBUM_PROMPT_VERSION = hashlib.sha1(generate_album_prompt().encode("utf-8")).hexdigest()[:12]
+
+
+async def stream_content(contents, model_name='gemini-1.5-flash'):
+    """
+    Streaming teks dari Gemini dengan rate limit, batas konkurensi, dan retry.
+    Retry hanya dilakukan sebelum chunk pertama diterima, supaya output yang
+    sudah dikirim ke pemanggil tidak terduplikasi. Stream respons selalu
+    ditutup, juga saat pemanggil berhenti membaca di tengah jalan.
+    """
+    model = get_model(model_name)
+    async with _concurrency():
+        attempt = 0
+        while True:
+            await _rate_limiter.acquire()
+            started = False
+            try:
+                response_stream = await model.generate_content_async(contents, stream=True)
+                chunks = aiter(response_stream)
+                try:
+                    async for chunk in chunks:
+                        if chunk.text:
+                            started = True
+                            yield chunk.text
+                finally:
+                    await _aclose(chunks)
+                return
+            except RETRYABLE_ERRORS as e:
+                if started or attempt >= GEMINI_MAX_RETRIES:
+                    raise
+                delay = backoff_delay(attempt)
+                attempt += 1
+                logger.warning(f"Gemini error yang bisa dicoba ulang ({e}); percobaan {attempt} dalam {delay:.1f} detik.")
+                await asyncio.sleep(delay)
+
+
+async def _aclose(iterator):
+    """Menutup async iterator (stream respons Gemini) jika mendukung aclose()."""
+    aclose = getattr(iterator, "aclose", None)
+    if aclose is not None:
+        await aclose()
+
+
+def _load_image(image_path):
+    if isinstance(image_path, (bytes, bytearray)):
+        image_path = io.BytesIO(image_path)
+    if preprocess_config.enabled:
+        return preprocess_image(image_path, preprocess_config)
+    return PIL.Image.open(image_path)
+
+
+async def stream_json_output(image_path, model_name: str = 'gemini-1.5-flash'):
     """
     Menghasilkan hasil JSON secara streaming dari gambar tabel menggunakan Gemini Vision.
+    image_path berupa path, atau bytes gambar yang diunduh langsung ke memori.
+    List gambar (halaman album) dikirim dalam satu request dengan
+    generate_album_prompt(). Error Gemini (termasuk RETRYABLE_ERRORS setelah
+    percobaan habis) dan error membaca gambar diteruskan ke pemanggil.
     """
-    try:
-        configure_gemini()
-        model = genai.GenerativeModel(model_name)
+    if isinstance(image_path, list):
+        prompt = generate_album_prompt()
+        sources = image_path
+    else:
         prompt = generate_gemini_prompt()
-        image = PIL.Image.open(image_path)
-
-        response_stream = await model.generate_content_async([prompt, image], stream=True)
-        
-        async for chunk in response_stream:
-            if chunk.text:
-                print(chunk.text, end='', flush=True)
-                yield chunk.text
-
-    except Exception as e:
-        print(f"Error saat streaming dari Gemini: {e}")
-        yield ""
\ No newline at end of file
+        sources = [image_path]
+    # Dijalankan di worker thread supaya decode/resize tidak memblokir event loop.
+    images = await asyncio.to_thread(lambda: [_load_image(source) for source in sources])
+
+    async with contextlib.aclosing(stream_content([prompt, *images], model_name)) as stream:
+        async for text in stream:
+            logger.debug(text)
+            yield text
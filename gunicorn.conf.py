@@ -0,0 +1,63 @@
+"""
+Konfigurasi gunicorn untuk API Flask (main.py):
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+App di-preload sekali di proses master lalu di-fork ke WEB_CONCURRENCY worker,
+masing-masing dengan GUNICORN_THREADS thread (worker gthread), sehingga
+request lambat (file besar, batch) tidak memblokir request lain.
+
+Sinyal ke proses master:
+  TERM / INT   berhenti; worker menyelesaikan request yang sedang berjalan
+               sampai GUNICORN_GRACEFUL_TIMEOUT detik
+  HUP          reload konfigurasi dan ganti semua worker secara bertahap.
+               Karena app di-preload, kode baru tidak ikut dimuat; untuk
+               deploy kode pakai USR2 (master baru) lalu QUIT ke master lama,
+               atau jalankan dengan GUNICORN_PRELOAD=0.
+  TTIN / TTOU  tambah / kurangi satu worker
+
+Readiness probe load balancer: GET /api/ready.
+"""
+import multiprocessing
+import os
+
+bind = os.getenv("GUNICORN_BIND", f"0.0.0.0:{os.getenv('PORT', 5000)}")
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count() * 2 + 1))
+worker_class = "gthread"
+threads = int(os.getenv("GUNICORN_THREADS", 4))
+preload_app = os.getenv("GUNICORN_PRELOAD", "1") == "1"
+
+# Request balance-sheet untuk file besar bisa lama; worker yang diam lebih
+# lama dari timeout dianggap macet dan di-restart master.
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 120))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", 30))
+# Harus lebih panjang dari idle timeout load balancer supaya koneksi
+# keep-alive tidak ditutup server saat LB masih memakainya.
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", 75))
+worker_connections = int(os.getenv("GUNICORN_WORKER_CONNECTIONS", 1000))
+backlog = int(os.getenv("GUNICORN_BACKLOG", 2048))
+
+# Worker diganti setelah sekian request (dengan jitter supaya tidak serentak)
+# untuk membatasi pertumbuhan memori jangka panjang; 0 = tidak pernah.
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", 10000))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", 1000))
+
+# File unduhan (/api/download) dikirim dengan sendfile() tanpa disalin lewat Python.
+sendfile = os.getenv("GUNICORN_SENDFILE", "1") == "1"
+
+accesslog = os.getenv("GUNICORN_ACCESS_LOG", "-") or None
+errorlog = "-"
+loglevel = os.getenv("GUNICORN_LOG_LEVEL", "info")
+forwarded_allow_ips = os.getenv("FORWARDED_ALLOW_IPS", "127.0.0.1")
+
+
+def post_fork(server, worker):
+    import main
+
+    main.init_worker()
+
+
+def worker_exit(server, worker):
+    import main
+
+    main.shutdown_worker()
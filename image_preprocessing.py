@@ -0,0 +1,62 @@
+"""
+Pra-pemrosesan gambar tabel sebelum diunggah ke Gemini.
+
+Foto dari ponsel biasanya berukuran besar (12 MP atau lebih), sehingga
+waktu unggah, jumlah token, dan time-to-first-token membengkak. Pipeline ini
+memperbaiki orientasi EXIF, membatasi sisi terpanjang, opsional mengubah ke
+grayscale, menaikkan kontras, lalu meng-encode ulang sebagai JPEG.
+
+Hasilnya berupa blob dict {"mime_type", "data"} yang dikirim apa adanya oleh
+SDK. (Jika yang dikirim objek PIL hasil olahan, SDK akan meng-encode-nya
+sebagai WebP lossless yang justru jauh lebih besar.)
+"""
+import io
+import os
+
+import PIL.Image
+import PIL.ImageOps
+
+
+class PreprocessConfig:
+    __slots__ = ("enabled", "max_edge", "grayscale", "autocontrast", "jpeg_quality")
+
+    def __init__(self, enabled=True, max_edge=2048, grayscale=False, autocontrast=True, jpeg_quality=85):
+        self.enabled = enabled
+        self.max_edge = max_edge
+        self.grayscale = grayscale
+        self.autocontrast = autocontrast
+        self.jpeg_quality = jpeg_quality
+
+    @classmethod
+    def from_env(cls):
+        def flag(name, default):
+            return os.getenv(name, default).lower() in ("1", "true", "yes")
+        return cls(
+            enabled=flag("IMAGE_PREPROCESS", "1"),
+            max_edge=int(os.getenv("IMAGE_MAX_EDGE", 2048)),
+            grayscale=flag("IMAGE_GRAYSCALE", "0"),
+            autocontrast=flag("IMAGE_AUTOCONTRAST", "1"),
+            jpeg_quality=int(os.getenv("IMAGE_JPEG_QUALITY", 85)),
+        )
+
+
+def preprocess_image(image_source, config):
+    """
+    Menjalankan pipeline pada path atau file-like gambar dan mengembalikan
+    blob dict JPEG untuk Gemini. Fungsi ini sinkron dan berat CPU; panggil
+    lewat asyncio.to_thread.
+    """
+    with PIL.Image.open(image_source) as image:
+        # draft() membuat decoder JPEG langsung men-decode pada skala lebih
+        # kecil (1/2, 1/4, 1/8) jika gambar jauh lebih besar dari target.
+        image.draft("L" if config.grayscale else "RGB", (config.max_edge, config.max_edge))
+        image = PIL.ImageOps.exif_transpose(image)
+        image = image.convert("L" if config.grayscale else "RGB")
+        if max(image.size) > config.max_edge:
+            image.thumbnail((config.max_edge, config.max_edge), PIL.Image.LANCZOS)
+        if config.autocontrast:
+            image = PIL.ImageOps.autocontrast(image, cutoff=1)
+
+        output = io.BytesIO()
+        image.save(output, format="JPEG", quality=config.jpeg_quality, optimize=True)
+    return {"mime_type": "image/jpeg", "data": output.getvalue()}
@@ -0,0 +1,227 @@
+"""
+Antrean job ekstraksi yang persisten di SQLite.
+
+Bot hanya memasukkan job (enqueue); proses worker (worker.py) mengklaim job
+dengan lease berbatas waktu, memperpanjangnya lewat heartbeat selama job
+berjalan, lalu menandai selesai/gagal. Jika worker mati, lease-nya habis dan
+job otomatis dikembalikan ke antrean untuk diklaim worker lain (sampai
+max_attempts, setelah itu job ditandai gagal). Job yang gagal dengan error juga
+dikembalikan ke antrean (retry) selama percobaannya belum mencapai max_attempts.
+Job selesai/gagal dihapus oleh worker (purge) setelah retention_seconds.
+
+Job yang diklaim lebih dulu adalah job dari chat yang paling sedikit memiliki
+job berjalan, lalu yang paling lama menunggu, sehingga satu chat tidak
+menguasai semua worker.
+
+Database (dan direktori file sementara) harus berada di disk lokal mesin yang
+sama dengan bot dan semua worker: mode WAL SQLite tidak aman di filesystem
+jaringan (NFS/SMB), jadi worker di mesin lain tidak boleh memakai database ini.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    doc_type TEXT NOT NULL,
+    chat_id INTEGER NOT NULL,
+    message_id INTEGER NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'queued',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    created REAL NOT NULL,
+    started REAL,
+    finished REAL,
+    lease_owner TEXT,
+    lease_expires REAL,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_status_id ON jobs (status, id);
+CREATE INDEX IF NOT EXISTS jobs_status_chat ON jobs (status, chat_id);
+CREATE INDEX IF NOT EXISTS jobs_lease ON jobs (status, lease_expires);
+"""
+
+
+class JobQueue:
+    def __init__(self, path, lease_seconds=60, max_attempts=3, retention_seconds=7 * 24 * 3600):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.retention_seconds = retention_seconds
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            os.getenv("JOB_QUEUE_PATH", os.path.join("cache", "jobs.sqlite3")),
+            lease_seconds=float(os.getenv("JOB_LEASE_SECONDS", 60)),
+            max_attempts=int(os.getenv("JOB_MAX_ATTEMPTS", 3)),
+            retention_seconds=float(os.getenv("JOB_RETENTION_SECONDS", 7 * 24 * 3600)),
+        )
+
+    def _connect(self):
+        # Satu koneksi per thread; dipakai lewat asyncio.to_thread.
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _transaction(self):
+        return _Transaction(self._connect())
+
+    def enqueue(self, doc_type, chat_id, message_id, payload):
+        """Memasukkan job baru dan mengembalikan id-nya."""
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "INSERT INTO jobs (doc_type, chat_id, message_id, payload, created) VALUES (?, ?, ?, ?, ?)",
+                (doc_type, chat_id, message_id, json.dumps(payload), time.time()),
+            )
+            return cursor.lastrowid
+
+    def position(self, job_id):
+        """Jumlah job antre sampai dan termasuk job ini (0 jika tidak sedang antre)."""
+        row = self._connect().execute(
+            "SELECT COUNT(*) FROM jobs WHERE status = 'queued' AND id <= ? "
+            "AND EXISTS (SELECT 1 FROM jobs WHERE id = ? AND status = 'queued')",
+            (job_id, job_id),
+        ).fetchone()
+        return row[0]
+
+    def _reclaim_expired(self, conn, now):
+        """Mengembalikan job dengan lease kedaluwarsa ke antrean; mengembalikan job yang menyerah."""
+        expired = conn.execute(
+            "SELECT * FROM jobs WHERE status = 'running' AND lease_expires < ?", (now,)
+        ).fetchall()
+        exhausted = []
+        for job in expired:
+            if job["attempts"] >= self.max_attempts:
+                conn.execute(
+                    "UPDATE jobs SET status = 'failed', finished = ?, lease_owner = NULL, "
+                    "error = 'lease kedaluwarsa' WHERE id = ?",
+                    (now, job["id"]),
+                )
+                exhausted.append(_as_dict(job))
+            else:
+                conn.execute(
+                    "UPDATE jobs SET status = 'queued', lease_owner = NULL, lease_expires = NULL WHERE id = ?",
+                    (job["id"],),
+                )
+        return exhausted
+
+    def claim(self, worker_id):
+        """
+        Mengklaim satu job. Mengembalikan (job, exhausted): job berupa dict atau
+        None, exhausted adalah job yang baru saja ditandai gagal karena lease
+        berulang kali kedaluwarsa (supaya pemanggil bisa memberi tahu pengguna).
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            exhausted = self._reclaim_expired(conn, now)
+            job = conn.execute(
+                "SELECT * FROM jobs AS q WHERE status = 'queued' ORDER BY "
+                "(SELECT COUNT(*) FROM jobs AS r WHERE r.status = 'running' AND r.chat_id = q.chat_id), id "
+                "LIMIT 1"
+            ).fetchone()
+            if job is None:
+                return None, exhausted
+            conn.execute(
+                "UPDATE jobs SET status = 'running', attempts = attempts + 1, started = ?, "
+                "lease_owner = ?, lease_expires = ? WHERE id = ?",
+                (now, worker_id, now + self.lease_seconds, job["id"]),
+            )
+            job = _as_dict(job)
+            job["attempts"] += 1
+            return job, exhausted
+
+    def heartbeat(self, job_id, worker_id):
+        """Memperpanjang lease; False jika lease sudah bukan milik worker ini."""
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET lease_expires = ? WHERE id = ? AND status = 'running' AND lease_owner = ?",
+                (time.time() + self.lease_seconds, job_id, worker_id),
+            )
+            return cursor.rowcount == 1
+
+    def _finish(self, job_id, worker_id, status, error=None):
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = ?, finished = ?, error = ?, lease_owner = NULL, lease_expires = NULL "
+                "WHERE id = ? AND status = 'running' AND lease_owner = ?",
+                (status, time.time(), error, job_id, worker_id),
+            )
+            return cursor.rowcount == 1
+
+    def complete(self, job_id, worker_id):
+        return self._finish(job_id, worker_id, "done")
+
+    def fail(self, job_id, worker_id, error):
+        return self._finish(job_id, worker_id, "failed", str(error))
+
+    def retry(self, job_id, worker_id, error):
+        """Mengembalikan job yang gagal ke antrean supaya dicoba lagi; error terakhir disimpan."""
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = 'queued', error = ?, lease_owner = NULL, lease_expires = NULL "
+                "WHERE id = ? AND status = 'running' AND lease_owner = ?",
+                (str(error), job_id, worker_id),
+            )
+            return cursor.rowcount == 1
+
+    def purge(self, older_than_seconds):
+        """Menghapus job selesai/gagal yang lebih tua dari batas waktu."""
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "DELETE FROM jobs WHERE status IN ('done', 'failed') AND finished < ?",
+                (time.time() - older_than_seconds,),
+            )
+            return cursor.rowcount
+
+    def stats(self):
+        conn = self._connect()
+        counts = {status: n for status, n in conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status")}
+        oldest = conn.execute("SELECT MIN(created) FROM jobs WHERE status = 'queued'").fetchone()[0]
+        wait = conn.execute(
+            "SELECT AVG(started - created) FROM (SELECT started, created FROM jobs "
+            "WHERE started IS NOT NULL ORDER BY id DESC LIMIT 1000)"
+        ).fetchone()[0]
+        return {
+            "queued": counts.get("queued", 0),
+            "running": counts.get("running", 0),
+            "done": counts.get("done", 0),
+            "failed": counts.get("failed", 0),
+            "oldest_queued_age": round(time.time() - oldest, 3) if oldest else None,
+            "avg_wait_seconds": round(wait, 3) if wait is not None else None,
+        }
+
+
+class _Transaction:
+    """BEGIN IMMEDIATE ... COMMIT/ROLLBACK, supaya klaim antar proses tidak bentrok."""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+        return False
+
+
+def _as_dict(row):
+    job = dict(row)
+    job["payload"] = json.loads(job["payload"])
+    return job
@@ -0,0 +1,169 @@
+"""
+Penjadwal job ekstraksi untuk bot Telegram.
+
+Setiap upload menjadi satu job (coroutine) yang dijalankan dengan batas:
+- jumlah job berjalan secara global (max_in_flight),
+- jumlah job berjalan per jenis dokumen (pdf/docx/image),
+- panjang antrean (max_queued); job di luar batas ini ditolak dengan QueueFull.
+
+Job yang menunggu disimpan dalam antrean per chat_id dan diambil secara
+round-robin antar chat, sehingga satu pengguna yang mengirim banyak file
+tidak membuat pengguna lain menunggu di belakang seluruh kirimannya.
+"""
+import asyncio
+import collections
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+DOC_TYPES = ("pdf", "docx", "image")
+
+
+class QueueFull(Exception):
+    """Antrean job sudah penuh."""
+
+
+class _Job:
+    __slots__ = ("chat_id", "doc_type", "factory", "enqueued")
+
+    def __init__(self, chat_id, doc_type, factory):
+        self.chat_id = chat_id
+        self.doc_type = doc_type
+        self.factory = factory
+        self.enqueued = time.monotonic()
+
+
+class JobScheduler:
+    def __init__(self, max_in_flight=4, type_limits=None, max_queued=50, wait_samples=1000):
+        self.max_in_flight = max_in_flight
+        self.type_limits = dict(type_limits or {})
+        self.max_queued = max_queued
+        # chat_id -> deque job; urutan key adalah giliran round-robin.
+        self._queues = collections.OrderedDict()
+        self._queued = 0
+        self._running = collections.Counter()
+        self._tasks = set()
+        self._waits = collections.deque(maxlen=wait_samples)
+        self._counters = {"submitted": 0, "rejected": 0, "completed": 0, "failed": 0}
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            max_in_flight=int(os.getenv("JOB_MAX_IN_FLIGHT", 4)),
+            type_limits={
+                doc_type: int(os.getenv(f"JOB_LIMIT_{doc_type.upper()}", default))
+                for doc_type, default in zip(DOC_TYPES, (2, 2, 3))
+            },
+            max_queued=int(os.getenv("JOB_MAX_QUEUED", 50)),
+        )
+
+    @property
+    def in_flight(self):
+        return sum(self._running.values())
+
+    def _has_capacity(self, doc_type):
+        limit = self.type_limits.get(doc_type)
+        return limit is None or self._running[doc_type] < limit
+
+    def submit(self, chat_id, doc_type, factory):
+        """
+        Mendaftarkan job; factory() harus mengembalikan coroutine. Mengembalikan
+        0 jika job langsung berjalan, atau posisi antrean (mulai dari 1).
+        Melempar QueueFull jika antrean sudah penuh.
+        """
+        if self._queued >= self.max_queued:
+            self._counters["rejected"] += 1
+            raise QueueFull(f"antrean penuh ({self._queued} job)")
+        job = _Job(chat_id, doc_type, factory)
+        self._counters["submitted"] += 1
+        self._queues.setdefault(chat_id, collections.deque()).append(job)
+        self._queued += 1
+        self._dispatch()
+        return self.position(job)
+
+    def position(self, job):
+        """
+        Perkiraan posisi job di antrean menurut urutan round-robin (tanpa
+        memperhitungkan batas per jenis dokumen). 0 jika job sudah berjalan.
+        """
+        queue = self._queues.get(job.chat_id)
+        if not queue or job not in queue:
+            return 0
+        index = queue.index(job)
+        ahead = index
+        before = True
+        for chat_id, other in self._queues.items():
+            if chat_id == job.chat_id:
+                before = False
+                continue
+            ahead += min(len(other), index + 1 if before else index)
+        return ahead + 1
+
+    def _next_job(self):
+        # Giliran berjalan sesuai urutan chat; chat yang mendapat giliran
+        # dipindah ke belakang. Di dalam satu chat, job pertama yang jenisnya
+        # masih punya kapasitas yang diambil.
+        for chat_id in list(self._queues):
+            queue = self._queues[chat_id]
+            for job in queue:
+                if self._has_capacity(job.doc_type):
+                    queue.remove(job)
+                    if queue:
+                        self._queues.move_to_end(chat_id)
+                    else:
+                        del self._queues[chat_id]
+                    return job
+        return None
+
+    def _dispatch(self):
+        while self.in_flight < self.max_in_flight:
+            job = self._next_job()
+            if job is None:
+                return
+            self._queued -= 1
+            self._running[job.doc_type] += 1
+            wait = time.monotonic() - job.enqueued
+            self._waits.append(wait)
+            logger.info(f"Menjalankan job {job.doc_type} untuk chat_id {job.chat_id} setelah menunggu {wait:.2f} detik.")
+            task = asyncio.create_task(self._run(job))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, job):
+        try:
+            await job.factory()
+            self._counters["completed"] += 1
+        except Exception as e:
+            self._counters["failed"] += 1
+            logger.error(f"Job {job.doc_type} untuk chat_id {job.chat_id} gagal: {e}", exc_info=True)
+        finally:
+            self._running[job.doc_type] -= 1
+            self._dispatch()
+
+    def stats(self):
+        waits = sorted(self._waits)
+        queued_by_type = collections.Counter(job.doc_type for queue in self._queues.values() for job in queue)
+
+        def percentile(p):
+            return round(waits[min(len(waits) - 1, int(p * len(waits)))], 3) if waits else None
+
+        return dict(
+            self._counters,
+            in_flight=self.in_flight,
+            in_flight_by_type={t: n for t, n in self._running.items() if n},
+            max_in_flight=self.max_in_flight,
+            type_limits=self.type_limits,
+            queue_depth=self._queued,
+            queued_by_type=dict(queued_by_type),
+            chats_waiting=len(self._queues),
+            max_queued=self.max_queued,
+            wait_seconds={
+                "samples": len(waits),
+                "avg": round(sum(waits) / len(waits), 3) if waits else None,
+                "p50": percentile(0.5),
+                "p95": percentile(0.95),
+                "max": round(waits[-1], 3) if waits else None,
+            },
+        )
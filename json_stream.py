@@ -0,0 +1,278 @@
+"""
+Parser JSON inkremental untuk output streaming Gemini.
+
+Chunk teks diumpankan satu per satu lewat feed(). Pagar markdown (```json)
+di awal dibuang saat streaming, dan setiap object baris di dalam array
+top-level dikembalikan begitu kurung kurawal penutupnya diterima. Jika teks
+tidak mungkin berupa JSON array of objects, error dilempar secepatnya
+sehingga generasi yang buruk bisa dihentikan tanpa menunggu respons selesai.
+
+iter_json_array() membaca file JSON array elemen demi elemen (dengan decoder C
+bawaan), sehingga file output besar bisa diproses tanpa memuat seluruhnya.
+
+File output ditulis dalam format ringkas oleh dump_rows(): JSON array tanpa
+indentasi dengan satu elemen per baris
+
+    [
+    {"Akun":"Kas","2023":"1.000"},
+    {"Akun":"Piutang","2023":"2.000"}
+    ]
+
+Isinya tetap JSON valid (json.load dan klien /api/download tidak berubah),
+dan iter_rows() bisa mem-parse per blok baris utuh dengan satu json.loads per
+blok. File lama (indent=2) tetap dibaca lewat iter_json_array().
+"""
+import json
+import re
+
+_PREFIX, _ARRAY, _DONE = range(3)
+_ARRAY_WHITESPACE = frozenset(" \t\r\n,")
+_WHITESPACE = " \t\r\n"
+_WS = re.compile(r"[ \t\r\n]*").match
+# Pemisah setelah elemen array; angka harus diikuti pemisah, sehingga angka
+# yang terpotong di ujung buffer tidak pernah dianggap lengkap.
+_SEPARATOR = re.compile(r"[ \t\r\n]*([,\]])").match
+# scan_once dipanggil langsung (bagian C dari json) untuk menghindari overhead raw_decode per elemen.
+_scan_once = json.JSONDecoder().scan_once
+
+
+class JSONStreamError(ValueError):
+    """Output stream bukan JSON array of objects yang valid."""
+
+
+class NotJSONArrayError(JSONStreamError):
+    """Output stream tidak diawali '[' (setelah pagar markdown dibuang)."""
+
+
+class IncrementalRowParser:
+    def __init__(self):
+        self._state = _PREFIX
+        self._prefix = ""
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._row_parts = []
+        self.row_count = 0
+
+    @property
+    def done(self):
+        return self._state == _DONE
+
+    def _consume_prefix(self):
+        """
+        Membuang spasi dan pagar markdown di awal. Mengembalikan sisa teks
+        setelah '[' atau None jika chunk belum cukup untuk memutuskan.
+        """
+        text = self._prefix.lstrip()
+        if text.startswith("```"):
+            newline = text.find("\n")
+            if newline == -1:
+                return None  # Baris pagar (```json) belum lengkap.
+            text = text[newline + 1:].lstrip()
+        elif "```".startswith(text):
+            return None  # Bisa jadi awal pagar yang terpotong antar chunk.
+        if not text:
+            self._prefix = ""
+            return None
+        if text[0] != "[":
+            raise NotJSONArrayError(f"hasil tidak dimulai dengan '[': {text[:100]!r}")
+        self._state = _ARRAY
+        self._depth = 1
+        self._prefix = ""
+        return text[1:]
+
+    def feed(self, chunk):
+        """Memproses satu chunk dan mengembalikan list object baris yang selesai."""
+        rows = []
+        if self._state == _PREFIX:
+            self._prefix += chunk
+            chunk = self._consume_prefix()
+            if chunk is None:
+                return rows
+        if self._state == _DONE:
+            return rows
+
+        row_start = 0 if self._depth >= 2 else None
+        for i, ch in enumerate(chunk):
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                continue
+            if ch == '"':
+                if self._depth < 2:
+                    raise JSONStreamError("elemen array bukan object")
+                self._in_string = True
+            elif ch == "{" or ch == "[":
+                if self._depth == 1:
+                    if ch != "{":
+                        raise JSONStreamError("elemen array bukan object")
+                    row_start = i
+                self._depth += 1
+            elif ch == "}" or ch == "]":
+                self._depth -= 1
+                if self._depth == 1:
+                    self._row_parts.append(chunk[row_start:i + 1])
+                    rows.append(self._finish_row())
+                    row_start = None
+                elif self._depth == 0:
+                    # Sisa teks (mis. pagar penutup ```) diabaikan.
+                    self._state = _DONE
+                    break
+            elif self._depth == 1 and ch not in _ARRAY_WHITESPACE:
+                raise JSONStreamError(f"karakter tidak terduga di dalam array: {ch!r}")
+        if row_start is not None:
+            self._row_parts.append(chunk[row_start:])
+        return rows
+
+    def _finish_row(self):
+        text = "".join(self._row_parts)
+        self._row_parts = []
+        try:
+            row = json.loads(text)
+        except json.JSONDecodeError as e:
+            raise JSONStreamError(f"baris ke-{self.row_count + 1} bukan JSON valid: {e}") from None
+        self.row_count += 1
+        return row
+
+    def close(self):
+        """Dipanggil setelah stream selesai; error jika array belum tertutup."""
+        if self._state == _PREFIX:
+            raise NotJSONArrayError(f"hasil tidak dimulai dengan '[': {self._prefix.strip()[:100]!r}")
+        if self._state != _DONE:
+            raise JSONStreamError("stream berakhir sebelum array JSON ditutup")
+
+
+def iter_json_array(fp, chunk_size=64 * 1024):
+    """
+    Menghasilkan elemen array JSON top-level dari file teks satu per satu.
+    Memori yang dipakai sebanding dengan ukuran chunk dan satu elemen, bukan
+    ukuran file. Melempar JSONStreamError jika isi file bukan JSON array yang valid.
+    """
+    buf = fp.read(chunk_size)
+    eof = not buf
+    pos = _WS(buf).end()
+    while pos == len(buf) and not eof:
+        buf = fp.read(chunk_size)
+        eof = not buf
+        pos = _WS(buf).end()
+    if buf[pos:pos + 1] != "[":
+        raise NotJSONArrayError(f"isi tidak dimulai dengan '[': {buf[pos:pos + 100]!r}")
+    pos += 1
+    first = True
+
+    while True:
+        # pos berada setelah '[' atau ','; nilai berikutnya (atau ']' jika array kosong).
+        start = _WS(buf, pos).end()
+        try:
+            if first and buf[start:start + 1] == "]":
+                end, sep = start, _SEPARATOR(buf, start)
+            else:
+                value, end = _scan_once(buf, start)
+                sep = _SEPARATOR(buf, end)
+                if sep is None and eof:
+                    rest = buf[_WS(buf, end).end():]
+                    if not rest:
+                        raise JSONStreamError("file berakhir sebelum array JSON ditutup")
+                    raise JSONStreamError(f"karakter tidak terduga di dalam array: {rest[0]!r}")
+        except (json.JSONDecodeError, StopIteration) as e:
+            if eof:
+                raise JSONStreamError(f"elemen array bukan JSON valid di posisi {start}: {e}") from None
+            sep = None
+        if sep is None:
+            # Elemen atau pemisahnya terpotong di batas chunk: baca lagi lalu ulangi.
+            if eof:
+                raise JSONStreamError("file berakhir sebelum array JSON ditutup")
+            chunk = fp.read(chunk_size)
+            eof = not chunk
+            buf = buf[pos:] + chunk
+            pos = 0
+            continue
+
+        if not (first and end == start):
+            yield value
+        first = False
+        pos = sep.end()
+        if sep.group(1) == "]":
+            tail = buf[pos:] + fp.read()
+            if tail.strip(_WHITESPACE):
+                raise JSONStreamError(f"data tambahan setelah array JSON: {tail.strip()[:100]!r}")
+            return
+
+
+_compact_dumps = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+
+
+def dumps_rows(rows):
+    """List baris sebagai teks berformat ringkas (lihat docstring modul)."""
+    if not isinstance(rows, list):
+        return _compact_dumps(rows)
+    return "[\n" + ",\n".join(map(_compact_dumps, rows)) + ("\n]\n" if rows else "]\n")
+
+
+def dump_rows(rows, fp):
+    """Menulis list baris ke file teks dalam format ringkas."""
+    fp.write(dumps_rows(rows))
+
+
+def is_compact(fp):
+    """
+    True jika file teks (posisi di awal) berformat dump_rows(). Posisi file
+    dikembalikan ke awal.
+    """
+    start = fp.tell()
+    try:
+        if fp.readline() != "[\n":
+            return False
+        # Elemen format ringkas dimulai di kolom pertama; indent=2 diawali spasi.
+        peek = fp.read(1)
+        return bool(peek) and not peek.isspace()
+    finally:
+        fp.seek(start)
+
+
+def iter_rows(fp, block_size=256 * 1024):
+    """
+    Seperti iter_json_array(), tetapi file berformat dump_rows() dibaca per blok
+    baris utuh (sekitar block_size karakter) dengan satu json.loads per blok:
+    hampir secepat json.load, dengan memori sebanding ukuran blok. Format lain
+    jatuh ke iter_json_array().
+    """
+    if not is_compact(fp):
+        return iter_json_array(fp)
+    fp.readline()
+    return _iter_compact(fp, block_size)
+
+
+def _iter_compact(fp, block_size):
+    # Posisi setelah baris '['. Setiap blok berisi baris utuh; hanya elemen
+    # terakhir array yang tidak diakhiri koma, dan ']' berada di baris sendiri.
+    more = True  # elemen berikutnya boleh ada (setelah '[' atau koma)
+    trailing_comma = False
+    while True:
+        block = fp.readlines(block_size)
+        if not block:
+            raise JSONStreamError("file berakhir sebelum array JSON ditutup")
+        text = "".join(block).rstrip(_WHITESPACE)
+        closed = text == "]" or text.endswith("\n]")
+        if closed:
+            text = text[:-1].rstrip(_WHITESPACE)
+        if text:
+            if not more:
+                raise JSONStreamError("koma hilang di antara elemen array")
+            trailing_comma = more = text.endswith(",")
+            try:
+                values = json.loads("[" + (text[:-1] if more else text) + "]")
+            except json.JSONDecodeError as e:
+                raise JSONStreamError(f"elemen array bukan JSON valid: {e}") from None
+            yield from values
+        if closed:
+            if trailing_comma:
+                raise JSONStreamError("koma sebelum ']' penutup array")
+            tail = fp.read()
+            if tail.strip(_WHITESPACE):
+                raise JSONStreamError(f"data tambahan setelah array JSON: {tail.strip()[:100]!r}")
+            return
@@ -0,0 +1,171 @@
+"""
+Index label 'Akun' untuk mencocokkan baris tabel hasil ekstraksi ke kunci
+output skema laporan.
+
+Hasil OCR/Gemini sering berbeda sedikit dari label di peta akun: huruf besar/
+kecil, spasi ganda, tanda baca, atau satu huruf hilang/tertukar ("Kas dan
+setara kas" vs "KAS DAN SETARA  KAS" vs "Kas dan setra kas"). Pencocokan
+dilakukan bertingkat:
+
+  1. label persis sama                      -> confidence 1.0
+  2. label sama setelah normalize_label()   -> confidence NORMALIZED_CONFIDENCE (0.99)
+  3. fuzzy: index trigram memilih FUZZY_SHORTLIST kandidat termirip, lalu
+     setiap kandidat dinilai dengan jarak edit (hapus/sisip/ganti/tukar dua
+     huruf bersebelahan): skor = 1 - jarak / panjang label terpanjang.
+     Diterima jika skor >= LABEL_MIN_CONFIDENCE dan unggul setidaknya
+     LABEL_MIN_MARGIN dari kunci lain yang terbaik; kandidat yang hampir
+     seri ("Penghasilan komprehensif lan" antara "... lain" dan "...") ditolak.
+                                            -> confidence = skor, paling tinggi FUZZY_MAX_CONFIDENCE
+
+Ambang default dikalibrasi dengan semua varian satu huruf hilang/tertukar dari
+label keempat skema: tidak ada yang masuk ke kunci yang salah, dan yang tidak
+cocok hanya varian yang memang berada di antara dua label ("Putang bunga"
+antara "Piutang bunga" dan "Utang bunga").
+
+Setiap tingkat selalu memberi confidence lebih rendah dari tingkat di atasnya,
+sehingga pemakai yang membandingkan confidence (StatementSchema) tidak
+membiarkan baris ternormalisasi/fuzzy menimpa baris yang labelnya persis.
+
+Index normalisasi dan trigram dibangun sekali saat skema dibuat; hasil
+resolve() per label mentah disimpan (memo) sehingga label yang berulang di
+setiap file tidak dihitung ulang.
+"""
+import os
+import re
+import unicodedata
+from collections import Counter
+
+LABEL_MIN_CONFIDENCE = float(os.getenv("LABEL_MIN_CONFIDENCE", 0.85))
+LABEL_MIN_MARGIN = float(os.getenv("LABEL_MIN_MARGIN", 0.05))
+LABEL_MEMO_MAX = int(os.getenv("LABEL_MEMO_MAX", 8192))
+
+NORMALIZED_CONFIDENCE = 0.99
+FUZZY_MAX_CONFIDENCE = 0.98
+FUZZY_SHORTLIST = 8
+
+_NO_MATCH = (None, None)
+_WORDS = re.compile(r"[^\W_]+")
+
+
+def normalize_label(label):
+    """'  PENDAPATAN &  Beban-lain ' -> 'pendapatan beban lain'."""
+    text = unicodedata.normalize("NFKD", label)
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return " ".join(_WORDS.findall(text.casefold()))
+
+
+def _trigrams(normalized):
+    padded = f"  {normalized} "
+    return Counter(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+def _edit_distance(a, b, limit):
+    """
+    Jarak edit dengan transposisi huruf bersebelahan (optimal string
+    alignment). Berhenti lebih awal dan mengembalikan limit + 1 begitu jarak
+    pasti melebihi limit.
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    before, previous = None, list(range(len(b) + 1))
+    for i, char in enumerate(a, 1):
+        current = [i] + [0] * len(b)
+        for j, other in enumerate(b, 1):
+            cost = previous[j - 1] + (char != other)
+            if previous[j] + 1 < cost:
+                cost = previous[j] + 1
+            if current[j - 1] + 1 < cost:
+                cost = current[j - 1] + 1
+            if i > 1 and j > 1 and char == b[j - 2] and a[i - 2] == other and before[j - 2] + 1 < cost:
+                cost = before[j - 2] + 1
+            current[j] = cost
+        if min(current) > limit:
+            return limit + 1
+        before, previous = previous, current
+    return previous[-1]
+
+
+class LabelIndex:
+    """Index label -> kunci output untuk satu peta akun."""
+
+    def __init__(self, account_map, min_confidence=LABEL_MIN_CONFIDENCE, min_margin=LABEL_MIN_MARGIN):
+        self.min_confidence = min_confidence
+        self.min_margin = min_margin
+        self._exact = dict(account_map)
+        self._normalized = {}
+        ambiguous = set()
+        for label, key in self._exact.items():
+            normalized = normalize_label(label)
+            if self._normalized.get(normalized, key) != key:
+                # Dua label berbeda kunci yang sama setelah normalisasi; hanya
+                # label persisnya yang dipakai.
+                ambiguous.add(normalized)
+            self._normalized[normalized] = key
+        for normalized in ambiguous:
+            del self._normalized[normalized]
+
+        # Posting list trigram -> [(id kandidat, jumlah trigram itu di kandidat)].
+        self._candidates = list(self._normalized.items())
+        self._sizes = []
+        self._postings = {}
+        for candidate_id, (normalized, _) in enumerate(self._candidates):
+            grams = _trigrams(normalized)
+            self._sizes.append(sum(grams.values()))
+            for gram, count in grams.items():
+                self._postings.setdefault(gram, []).append((candidate_id, count))
+        self._memo = {}
+
+    def resolve(self, label):
+        """
+        Mengembalikan (kunci output, confidence) untuk label 'Akun', atau
+        (None, None) jika tidak ada kandidat yang cukup mirip.
+        """
+        key = self._exact.get(label) if label.__class__ is str else None
+        if key is not None:
+            return key, 1.0
+        if label.__class__ is not str:
+            return _NO_MATCH
+        result = self._memo.get(label)
+        if result is None:
+            if len(self._memo) >= LABEL_MEMO_MAX:
+                self._memo.clear()
+            result = self._memo[label] = self._lookup(label)
+        return result
+
+    def _lookup(self, label):
+        normalized = normalize_label(label)
+        if not normalized:
+            return _NO_MATCH
+        key = self._normalized.get(normalized)
+        if key is not None:
+            return key, NORMALIZED_CONFIDENCE
+
+        grams = _trigrams(normalized)
+        shared = Counter()
+        for gram, count in grams.items():
+            for candidate_id, candidate_count in self._postings.get(gram, ()):
+                shared[candidate_id] += min(count, candidate_count)
+        size = sum(grams.values())
+        shortlist = sorted(
+            shared, key=lambda candidate_id: -shared[candidate_id] / (size + self._sizes[candidate_id])
+        )[:FUZZY_SHORTLIST]
+
+        # Skor di bawah floor tidak bisa menang maupun membuat hasil seri.
+        floor = self.min_confidence - self.min_margin
+        best_by_key = {}
+        for candidate_id in shortlist:
+            candidate, candidate_key = self._candidates[candidate_id]
+            longest = max(len(normalized), len(candidate))
+            limit = int((1 - floor) * longest)
+            score = 1 - _edit_distance(normalized, candidate, limit) / longest
+            if score >= floor and score > best_by_key.get(candidate_key, 0.0):
+                best_by_key[candidate_key] = score
+        if not best_by_key:
+            return _NO_MATCH
+        ranked = sorted(best_by_key.items(), key=lambda item: item[1], reverse=True)
+        best_key, best_score = ranked[0]
+        runner_up = ranked[1][1] if len(ranked) > 1 else 0.0
+        # Dua kunci berbeda yang hampir sama miripnya tidak bisa dipilih salah satunya.
+        if best_score < self.min_confidence or best_score - runner_up < self.min_margin:
+            return _NO_MATCH
+        return best_key, min(round(best_score, 3), FUZZY_MAX_CONFIDENCE)
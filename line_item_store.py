@@ -0,0 +1,253 @@
+"""
+Penyimpanan line item laporan di SQLite untuk query lintas file.
+
+Setiap file output di-pivot dengan skema di statement_schema lalu disimpan
+sebagai baris (file, jenis laporan, kunci akun, tahun) -> nilai, dengan index
+pada (akun, tahun) dan (tahun). Dengan begitu pertanyaan seperti "total_assets
+semua koperasi tahun 2023" dijawab dari index tanpa membuka file satu per satu.
+
+Bot memperbarui store setiap kali menulis file output (index_file); server
+hanya membaca. sync() menyamakan store dengan isi folder (file baru/berubah
+atau versi skema lama diindeks ulang, file yang hilang dihapus) berdasarkan
+mtime_ns dan ukuran file. sync() memindai seluruh folder, jadi dijalankan
+sebagai langkah terpisah (isi awal, setelah ENGINE_VERSION naik, atau
+terjadwal), bukan di dalam request:
+
+    python line_item_store.py [folder_output]
+
+Nilai disimpan bertipe: int sebagai INTEGER, Decimal sebagai TEXT (eksak) yang
+dikembalikan lagi sebagai Decimal oleh query().
+"""
+import json
+import logging
+import os
+import sqlite3
+import sys
+import threading
+import time
+from decimal import Decimal
+
+from statement_schema import SCHEMAS, get_schema
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    filename TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    schema_versions TEXT NOT NULL,
+    indexed_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS line_items (
+    filename TEXT NOT NULL,
+    statement_type TEXT NOT NULL,
+    account_key TEXT NOT NULL,
+    year INTEGER NOT NULL,
+    value,
+    PRIMARY KEY (filename, statement_type, account_key, year)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS line_items_account_year ON line_items (account_key, year);
+CREATE INDEX IF NOT EXISTS line_items_year ON line_items (year);
+"""
+
+# Naikkan jika struktur tabel berubah; store versi lain dibuang dan diindeks ulang.
+STORE_VERSION = 2
+
+STATEMENT_TYPES = tuple(SCHEMAS)
+
+sqlite3.register_adapter(Decimal, str)
+
+
+def _schema_versions():
+    # Disimpan per file supaya perubahan peta akun memicu indeks ulang saat sync().
+    return json.dumps({t: get_schema(t).version for t in STATEMENT_TYPES}, sort_keys=True)
+
+
+class LineItemStore:
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Koneksi setup ditutup lagi supaya tidak ada koneksi SQLite yang
+        # terbawa ke proses worker saat app di-preload lalu di-fork.
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            if conn.execute("PRAGMA user_version").fetchone()[0] != STORE_VERSION:
+                conn.executescript(
+                    "DROP TABLE IF EXISTS line_items; DROP TABLE IF EXISTS files; "
+                    f"PRAGMA user_version = {STORE_VERSION};"
+                )
+            conn.executescript(SCHEMA)
+        finally:
+            conn.close()
+
+    @classmethod
+    def from_env(cls):
+        return cls(os.getenv("LINE_ITEM_DB_PATH", os.path.join("cache", "line_items.sqlite3")))
+
+    def _connect(self):
+        # Satu koneksi per thread (Flask melayani request di banyak thread).
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def index_file(self, folder, filename, rows=None):
+        """Mengindeks ulang satu file output. Jika rows None, file dibaca dari disk."""
+        path = os.path.join(folder, filename)
+        st = os.stat(path)
+        if rows is None:
+            with open(path, 'r', encoding='utf-8') as f:
+                rows = json.load(f)
+
+        items = []
+        for statement_type in STATEMENT_TYPES:
+            for year, account_key, value in get_schema(statement_type).line_items(rows):
+                items.append((filename, statement_type, account_key, year, value))
+
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM line_items WHERE filename = ?", (filename,))
+            conn.executemany(
+                "INSERT OR REPLACE INTO line_items (filename, statement_type, account_key, year, value) "
+                "VALUES (?, ?, ?, ?, ?)",
+                items,
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO files (filename, mtime_ns, size, schema_versions, indexed_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (filename, st.st_mtime_ns, st.st_size, _schema_versions(), time.time()),
+            )
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+        return len(items)
+
+    def remove_file(self, filename):
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        conn.execute("DELETE FROM line_items WHERE filename = ?", (filename,))
+        conn.execute("DELETE FROM files WHERE filename = ?", (filename,))
+        conn.execute("COMMIT")
+
+    def sync(self, folder):
+        """
+        Menyamakan store dengan isi folder. Mengembalikan (jumlah diindeks,
+        jumlah dihapus).
+        """
+        known = {
+            row['filename']: (row['mtime_ns'], row['size'], row['schema_versions'])
+            for row in self._connect().execute("SELECT filename, mtime_ns, size, schema_versions FROM files")
+        }
+        versions = _schema_versions()
+        indexed = 0
+        seen = set()
+        if os.path.isdir(folder):
+            with os.scandir(folder) as it:
+                for entry in it:
+                    if not entry.name.endswith('.json') or not entry.is_file():
+                        continue
+                    seen.add(entry.name)
+                    st = entry.stat()
+                    if known.get(entry.name) == (st.st_mtime_ns, st.st_size, versions):
+                        continue
+                    try:
+                        self.index_file(folder, entry.name)
+                        indexed += 1
+                    except (OSError, ValueError, AttributeError) as e:
+                        # File bukan JSON array of objects; dicatat supaya tidak dicoba terus.
+                        logger.warning(f"Gagal mengindeks {entry.name}: {e}")
+                        self._mark_unindexable(entry.name, st, versions)
+        removed = [name for name in known if name not in seen]
+        for name in removed:
+            self.remove_file(name)
+        return indexed, len(removed)
+
+    def _mark_unindexable(self, filename, st, versions):
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        conn.execute("DELETE FROM line_items WHERE filename = ?", (filename,))
+        conn.execute(
+            "INSERT OR REPLACE INTO files (filename, mtime_ns, size, schema_versions, indexed_at) VALUES (?, ?, ?, ?, ?)",
+            (filename, st.st_mtime_ns, st.st_size, versions, time.time()),
+        )
+        conn.execute("COMMIT")
+
+    def query(self, accounts=None, year_from=None, year_to=None, file_pattern=None, statement_type=None,
+              limit=1000, offset=0):
+        """
+        Mencari line item. accounts: list kunci akun; file_pattern: pola glob
+        nama file (mis. 'KSP_*'); tahun inklusif. Hasil urut per akun, tahun, file.
+        """
+        clauses, params = [], []
+        if accounts:
+            clauses.append(f"account_key IN ({','.join('?' * len(accounts))})")
+            params.extend(accounts)
+        if year_from is not None:
+            clauses.append("year >= ?")
+            params.append(year_from)
+        if year_to is not None:
+            clauses.append("year <= ?")
+            params.append(year_to)
+        if file_pattern:
+            clauses.append("filename GLOB ?")
+            params.append(file_pattern)
+        if statement_type:
+            clauses.append("statement_type = ?")
+            params.append(statement_type)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        rows = self._connect().execute(
+            f"SELECT filename, statement_type, account_key, year, value FROM line_items {where} "
+            "ORDER BY account_key, year, filename, statement_type LIMIT ? OFFSET ?",
+            (*params, limit, offset),
+        )
+        return [
+            {
+                "file": row['filename'],
+                "statement_type": row['statement_type'],
+                "account": row['account_key'],
+                "year": row['year'],
+                "value": Decimal(row['value']) if isinstance(row['value'], str) else row['value'],
+            }
+            for row in rows
+        ]
+
+    def accounts(self, statement_type=None):
+        """Daftar kunci akun yang tersimpan (opsional untuk satu jenis laporan)."""
+        if statement_type:
+            rows = self._connect().execute(
+                "SELECT DISTINCT account_key FROM line_items WHERE statement_type = ? ORDER BY account_key",
+                (statement_type,),
+            )
+        else:
+            rows = self._connect().execute("SELECT DISTINCT account_key FROM line_items ORDER BY account_key")
+        return [row[0] for row in rows]
+
+    def ping(self):
+        """Memastikan database bisa dibaca (sqlite3.Error jika tidak)."""
+        self._connect().execute("SELECT 1 FROM files LIMIT 1").fetchall()
+
+    def stats(self):
+        conn = self._connect()
+        return {
+            "files": conn.execute("SELECT COUNT(*) FROM files").fetchone()[0],
+            "line_items": conn.execute("SELECT COUNT(*) FROM line_items").fetchone()[0],
+        }
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    target = sys.argv[1] if len(sys.argv) > 1 else "output"
+    store = LineItemStore.from_env()
+    indexed, removed = store.sync(target)
+    print(f"{indexed} file diindeks, {removed} file dihapus dari {store.path}")
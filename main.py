@@ -1,15 +1,96 @@
+import hashlib
 import json
 import os
+import sqlite3
+import stat
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+from decimal import Decimal
+
+from flask import Flask, Response, abort, jsonify, render_template, request, redirect, url_for, make_response
+from flask.json.provider import DefaultJSONProvider
+from werkzeug.datastructures import ContentRange
+from werkzeug.security import safe_join
+
+from json_stream import JSONStreamError, iter_rows
+from line_item_store import LineItemStore
+from numeric_parser import format_amount, json_default
+from output_catalog import OutputCatalog
+import precompressed
+from report_cache import ReportCache
+import response_compression
+import statement_views
+from statement_schema import SCHEMAS, get_schema
+
+
+class JSONProvider(DefaultJSONProvider):
+    """Decimal yang lolos ke jsonify diserialisasi sama seperti di view laporan."""
+
+    @staticmethod
+    def default(o):
+        if isinstance(o, Decimal):
+            return json_default(o)
+        return DefaultJSONProvider.default(o)
 
-from flask import Flask, Response, abort, jsonify, send_from_directory, render_template, request, redirect, url_for, make_response
 
 app = Flask(__name__)
+app.json = JSONProvider(app)
 app.config['JSON_SORT_KEYS'] = False
 
 # Konfigurasi path ke direktori 'output' tempat file JSON disimpan
 OUTPUT_FOLDER = 'output'
 app.config['OUTPUT_FOLDER'] = OUTPUT_FOLDER
 
+# Batas memori cache respons balance-sheet (default 64 MiB)
+app.config['REPORT_CACHE_MAX_BYTES'] = int(os.getenv('REPORT_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+report_cache = ReportCache(app.config['REPORT_CACHE_MAX_BYTES'])
+# Body laporan di atas batas ini tidak di-buffer/di-cache di memori, tetapi
+# di-stream (chunked) dari view di disk atau langsung dari serializer.
+app.config['REPORT_STREAM_THRESHOLD'] = int(os.getenv('REPORT_STREAM_THRESHOLD', 256 * 1024))
+STREAM_BLOCK_SIZE = 64 * 1024
+
+# Katalog file output yang dipantau watcher, dipakai oleh /api/files
+app.config['CATALOG_POLL_INTERVAL'] = float(os.getenv('CATALOG_POLL_INTERVAL', 2.0))
+app.config['FILES_PAGE_SIZE'] = 1000
+app.config['FILES_MAX_PAGE_SIZE'] = 5000
+output_catalog = OutputCatalog(OUTPUT_FOLDER, poll_interval=app.config['CATALOG_POLL_INTERVAL'])
+
+# Store line item SQLite untuk query lintas file. Diperbarui bot setiap kali
+# menulis file output; request tidak pernah memindai folder output. Isi awal
+# (file lama) dan rekonsiliasi dilakukan di luar server:
+#     python line_item_store.py [folder_output]
+app.config['LINE_ITEMS_PAGE_SIZE'] = 1000
+app.config['LINE_ITEMS_MAX_PAGE_SIZE'] = 10000
+line_item_store = LineItemStore.from_env()
+
+# Pool thread untuk endpoint batch laporan
+app.config['BATCH_WORKERS'] = int(os.getenv('BATCH_WORKERS', min(32, (os.cpu_count() or 1) * 4)))
+app.config['BATCH_MAX_FILES'] = int(os.getenv('BATCH_MAX_FILES', 10000))
+batch_executor = ThreadPoolExecutor(max_workers=app.config['BATCH_WORKERS'], thread_name_prefix='batch')
+
+@app.after_request
+def compress_json_response(response):
+    """
+    Kompresi JSON dinamis (mis. /api/files, /api/line-items) sesuai
+    Accept-Encoding. Respons yang sudah punya Content-Encoding (balance-sheet,
+    unduhan), streaming, bukan 200, atau lebih kecil dari COMPRESS_MIN_BYTES
+    dikirim apa adanya.
+    """
+    if (response.status_code != 200 or response.mimetype != 'application/json'
+            or response.direct_passthrough or response.is_streamed or 'Content-Encoding' in response.headers):
+        return response
+    response.vary.add('Accept-Encoding')
+    encoding = response_compression.negotiate(request.accept_encodings)
+    if encoding is None:
+        return response
+    body = response.get_data()
+    if len(body) < response_compression.COMPRESS_MIN_BYTES:
+        return response
+    response.set_data(response_compression.compress(body, encoding))
+    response.content_encoding = encoding
+    return response
+
+
 @app.route('/')
 def home():
     return render_template('index.html')
@@ -17,635 +98,576 @@ def home():
 @app.route('/api/files', methods=['GET'])
 def list_json_files():
     """
-    Mengembalikan daftar semua file JSON yang tersedia di direktori output.
+    Mengembalikan daftar file JSON di direktori output dari katalog in-memory.
+
+    Query parameter:
+      limit   jumlah item per halaman (default 1000, maks 5000)
+      cursor  nilai next_cursor dari halaman sebelumnya
+      prefix  hanya nama yang diawali string ini
+      q       hanya nama yang mengandung string ini
+      sort    name | created | size (default name)
+      order   asc | desc (default asc)
+      since   hanya file yang dibuat setelah waktu ini (epoch detik atau ISO 8601)
     """
+    args = request.args
     try:
-        json_files = [f for f in os.listdir(app.config['OUTPUT_FOLDER']) if f.endswith('.json')]
-        return jsonify({"files": json_files})
-    except FileNotFoundError:
-        return jsonify({"error": "Direktori output tidak ditemukan."}, 404)
+        limit = int(args.get('limit', app.config['FILES_PAGE_SIZE']))
+        if not 1 <= limit <= app.config['FILES_MAX_PAGE_SIZE']:
+            raise ValueError(f"limit harus antara 1 dan {app.config['FILES_MAX_PAGE_SIZE']}")
+        order = args.get('order', 'asc')
+        if order not in ('asc', 'desc'):
+            raise ValueError("order harus asc atau desc")
+        since = _parse_since(args.get('since'))
+
+        output_catalog.ensure_started()
+        entries, next_cursor = output_catalog.query(
+            limit,
+            cursor=args.get('cursor'),
+            prefix=args.get('prefix'),
+            contains=args.get('q'),
+            sort=args.get('sort', 'name'),
+            descending=order == 'desc',
+            since=since,
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
-        return jsonify({"error": str(e)}, 500)
+        return jsonify({"error": str(e)}), 500
+
+    return jsonify({
+        "files": [e.name for e in entries],
+        "items": [e.to_dict() for e in entries],
+        "next_cursor": next_cursor,
+    })
+
+
+def _parse_since(value):
+    """Parameter since: epoch detik atau tanggal ISO 8601. ValueError jika tidak valid."""
+    if value is None or value == '':
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except ValueError:
+        raise ValueError("since harus epoch detik atau tanggal ISO 8601") from None
 
 
 # ====tools====
-def clean_value_string(value):
+def _file_etag(filename, st, *extra):
     """
-    Membersihkan string nilai dari karakter non-numerik seperti 'Rp', '.', ',', '(', ')'.
-    Menangani nilai negatif dalam kurung.
+    ETag kuat dari identitas file sumber (nama, mtime_ns, ukuran) ditambah
+    komponen lain seperti versi skema laporan.
     """
-    if value is None:
-        return None
-    
-    s_value = str(value).strip()
-    is_negative = False
+    identity = "|".join([filename, str(st.st_mtime_ns), str(st.st_size), *extra])
+    return hashlib.sha1(identity.encode('utf-8')).hexdigest()
 
-    if s_value.startswith('(') and s_value.endswith(')'):
-        is_negative = True
-        s_value = s_value[1:-1] # Hapus tanda kurung
 
-    # Hapus 'Rp', spasi, titik (ribuan), dan koma (desimal atau ribuan)
-    cleaned_value = s_value.replace('Rp', '').replace('.', '').replace(',', '').replace(' ', '').strip()
+def _is_not_modified(etag, st):
+    """
+    Evaluasi If-None-Match / If-Modified-Since. If-None-Match diutamakan jika ada.
+    """
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    if request.if_modified_since is not None:
+        return int(st.st_mtime) <= request.if_modified_since.timestamp()
+    return False
 
-    if is_negative:
-        return f"-{cleaned_value}"
-    return cleaned_value
 
+def _with_validators(response, etag, st):
+    response.set_etag(etag)
+    response.last_modified = int(st.st_mtime)
+    # Klien boleh menyimpan respons tetapi wajib revalidasi setiap kali.
+    response.cache_control.no_cache = True
+    return response
 
-# ============  SYARIAH LABARUGI ============
-@app.route('/balance-sheet/ep/syariah/laba-rugi/<filename>', methods=['GET'])
-def get_json_file_syariah_laba_rugi(filename):
+
+def _statement_body(filename, statement_type, st):
+    """
+    Status dan body laporan untuk file yang sudah di-stat. Body berupa bytes
+    (dari cache memori atau view kecil) atau iterator bytes untuk body besar /
+    yang baru dibangun, sehingga memori tidak bergantung pada ukuran laporan.
+    Melempar json.JSONDecodeError jika file sumber bukan JSON valid.
+    """
+    stored = _stored_body(filename, statement_type, st)
+    if stored is not None:
+        return stored
+
+    folder = app.config['OUTPUT_FOLDER']
+    with open(os.path.join(folder, filename), 'r', encoding='utf-8') as f:
+        if st.st_size > app.config['REPORT_STREAM_THRESHOLD']:
+            # File besar dibaca bertahap supaya memori tidak sebanding ukuran
+            # file. Format ringkas dibaca per blok baris (hampir secepat
+            # json.load); file lama indent=2 per elemen, yang lebih lambat.
+            try:
+                status, chunks = statement_views.iter_view_chunks(iter_rows(f), statement_type)
+            except JSONStreamError:
+                # Bukan JSON array yang valid: pakai json.load supaya error dan
+                # status respons sama seperti sebelumnya.
+                f.seek(0)
+                status, chunks = statement_views.iter_view_chunks(json.load(f), statement_type)
+        else:
+            status, chunks = statement_views.iter_view_chunks(json.load(f), statement_type)
+    chunks = statement_views.tee_to_view(folder, filename, statement_type, st.st_mtime_ns, status, chunks)
+    return status, _cache_if_small(filename, statement_type, st, status, chunks)
+
+
+def _stored_body(filename, statement_type, st, encoding=None):
+    """(status, body) dari cache memori atau view di disk, atau None jika belum ada."""
+    cached = report_cache.get(filename, statement_type, st.st_mtime_ns, st.st_size, encoding)
+    if cached is not None:
+        body, status = cached
+        return status, body
+
+    # View yang dimaterialisasi saat bot menulis file dilayani apa adanya;
+    # jika belum ada/basi (mis. peta akun berubah), dibangun ulang oleh pemanggil.
+    view = statement_views.open_view(app.config['OUTPUT_FOLDER'], filename, statement_type, st.st_mtime_ns,
+                                     encoding)
+    if view is None:
+        return None
+    f, status = view
+    if os.fstat(f.fileno()).st_size > app.config['REPORT_STREAM_THRESHOLD']:
+        return status, _read_blocks(f)
+    with f:
+        body = f.read()
+    report_cache.put(filename, statement_type, st.st_mtime_ns, st.st_size, body, status, encoding)
+    return status, body
+
+
+def _encoded_statement_body(filename, statement_type, st, encoding):
+    """
+    Seperti _statement_body, tetapi body dikompresi dengan content-coding
+    encoding. Body terkompresi disimpan sebagai view di disk (dipakai bersama
+    semua worker) dan di cache memori jika kecil, sehingga setiap laporan hanya
+    dikompresi sekali. Mengembalikan (status, body, encoding); encoding None
+    jika body lebih kecil dari COMPRESS_MIN_BYTES dan dikirim apa adanya.
+    """
+    stored = _stored_body(filename, statement_type, st, encoding)
+    if stored is not None:
+        return (*stored, encoding)
+
+    status, body = _statement_body(filename, statement_type, st)
+    if not isinstance(body, bytes) and st.st_size <= app.config['REPORT_STREAM_THRESHOLD']:
+        body = b''.join(body)
+    if isinstance(body, bytes):
+        if len(body) < response_compression.COMPRESS_MIN_BYTES:
+            return status, body, None
+        chunks = (response_compression.compress(body, encoding),)
+    else:
+        chunks = response_compression.compress_chunks(body, encoding)
+
+    chunks = statement_views.tee_to_view(app.config['OUTPUT_FOLDER'], filename, statement_type,
+                                         st.st_mtime_ns, status, chunks, encoding)
+    chunks = _cache_if_small(filename, statement_type, st, status, chunks, encoding)
+    if isinstance(body, bytes):
+        return status, b''.join(chunks), encoding
+    return status, chunks, encoding
+
+
+def _read_blocks(f, limit=None):
+    with f:
+        if limit is None:
+            for block in iter(lambda: f.read(STREAM_BLOCK_SIZE), b''):
+                yield block
+            return
+        while limit > 0:
+            block = f.read(min(limit, STREAM_BLOCK_SIZE))
+            if not block:
+                return
+            limit -= len(block)
+            yield block
+
+
+def _cache_if_small(filename, statement_type, st, status, chunks, encoding=None):
+    """Meneruskan chunks; body yang selesai dan cukup kecil disimpan di cache memori."""
+    parts, size = [], 0
+    for chunk in chunks:
+        if parts is not None:
+            size += len(chunk)
+            parts.append(chunk)
+            if size > app.config['REPORT_STREAM_THRESHOLD']:
+                parts = None
+        yield chunk
+    if parts is not None:
+        report_cache.put(filename, statement_type, st.st_mtime_ns, st.st_size, b''.join(parts), status, encoding)
+
+
+def _load_statement(filename, statement_type, st):
+    """Seperti _statement_body, tetapi body selalu dikembalikan utuh sebagai (bytes, status)."""
+    status, body = _statement_body(filename, statement_type, st)
+    if not isinstance(body, bytes):
+        body = b''.join(body)
+    return body, status
+
+
+def _serve_statement(filename, statement_type):
     """
     Mengembalikan laporan JSON lengkap dengan data untuk semua tahun yang ditemukan,
-    difomrat sesuai permintaan.
+    difomrat sesuai skema jenis laporan di statement_schema.
     """
     if not filename.endswith('.json'):
-        return jsonify({"error": "Nama file harus berakhiran .json"}, 400)
+        return jsonify({"error": "Nama file harus berakhiran .json"}), 400
 
     file_path = os.path.join(app.config['OUTPUT_FOLDER'], filename)
 
-    if not os.path.exists(file_path):
-        return jsonify({"error": "File tidak ditemukan."}, 404)
+    try:
+        st = os.stat(file_path)
+    except FileNotFoundError:
+        return jsonify({"error": "File tidak ditemukan."}), 404
+
+    # Validator dihitung hanya dari stat (dan content-coding hasil negosiasi),
+    # jadi 304 dikirim sebelum file dibuka.
+    encoding = response_compression.negotiate(request.accept_encodings)
+    etag = _file_etag(filename, st, statement_type, get_schema(statement_type).version,
+                      *((encoding,) if encoding else ()))
+    if _is_not_modified(etag, st):
+        response = Response(status=304)
+        response.vary.add('Accept-Encoding')
+        return _with_validators(response, etag, st)
 
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            full_data_from_file = json.load(f)
-        
-        # Struktur respons sesuai permintaan
-        response_payload = {
-            "status" : "SUCCESS",
-            "reason" : "File Successfully Read",
-            "read": []
-        }
-
-        # Peta dari nilai 'Akun' di JSON asli ke kunci yang diinginkan di output
-        # Saya telah memperbarui pemetaan ini berdasarkan contoh output yang Anda berikan
-        # dan data JSON input Anda.
-        account_to_output_key_map = {
-            "Pendapatan bunga": "interest_income",
-            "Jumlah partisipasi anggota": "member_participation",
-            "PARTISIPASI ANGGOTA": "member_participation_category", 
-            "BEBAN USAHA": "operating_expenses_category", 
-            "Beban penyisihan": "allowance_expense",
-            "Beban kepegawaian": "personnel_expense",
-            "Beban administrasi dan umum": "administrative_general_expenses",
-            "Beban penyusutan dan amortisasi": "depreciation_amortization_expenses",
-            "Jumlah beban usaha": "business_expense",
-            "SISA HASIL USAHA BRUTO": "remaining_profit_bruto", 
-            "Hasil investasi": "investment_result",
-            "Beban perkoperasian": "cooperative_expense",
-            "PENDAPATAN & BEBAN LAIN": "other_income_expense_category", 
-            "Pendapatan lain": "other_income",
-            "Beban lain": "other_expense",
-            "Sisa hasil usaha sebelum pajak": "remaining_profit_before_tax",
-            "Beban pajak penghasilan": "income_tax_expense",
-            "SISA HASIL USAHA": "remaining_profit",
-            "Penghasilan komprehensif lain": "other_comprehensive_income",
-            "PENGHASILAN KOMPREHENSIF": "comprehensive_income",
-        }
-
-        # Urutan kunci yang diinginkan dalam objek di dalam array 'read'
-        # Ini akan menentukan urutan output JSON Anda.
-        desired_output_keys_order = [
-            "interest_income",
-            "other_business_income",
-            "member_participation",
-            "member_participation_category",
-            "operating_expenses_category",
-            "interest_expense",
-            "allowance_expense",
-            "personnel_expense",
-            "administrative_general_expenses",
-            "depreciation_amortization_expenses",
-            "other_business_expense",
-            "business_expense",
-            "investment_result",
-            "cooperative_expense",
-            "other_income",
-            "other_expense",
-            "remaining_profit_before_tax",
-            "income_tax_expense",
-            "remaining_profit",
-            "other_comprehensive_income",
-            "comprehensive_income"
-        ]
-
-        # Temukan semua tahun yang tersedia di data
-        available_years = set()
-        for item in full_data_from_file:
-            for key in item:
-                if key.isdigit() and len(key) == 4: # Asumsi tahun adalah 4 digit angka
-                    available_years.add(key)
-        
-        # Urutkan tahun secara ascending
-        sorted_years = sorted(list(available_years))
-
-        # Proses data untuk setiap tahun yang ditemukan
-        for year in sorted_years:
-            year_data_entry = {} # Inisialisasi dictionary kosong
-            temp_data_storage = {} # Simpan data sementara untuk tahun ini
-
-            # Pertama, kumpulkan semua data untuk tahun saat ini
-            for item in full_data_from_file:
-                akun_value = item.get('Akun')
-                if akun_value in account_to_output_key_map and year in item:
-                    output_key = account_to_output_key_map[akun_value]
-                    value_for_year = item.get(year)
-                    
-                    temp_data_storage[output_key] = {
-                        "value": clean_value_string(value_for_year),
-                        "conUidence": None
-                    }
-            
-            # Kedua, bangun entri data tahunan dengan urutan yang benar
-            for key in desired_output_keys_order:
-                if key == "year":
-                    year_data_entry['year'] = int(year)
-                elif key in temp_data_storage:
-                    year_data_entry[key] = temp_data_storage[key]
-                else:
-                    # Jika kunci tidak ditemukan, tambahkan dengan nilai null
-                    year_data_entry[key] = {"value": None, "conUidence": None}
-            
-            response_payload["read"].append(year_data_entry)
-            
-        if not response_payload["read"]:
-            response_payload["status"] = "FAILED"
-            response_payload["reason"] = "No year data found in the file."
-
-            return Response(json.dumps(response_payload, sort_keys=False), mimetype='application/json', status=404)
-
-        # Explicitly create the final dictionary to ensure key order.
-        # This is the most reliable way to control the output structure.
-        final_response = {
-            "status": response_payload["status"],
-            "reason": response_payload["reason"],
-            "read": response_payload["read"]
-        }
-        # Use json.dumps with sort_keys=False and return a raw Response object
-        # to have full control over the output format and prevent any reordering by jsonify.
-        return Response(json.dumps(final_response, sort_keys=False), mimetype='application/json')
+        # Body besar berupa generator dan dikirim dengan chunked transfer encoding.
+        if encoding is None:
+            status, body = _statement_body(filename, statement_type, st)
+        else:
+            status, body, encoding = _encoded_statement_body(filename, statement_type, st, encoding)
+        response = Response(body, mimetype='application/json', status=status)
+        if encoding is not None:
+            response.content_encoding = encoding
+        response.vary.add('Accept-Encoding')
+        return _with_validators(response, etag, st)
     except json.JSONDecodeError:
-        return jsonify({"error": "File bukan JSON yang valid."}, 400)
+        return jsonify({"error": "File bukan JSON yang valid."}), 400
     except Exception as e:
-        return jsonify({"error": str(e)}, 500)
+        return jsonify({"error": str(e)}), 500
+
+
+# ============  SYARIAH LABARUGI ============
+@app.route('/balance-sheet/ep/syariah/laba-rugi/<filename>', methods=['GET'])
+def get_json_file_syariah_laba_rugi(filename):
+    return _serve_statement(filename, "syariah/laba-rugi")
 
 
 # ============ KONVESIONAL LABARUGI ============
 @app.route('/balance-sheet/ep/konvesional/laba-rugi/<filename>', methods=['GET'])
 def get_json_file_konvensional_laba_rugi(filename):
-    """
-    Mengembalikan laporan JSON lengkap dengan data untuk semua tahun yang ditemukan,
-    difomrat sesuai permintaan.
-    """
-    if not filename.endswith('.json'):
-        return jsonify({"error": "Nama file harus berakhiran .json"}, 400)
+    return _serve_statement(filename, "konvesional/laba-rugi")
 
-    file_path = os.path.join(app.config['OUTPUT_FOLDER'], filename)
 
-    if not os.path.exists(file_path):
-        return jsonify({"error": "File tidak ditemukan."}, 404)
+# =========== Syariah Laporan Keuangan ============
+@app.route('/balance-sheet/ep/syariah/laporan-keuangan/<filename>', methods=['GET'])
+def get_json_file_syariah_keuangan(filename):
+    return _serve_statement(filename, "syariah/laporan-keuangan")
+
+
+# =========== KONVESIONAL Laporan Keuangan ============
+@app.route('/balance-sheet/ep/konvesional/laporan-keuangan/<filename>', methods=['GET'])
+def get_json_file_konvesional_keuangan(filename):
+    return _serve_statement(filename, "konvesional/laporan-keuangan")
+
 
+def _batch_item(index, filename, statement_type):
+    """Satu baris NDJSON hasil batch; error per file dilaporkan di barisnya sendiri."""
+    def error(status, message):
+        return json.dumps({"index": index, "file": filename, "status": status, "error": message}).encode('utf-8') + b"\n"
+
+    if not isinstance(filename, str) or not filename.endswith('.json'):
+        return error(400, "Nama file harus berakhiran .json")
+    if os.path.basename(filename) != filename or filename.startswith('.'):
+        return error(400, "Nama file tidak valid.")
+    try:
+        st = os.stat(os.path.join(app.config['OUTPUT_FOLDER'], filename))
+    except FileNotFoundError:
+        return error(404, "File tidak ditemukan.")
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            full_data_from_file = json.load(f)
-        
-        # Struktur respons sesuai permintaan
-        response_payload = {
-            "status" : "SUCCESS",
-            "reason" : "File Successfully Read",
-            "read": []
-        }
-
-        # Peta dari nilai 'Akun' di JSON asli ke kunci yang diinginkan di output
-        # Saya telah memperbarui pemetaan ini berdasarkan contoh output yang Anda berikan
-        # dan data JSON input Anda.
-        account_to_output_key_map = {
-            "PARTISIPASI ANGGOTA": "member_participation_category", # Ini kategori, tidak ada di output expectation
-            "Pendapatan bunga": "interest_income",
-            "Jumlah partisipasi anggota": "member_participation",
-            "BEBAN USAHA": "operating_expenses_category", # Ini kategori, tidak ada di output expectation
-            "Beban bunga": "interest_expense",
-            "Beban penyisihan": "allowance_expense",
-            "Beban kepegawaian": "personnel_expense",
-            "Beban administrasi dan umum": "administrative_general_expenses",
-            "Beban penyusutan dan amortisasi": "depreciation_amortization_expenses",
-            "Beban usaha lainnya": "other_business_expense",
-            "Jumlah beban usaha": "business_expense",
-            "SISA HASIL USAHA BRUTO": "remaining_profit_bruto", # Tidak ada di output expectation
-            "Hasil investasi": "investment_result",
-            "Beban perkoperasian": "cooperative_expense",
-            "PENDAPATAN & BEBAN LAIN": "other_income_expense_category", # Ini kategori, tidak ada di output expectation
-            "Pendapatan lain": "other_income",
-            "Beban lain": "other_expense",
-            "Sisa hasil usaha sebelum pajak": "remaining_profit_before_tax",
-            "Beban pajak penghasilan": "income_tax_expense",
-            "SISA HASIL USAHA": "remaining_profit",
-            "Penghasilan komprehensif lain": "other_comprehensive_income",
-            "PENGHASILAN KOMPREHENSIF": "comprehensive_income",
-        }
-
-        # Urutan kunci yang diinginkan dalam objek di dalam array 'read'
-        # Ini akan menentukan urutan output JSON Anda.
-        desired_output_keys_order = [
-            "year",
-            "member_participation",
-            "interest_income",
-            "interest_expense",
-            "allowance_expense",
-            "personnel_expense",
-            "administrative_general_expenses",
-            "depreciation_amortization_expenses",
-            "other_business_expense",
-            "business_expense",
-            "remaining_profit_bruto", 
-            "investment_result",
-            "cooperative_expense",
-            "other_income_expense_category",
-            "other_income",
-            "other_expense",
-            "remaining_profit_before_tax",
-            "income_tax_expense",
-            "remaining_profit",
-            "other_comprehensive_income",
-            "comprehensive_income"
-        ]
-
-        # Temukan semua tahun yang tersedia di data
-        available_years = set()
-        for item in full_data_from_file:
-            for key in item:
-                if key.isdigit() and len(key) == 4: # Asumsi tahun adalah 4 digit angka
-                    available_years.add(key)
-        
-        # Urutkan tahun secara ascending
-        sorted_years = sorted(list(available_years))
-
-        # Proses data untuk setiap tahun yang ditemukan
-        for year in sorted_years:
-            year_data_entry = {} # Inisialisasi dictionary kosong
-            temp_data_storage = {} # Simpan data sementara untuk tahun ini
-
-            # Pertama, kumpulkan semua data untuk tahun saat ini
-            for item in full_data_from_file:
-                akun_value = item.get('Akun')
-                if akun_value in account_to_output_key_map and year in item:
-                    output_key = account_to_output_key_map[akun_value]
-                    value_for_year = item.get(year)
-                    
-                    temp_data_storage[output_key] = {
-                        "value": clean_value_string(value_for_year),
-                        "conUidence": None
-                    }
-            
-            # Kedua, bangun entri data tahunan dengan urutan yang benar
-            for key in desired_output_keys_order:
-                if key == "year":
-                    year_data_entry['year'] = int(year)
-                elif key in temp_data_storage:
-                    year_data_entry[key] = temp_data_storage[key]
-                else:
-                    # Jika kunci tidak ditemukan, tambahkan dengan nilai null
-                    year_data_entry[key] = {"value": None, "conUidence": None}
-            
-            response_payload["read"].append(year_data_entry)
-            
-        if not response_payload["read"]:
-            response_payload["status"] = "FAILED"
-            response_payload["reason"] = "No year data found in the file."
-
-            return Response(json.dumps(response_payload, sort_keys=False), mimetype='application/json', status=404)
-
-        # Explicitly create the final dictionary to ensure key order.
-        # This is the most reliable way to control the output structure.
-        final_response = {
-            "status": response_payload["status"],
-            "reason": response_payload["reason"],
-            "read": response_payload["read"]
-        }
-        # Use json.dumps with sort_keys=False and return a raw Response object
-        # to have full control over the output format and prevent any reordering by jsonify.
-        return Response(json.dumps(final_response, sort_keys=False), mimetype='application/json')
+        body, status = _load_statement(filename, statement_type, st)
     except json.JSONDecodeError:
-        return jsonify({"error": "File bukan JSON yang valid."}, 400)
+        return error(400, "File bukan JSON yang valid.")
     except Exception as e:
-        return jsonify({"error": str(e)}, 500)
+        return error(500, str(e))
+    # Body laporan sudah berupa JSON bytes, jadi disisipkan tanpa di-parse ulang.
+    head = json.dumps({"index": index, "file": filename, "status": status}).encode('utf-8')
+    return head[:-1] + b', "result": ' + body + b"}\n"
 
-# =========== Syariah Laporan Keuangan ============
-@app.route('/balance-sheet/ep/syariah/laporan-keuangan/<filename>', methods=['GET'])
-def get_json_file_syariah_keuangan(filename):
-    """
-    Mengembalikan laporan JSON lengkap dengan data untuk semua tahun yang ditemukan,
-    difomrat sesuai permintaan.
+
+@app.route('/balance-sheet/ep/batch', methods=['POST'])
+def batch_statements():
     """
-    if not filename.endswith('.json'):
-        return jsonify({"error": "Nama file harus berakhiran .json"}, 400)
+    Memproses banyak file sekaligus untuk satu jenis laporan.
 
-    file_path = os.path.join(app.config['OUTPUT_FOLDER'], filename)
+    Body JSON: {"type": "konvesional/laporan-keuangan", "files": ["a.json", ...]}
+    Respons berupa NDJSON (application/x-ndjson), satu baris per file segera
+    setelah selesai (urutan penyelesaian, bukan urutan input):
+      {"index": 0, "file": "a.json", "status": 200, "result": {...}}
+      {"index": 1, "file": "b.json", "status": 404, "error": "File tidak ditemukan."}
+    """
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict):
+        return jsonify({"error": "Body harus berupa objek JSON."}), 400
+    statement_type = payload.get('type')
+    if statement_type not in SCHEMAS:
+        return jsonify({"error": f"type harus salah satu dari: {', '.join(SCHEMAS)}"}), 400
+    files = payload.get('files')
+    if not isinstance(files, list) or not files:
+        return jsonify({"error": "files harus berupa list nama file yang tidak kosong."}), 400
+    if len(files) > app.config['BATCH_MAX_FILES']:
+        return jsonify({"error": f"Maksimal {app.config['BATCH_MAX_FILES']} file per batch."}), 400
+
+    # Jumlah item yang sedang diproses per request dibatasi, supaya satu batch
+    # besar tidak memenuhi antrean pool dan memori tetap terbatas.
+    window = app.config['BATCH_WORKERS'] * 2
+
+    def generate():
+        pending = set()
+        items = iter(enumerate(files))
+        try:
+            while True:
+                for index, filename in items:
+                    pending.add(batch_executor.submit(_batch_item, index, filename, statement_type))
+                    if len(pending) >= window:
+                        break
+                if not pending:
+                    return
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+        finally:
+            # Klien memutus koneksi: item yang belum berjalan tidak perlu diproses.
+            for future in pending:
+                future.cancel()
+
+    return Response(generate(), mimetype='application/x-ndjson')
+
+
+@app.route('/api/cache/stats', methods=['GET'])
+def report_cache_stats():
+    """
+    Statistik cache respons balance-sheet (hit, miss, eviksi, pemakaian byte).
+    """
+    return jsonify(report_cache.stats())
 
-    if not os.path.exists(file_path):
-        return jsonify({"error": "File tidak ditemukan."}, 404)
 
+def _optional_int(args, name):
+    value = args.get(name)
+    if value is None or value == '':
+        return None
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            full_data_from_file = json.load(f)
-        
-        # Struktur respons sesuai permintaan
-        response_payload = {
-            "status" : "SUCCESS",
-            "reason" : "File Successfully Read",
-            "read": []
-        }
-
-        # Peta dari nilai 'Akun' di JSON asli ke kunci yang diinginkan di output
-        # Saya telah memperbarui pemetaan ini berdasarkan contoh output yang Anda berikan
-        # dan data JSON input Anda.
-        account_to_output_key_map = {
-            "Kas dan setara kas": "cash_and_cash_equivalents",
-            "Piutang bunga": "interest_receivable",
-            "Pinjaman anggota": "member_loans",
-            "Penyisihan pinjaman": "loan_loss_provision",
-            "Pinjaman koperasi lain": "loans_to_other_cooperatives",
-            "Aset tetap": "fixed_assets",
-            "Akumulasi penyusutan": "accumulated_depreciation",
-            "Aset takberwujud": "intangible_assets",
-            "Akumulasi amortisasi": "accumulated_amortization",
-            "Aset lain": "other_assets",
-            "Total aset": "total_assets",
-            "Utang bunga": "interest_payable",
-            "Simpanan anggota": "member_deposits",
-            "Simpanan koperasi lain": "other_cooperative_deposits",
-            "Utang pinjaman": "loan_payable",
-            "Liabilitas imbalan kerja": "employee_benefit_liabilities",
-            "Liabilitas lain": "other_liabilities",
-            "Total liabilitas": "total_liabilities",
-            "Simpanan Pokok": "principal_savings",
-            "Simpanan Wajib": "mandatory_savings",
-            "Cadangan umum": "general_reserve",
-            "Sisa hasil usaha": "retained_earnings",
-            "Ekuitas lain": "other_equity",
-            "Total ekuitas": "total_equity",
-            "Total liabilitas dan ekuitas": "total_liabilities_and_equity",
-        }
-
-        # Urutan kunci yang diinginkan dalam objek di dalam array 'read'
-        # Ini akan menentukan urutan output JSON Anda.
-        desired_output_keys_order = [
-        "year",
-        "cash_and_cash_equivalents",
-        "interest_receivable",
-        "member_loans",
-        "loan_loss_provision",
-        "loans_to_other_cooperatives",
-        "fixed_assets",
-        "accumulated_depreciation",
-        "intangible_assets",
-        "accumulated_amortization",
-        "other_assets",
-        "total_assets",
-        "interest_payable",
-        "member_deposits",
-        "other_cooperative_deposits",
-        "loan_payable",
-        "employee_benefit_liabilities",
-        "other_liabilities",
-        "total_liabilities",
-        "principal_savings",
-        "mandatory_savings",
-        "general_reserve",
-        "retained_earnings",
-        "other_equity",
-        "total_equity",
-        "total_liabilities_and_equity"
-        ]
-
-        # Temukan semua tahun yang tersedia di data
-        available_years = set()
-        for item in full_data_from_file:
-            for key in item:
-                if key.isdigit() and len(key) == 4: # Asumsi tahun adalah 4 digit angka
-                    available_years.add(key)
-        
-        # Urutkan tahun secara ascending
-        sorted_years = sorted(list(available_years))
-
-        # Proses data untuk setiap tahun yang ditemukan
-        for year in sorted_years:
-            year_data_entry = {} # Inisialisasi dictionary kosong
-            temp_data_storage = {} # Simpan data sementara untuk tahun ini
-
-            # Pertama, kumpulkan semua data untuk tahun saat ini
-            for item in full_data_from_file:
-                akun_value = item.get('Akun')
-                if akun_value in account_to_output_key_map and year in item:
-                    output_key = account_to_output_key_map[akun_value]
-                    value_for_year = item.get(year)
-                    
-                    temp_data_storage[output_key] = {
-                        "value": clean_value_string(value_for_year),
-                        "conUidence": None
-                    }
-            
-            # Kedua, bangun entri data tahunan dengan urutan yang benar
-            for key in desired_output_keys_order:
-                if key == "year":
-                    year_data_entry['year'] = int(year)
-                elif key in temp_data_storage:
-                    year_data_entry[key] = temp_data_storage[key]
-                else:
-                    # Jika kunci tidak ditemukan, tambahkan dengan nilai null
-                    year_data_entry[key] = {"value": None, "conUidence": None}
-            
-            response_payload["read"].append(year_data_entry)
-            
-        if not response_payload["read"]:
-            response_payload["status"] = "FAILED"
-            response_payload["reason"] = "No year data found in the file."
-
-            return Response(json.dumps(response_payload, sort_keys=False), mimetype='application/json', status=404)
-
-        # Explicitly create the final dictionary to ensure key order.
-        # This is the most reliable way to control the output structure.
-        final_response = {
-            "status": response_payload["status"],
-            "reason": response_payload["reason"],
-            "read": response_payload["read"]
-        }
-        # Use json.dumps with sort_keys=False and return a raw Response object
-        # to have full control over the output format and prevent any reordering by jsonify.
-        return Response(json.dumps(final_response, sort_keys=False), mimetype='application/json')
-    except json.JSONDecodeError:
-        return jsonify({"error": "File bukan JSON yang valid."}, 400)
-    except Exception as e:
-        return jsonify({"error": str(e)}, 500)
+        return int(value)
+    except ValueError:
+        raise ValueError(f"{name} harus bilangan bulat") from None
 
 
-# =========== KONVESIONAL Laporan Keuangan ============
-@app.route('/balance-sheet/ep/konvesional/laporan-keuangan/<filename>', methods=['GET'])
-def get_json_file_konvesional_keuangan(filename):
+@app.route('/api/line-items', methods=['GET'])
+def query_line_items():
     """
-    Mengembalikan laporan JSON lengkap dengan data untuk semua tahun yang ditemukan,
-    difomrat sesuai permintaan.
+    Query line item laporan lintas semua file output. "value" setiap item
+    berupa string desimal eksak, sama seperti nilai di endpoint laporan.
+
+    Query parameter:
+      account    kunci akun, boleh diulang atau dipisah koma (mis. total_assets)
+      year       satu tahun; atau year_from / year_to (inklusif)
+      file       pola glob nama file (mis. KSP_*)
+      type       jenis laporan, mis. konvesional/laporan-keuangan
+      limit      jumlah item per halaman (default 1000, maks 10000)
+      offset     posisi awal halaman
     """
-    if not filename.endswith('.json'):
-        return jsonify({"error": "Nama file harus berakhiran .json"}, 400)
+    args = request.args
+    try:
+        accounts = [a for value in args.getlist('account') for a in value.split(',') if a]
+        year = _optional_int(args, 'year')
+        year_from = year if year is not None else _optional_int(args, 'year_from')
+        year_to = year if year is not None else _optional_int(args, 'year_to')
+        statement_type = args.get('type')
+        if statement_type and statement_type not in SCHEMAS:
+            raise ValueError(f"type harus salah satu dari: {', '.join(SCHEMAS)}")
+        limit = _optional_int(args, 'limit')
+        if limit is None:
+            limit = app.config['LINE_ITEMS_PAGE_SIZE']
+        if not 1 <= limit <= app.config['LINE_ITEMS_MAX_PAGE_SIZE']:
+            raise ValueError(f"limit harus antara 1 dan {app.config['LINE_ITEMS_MAX_PAGE_SIZE']}")
+        offset = _optional_int(args, 'offset') or 0
+        if offset < 0:
+            raise ValueError("offset tidak boleh negatif")
+
+        items = line_item_store.query(
+            accounts=accounts,
+            year_from=year_from,
+            year_to=year_to,
+            file_pattern=args.get('file'),
+            statement_type=statement_type,
+            limit=limit,
+            offset=offset,
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
 
-    file_path = os.path.join(app.config['OUTPUT_FOLDER'], filename)
+    for item in items:
+        item["value"] = format_amount(item["value"])
+    return jsonify({
+        "items": items,
+        "count": len(items),
+        "next_offset": offset + limit if len(items) == limit else None,
+    })
 
-    if not os.path.exists(file_path):
-        return jsonify({"error": "File tidak ditemukan."}, 404)
 
+@app.route('/api/line-items/accounts', methods=['GET'])
+def list_line_item_accounts():
+    """
+    Daftar kunci akun yang tersedia di store (opsional difilter dengan ?type=).
+    """
+    statement_type = request.args.get('type')
+    if statement_type and statement_type not in SCHEMAS:
+        return jsonify({"error": f"type harus salah satu dari: {', '.join(SCHEMAS)}"}), 400
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            full_data_from_file = json.load(f)
-        
-        # Struktur respons sesuai permintaan
-        response_payload = {
-            "status" : "SUCCESS",
-            "reason" : "File Successfully Read",
-            "read": []
-        }
-
-        # Peta dari nilai 'Akun' di JSON asli ke kunci yang diinginkan di output
-        # Saya telah memperbarui pemetaan ini berdasarkan contoh output yang Anda berikan
-        # dan data JSON input Anda.
-        account_to_output_key_map = {
-            "Kas dan setara kas": "cash_and_cash_equivalents",
-            "Piutang bunga": "interest_receivable",
-            "Pinjaman anggota": "member_loans",
-            "Penyisihan pinjaman": "loan_loss_provision",
-            "Pinjaman koperasi lain": "loans_to_other_cooperatives",
-            "Aset tetap": "fixed_assets",
-            "Akumulasi penyusutan": "accumulated_depreciation",
-            "Aset takberwujud": "intangible_assets",
-            "Akumulasi amortisasi": "accumulated_amortization",
-            "Aset lain": "other_assets",
-            "Total aset": "total_assets",
-            "Utang bunga": "interest_payable",
-            "Simpanan anggota": "member_deposits",
-            "Simpanan koperasi lain": "other_cooperative_deposits",
-            "Utang pinjaman": "loan_payable",
-            "Liabilitas imbalan kerja": "employee_benefit_liabilities",
-            "Liabilitas lain": "other_liabilities",
-            "Total liabilitas": "total_liabilities",
-            "Simpanan Pokok": "principal_savings",
-            "Simpanan Wajib": "mandatory_savings",
-            "Cadangan umum": "general_reserve",
-            "Sisa hasil usaha": "retained_earnings",
-            "Ekuitas lain": "other_equity",
-            "Total ekuitas": "total_equity",
-            "Total liabilitas dan ekuitas": "total_liabilities_and_equity",
-        }
-
-        # Urutan kunci yang diinginkan dalam objek di dalam array 'read'
-        # Ini akan menentukan urutan output JSON Anda.
-        desired_output_keys_order = [
-        "year",
-        "cash_and_cash_equivalents",
-        "interest_receivable",
-        "member_loans",
-        "loan_loss_provision",
-        "loans_to_other_cooperatives",
-        "fixed_assets",
-        "accumulated_depreciation",
-        "intangible_assets",
-        "accumulated_amortization",
-        "other_assets",
-        "total_assets",
-        "interest_payable",
-        "member_deposits",
-        "other_cooperative_deposits",
-        "loan_payable",
-        "employee_benefit_liabilities",
-        "other_liabilities",
-        "total_liabilities",
-        "principal_savings",
-        "mandatory_savings",
-        "general_reserve",
-        "retained_earnings",
-        "other_equity",
-        "total_equity",
-        "total_liabilities_and_equity"
-        ]
-
-        # Temukan semua tahun yang tersedia di data
-        available_years = set()
-        for item in full_data_from_file:
-            for key in item:
-                if key.isdigit() and len(key) == 4: # Asumsi tahun adalah 4 digit angka
-                    available_years.add(key)
-        
-        # Urutkan tahun secara ascending
-        sorted_years = sorted(list(available_years))
-
-        # Proses data untuk setiap tahun yang ditemukan
-        for year in sorted_years:
-            year_data_entry = {} # Inisialisasi dictionary kosong
-            temp_data_storage = {} # Simpan data sementara untuk tahun ini
-
-            # Pertama, kumpulkan semua data untuk tahun saat ini
-            for item in full_data_from_file:
-                akun_value = item.get('Akun')
-                if akun_value in account_to_output_key_map and year in item:
-                    output_key = account_to_output_key_map[akun_value]
-                    value_for_year = item.get(year)
-                    
-                    temp_data_storage[output_key] = {
-                        "value": clean_value_string(value_for_year),
-                        "conUidence": None
-                    }
-            
-            # Kedua, bangun entri data tahunan dengan urutan yang benar
-            for key in desired_output_keys_order:
-                if key == "year":
-                    year_data_entry['year'] = int(year)
-                elif key in temp_data_storage:
-                    year_data_entry[key] = temp_data_storage[key]
-                else:
-                    # Jika kunci tidak ditemukan, tambahkan dengan nilai null
-                    year_data_entry[key] = {"value": None, "conUidence": None}
-            
-            response_payload["read"].append(year_data_entry)
-            
-        if not response_payload["read"]:
-            response_payload["status"] = "FAILED"
-            response_payload["reason"] = "No year data found in the file."
-
-            return Response(json.dumps(response_payload, sort_keys=False), mimetype='application/json', status=404)
-
-        # Explicitly create the final dictionary to ensure key order.
-        # This is the most reliable way to control the output structure.
-        final_response = {
-            "status": response_payload["status"],
-            "reason": response_payload["reason"],
-            "read": response_payload["read"]
-        }
-        # Use json.dumps with sort_keys=False and return a raw Response object
-        # to have full control over the output format and prevent any reordering by jsonify.
-        return Response(json.dumps(final_response, sort_keys=False), mimetype='application/json')
-    except json.JSONDecodeError:
-        return jsonify({"error": "File bukan JSON yang valid."}, 400)
+        return jsonify({"accounts": line_item_store.accounts(statement_type), **line_item_store.stats()})
     except Exception as e:
-        return jsonify({"error": str(e)}, 500)
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route('/api/ready', methods=['GET'])
+def readiness():
+    """
+    Readiness probe untuk load balancer: 200 jika folder output bisa dibaca,
+    katalog sudah dibangun, dan store line item bisa diakses; selain itu 503.
+    """
+    problems = []
+    folder = app.config['OUTPUT_FOLDER']
+    if not os.access(folder, os.R_OK | os.X_OK):
+        problems.append(f"folder output {folder} tidak bisa dibaca")
+    else:
+        try:
+            output_catalog.ensure_started()
+        except OSError as e:
+            problems.append(f"katalog output: {e}")
+    try:
+        line_item_store.ping()
+    except sqlite3.Error as e:
+        problems.append(f"store line item: {e}")
+
+    if problems:
+        return jsonify({"status": "NOT_READY", "problems": problems, "pid": os.getpid()}), 503
+    return jsonify({"status": "READY", "files": len(output_catalog), "pid": os.getpid()})
+
+
+def init_worker():
+    """
+    Dipanggil di setiap proses worker server produksi setelah fork
+    (gunicorn.conf.py: post_fork). Thread watcher katalog tidak ikut ter-fork,
+    jadi dibangun dan dijalankan ulang di worker.
+    """
+    os.makedirs(app.config['OUTPUT_FOLDER'], exist_ok=True)
+    output_catalog.ensure_started()
+
+
+def shutdown_worker():
+    """Menghentikan thread latar belakang worker saat server berhenti/reload."""
+    output_catalog.stop()
+    batch_executor.shutdown(wait=False, cancel_futures=True)
 
 
 @app.route('/api/download/<filename>', methods=['GET'])
 def download_json_file(filename):
     """
     Mengizinkan pengguna mengunduh file JSON tertentu.
+
+    Mendukung Range (206/416, If-Range) untuk unduhan yang bisa dilanjutkan,
+    ETag/Last-Modified, dan varian terkompresi dari precompressed jika klien
+    menerimanya (Content-Encoding). Body dikirim lewat wsgi.file_wrapper
+    sehingga gunicorn memakai sendfile() tanpa menyalin isi file lewat Python.
     """
     if not filename.endswith('.json'):
-        return jsonify({"error": "Nama file harus berakhiran .json"}, 400)
-    
-    file_path = os.path.join(app.config['OUTPUT_FOLDER'], filename)
-    if not os.path.exists(file_path):
-        abort(404) 
-    
-    return send_from_directory(app.config[''], filename, as_attachment=True)
+        return jsonify({"error": "Nama file harus berakhiran .json"}), 400
+
+    folder = app.config['OUTPUT_FOLDER']
+    file_path = safe_join(folder, filename)
+    if file_path is None:
+        abort(404)
+    try:
+        st = os.stat(file_path)
+    except FileNotFoundError:
+        abort(404)
+    if not stat.S_ISREG(st.st_mode):
+        abort(404)
+
+    # Varian dan ETag dipilih dari stat saja; file baru dibuka jika body dikirim.
+    variant = precompressed.find_variant(folder, filename, request.accept_encodings, st.st_mtime_ns)
+    path, encoding = variant if variant is not None else (file_path, None)
+    etag = _file_etag(filename, st) if encoding is None else _file_etag(filename, st, encoding)
+    if _is_not_modified(etag, st):
+        response = Response(status=304)
+    else:
+        try:
+            f = open(path, 'rb')
+        except FileNotFoundError:
+            if encoding is None:
+                abort(404)
+            # Varian terhapus setelah dipilih: kirim file sumber apa adanya.
+            encoding, etag = None, _file_etag(filename, st)
+            f = open(file_path, 'rb')
+        try:
+            response = _file_response(f, os.fstat(f.fileno()).st_size, etag, st)
+        except BaseException:
+            f.close()
+            raise
+
+    response.accept_ranges = 'bytes'
+    response.vary.add('Accept-Encoding')
+    if encoding is not None:
+        response.content_encoding = encoding
+    response.headers.set('Content-Disposition', 'attachment', filename=filename)
+    return _with_validators(response, etag, st)
+
+
+def _file_response(f, length, etag, st):
+    """Respons 200, 206 (satu range), atau 416 untuk file yang sudah dibuka."""
+    start, stop, status = 0, length, 200
+    byte_range = request.range
+    if byte_range is not None and _if_range_matches(etag, st):
+        span = byte_range.range_for_length(length)
+        if span is not None:
+            start, stop, status = span[0], span[1], 206
+        elif len(byte_range.ranges) == 1:
+            f.close()
+            response = Response(status=416)
+            response.content_range = ContentRange('bytes', None, None, length)
+            return response
+        # Beberapa range sekaligus (multipart/byteranges) tidak didukung;
+        # seluruh file dikirim dengan status 200.
+
+    f.seek(start)
+    file_wrapper = request.environ.get('wsgi.file_wrapper')
+    if file_wrapper is not None:
+        # gunicorn mengirim Content-Length byte mulai dari posisi file saat
+        # ini dengan sendfile().
+        body = file_wrapper(f, STREAM_BLOCK_SIZE)
+    else:
+        body = _read_blocks(f, stop - start)
+    response = Response(body, status=status, mimetype='application/json', direct_passthrough=True)
+    response.content_length = stop - start
+    if status == 206:
+        response.content_range = ContentRange('bytes', start, stop, length)
+    return response
+
+
+def _if_range_matches(etag, st):
+    """Range hanya dipakai jika If-Range tidak ada atau masih cocok dengan file."""
+    if_range = request.if_range
+    if if_range.etag is not None:
+        return if_range.etag == etag
+    if if_range.date is not None:
+        return int(st.st_mtime) == if_range.date.timestamp()
+    return True
 
 
 if __name__ == '__main__':
+    # Server development Flask (satu proses). Untuk produksi pakai gunicorn:
+    #   gunicorn -c gunicorn.conf.py wsgi:app
     # Pastikan direktori 'output' ada
     os.makedirs(OUTPUT_FOLDER, exist_ok=True)
-    app.run(debug=True, host='0.0.0.0', port=5000)
+    output_catalog.ensure_started()
+    app.run(debug=os.getenv('FLASK_DEBUG', '1') == '1', host='0.0.0.0', port=int(os.getenv('PORT', 5000)))
 
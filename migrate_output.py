@@ -0,0 +1,84 @@
+"""
+Migrasi satu kali file output lama (json.dumps indent=2) ke format ringkas
+json_stream.dump_rows(): JSON array tanpa indentasi, satu baris per elemen.
+
+File ditulis ulang secara atomik dengan mtime asli, sehingga urutan katalog
+/api/files dan view laporan (isinya tidak berubah) tetap berlaku; ETag ikut
+berubah karena ukuran file berubah. Varian terkompresi /api/download dihapus
+sebelum file diganti lalu dibuat ulang dari isi baru. File yang sudah ringkas
+dilewati, sehingga perintah ini aman dijalankan berulang kali:
+
+    python migrate_output.py [folder_output]
+"""
+import json
+import logging
+import os
+import stat
+import sys
+import tempfile
+
+import precompressed
+from json_stream import dump_rows, is_compact
+
+logger = logging.getLogger(__name__)
+
+
+def migrate_file(folder, filename):
+    """
+    Menulis ulang satu file output ke format ringkas. Mengembalikan
+    (ukuran lama, ukuran baru), atau None jika file sudah ringkas.
+    """
+    path = os.path.join(folder, filename)
+    with open(path, 'r', encoding='utf-8') as f:
+        if is_compact(f):
+            return None
+        st = os.fstat(f.fileno())
+        rows = json.load(f)
+
+    fd, tmp_path = tempfile.mkstemp(dir=folder, prefix=".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            dump_rows(rows, f)
+        os.chmod(tmp_path, stat.S_IMODE(st.st_mode))
+        os.utime(tmp_path, ns=(st.st_atime_ns, st.st_mtime_ns))
+        # Varian lama punya mtime yang sama dengan file baru sehingga akan
+        # dianggap segar; dihapus dulu supaya tidak pernah dilayani untuk isi baru.
+        precompressed.remove_variants(folder, filename)
+        os.replace(tmp_path, path)
+    finally:
+        try:
+            os.remove(tmp_path)
+        except FileNotFoundError:
+            pass
+    try:
+        precompressed.write_variants(folder, filename)
+    except OSError as e:
+        logger.warning(f"Gagal membuat varian terkompresi untuk {filename}: {e}")
+    return st.st_size, os.path.getsize(path)
+
+
+def migrate_all(folder):
+    """
+    Memigrasi semua file output di folder. Mengembalikan (jumlah file yang
+    ditulis ulang, total ukuran lama, total ukuran baru).
+    """
+    count = before = after = 0
+    for name in sorted(name for name in os.listdir(folder) if name.endswith('.json')):
+        try:
+            sizes = migrate_file(folder, name)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Gagal memigrasi {name}: {e}")
+            continue
+        if sizes is not None:
+            count += 1
+            before += sizes[0]
+            after += sizes[1]
+    return count, before, after
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    target = sys.argv[1] if len(sys.argv) > 1 else "output"
+    count, before, after = migrate_all(target)
+    saved = (1 - after / before) * 100 if before else 0.0
+    print(f"{count} file dimigrasi di {target}: {before:,} -> {after:,} byte (hemat {saved:.1f}%)")
@@ -0,0 +1,185 @@
+"""
+Parser angka format keuangan Indonesia untuk nilai sel tabel hasil ekstraksi.
+
+Format yang dikenali:
+  "Rp 1.234.567"      -> 1234567      (prefix Rp/Rp./IDR, titik/spasi pemisah ribuan)
+  "1.234,56"          -> Decimal("1234.56")   (koma desimal)
+  "(1.234)"           -> -1234        (negatif dalam kurung)
+  "-1.234", "1.234-"  -> -1234        (minus di depan atau di belakang)
+  "-", "–", "—"       -> 0            (strip berarti nol)
+  "1,234,567.89"      -> Decimal("1234567.89")  (format Inggris dari OCR/AI)
+
+Hasil berupa int, atau Decimal jika ada bagian pecahan bukan nol, sehingga
+nilai tetap eksak. Sel kosong atau tidak bisa dibaca menghasilkan None.
+format_amount() mengubah nilai menjadi string desimal eksak untuk respons
+JSON; json_default() dipakai sebagai `default` json.dumps untuk Decimal.
+"""
+import re
+from decimal import Decimal
+
+_DASHES = frozenset(("-", "–", "—", "−"))
+
+_AMOUNT = re.compile(
+    r"""
+    \s*(?:(?:Rp|IDR)\.?\s*)?
+    (?P<open>\()?\s*
+    (?P<lead>[-−])?\s*
+    (?:(?:Rp|IDR)\.?\s*)?
+    (?P<lead2>[-−])?\s*
+    (?:
+        (?P<id_int>\d{1,3}(?:\.\d{3})+|\d{1,3}(?:\ \d{3})+|\d+)
+        (?:,(?P<id_frac>\d+))?                                       # Indonesia: 1.234.567,89
+      | (?P<en_int>\d{1,3}(?:,\d{3})+|\d+)\.(?P<en_frac>\d+)          # Inggris: 1,234,567.89 / 12.5
+      | (?P<en_thousands>\d{1,3}(?:,\d{3}){2,})                       # Inggris: 1,234,567
+    )
+    \s*(?P<trail>[-−])?\s*
+    (?P<close>\))?\s*
+    """,
+    re.VERBOSE | re.IGNORECASE,
+).fullmatch
+
+
+def parse_amount(value):
+    """Mengubah satu nilai sel menjadi int/Decimal (atau None jika kosong/tidak valid)."""
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, int):
+        return value
+    if isinstance(value, float):
+        return int(value) if value.is_integer() else Decimal(repr(value))
+    s = str(value)
+    if s.isdecimal():
+        return int(s)
+    s = s.strip()
+    if not s:
+        return None
+    if s in _DASHES:
+        return 0
+
+    m = _AMOUNT(s)
+    if m is None or (m['open'] is None) != (m['close'] is None):
+        return None
+    negative = bool(m['open'] or m['lead'] or m['lead2'] or m['trail'])
+
+    if m['id_int'] is not None:
+        digits, frac = m['id_int'].replace('.', '').replace(' ', ''), m['id_frac']
+    elif m['en_int'] is not None:
+        digits, frac = m['en_int'].replace(',', ''), m['en_frac']
+    else:
+        digits, frac = m['en_thousands'].replace(',', ''), None
+
+    if frac is None or not frac.strip('0'):
+        return -int(digits) if negative else int(digits)
+    return Decimal(f"{'-' if negative else ''}{digits}.{frac}")
+
+
+# Bentuk sel: setiap angka ASCII diganti '9', sehingga "Rp 1.234" dan "Rp 5.678"
+# punya bentuk yang sama. Pola _AMOUNT hanya memakai \d, jadi hasil pencocokan
+# pada bentuk sama dengan pada nilai aslinya; resep per bentuk cukup dihitung sekali.
+_SHAPE = str.maketrans("0123456789", "9999999999")
+# Karakter bukan angka yang dibuang sekaligus untuk satu kolom; sisanya adalah
+# deretan angka bagian bulat diikuti angka pecahan.
+_SEPARATORS = ".,()- Rp"
+_STRIP_SEPARATORS = str.maketrans("", "", _SEPARATORS)
+_ZERO = "zero"
+_INVALID = "invalid"
+_OTHER = "other"
+_RECIPES = {}
+_RECIPES_MAX = 4096
+
+
+def _recipe(shape):
+    """
+    Resep parse untuk satu bentuk sel:
+      1 / -1                              bilangan bulat positif/negatif
+      (jumlah_pecahan, nol, tanda, akhiran)  desimal, Decimal(tanda + angka + "E-n")
+      _ZERO / _INVALID                    strip (nol) / tidak valid
+      _OTHER                              format valid lain (mis. "IDR"), lewat parse_amount
+    """
+    if shape.strip() in _DASHES:
+        return _ZERO
+    m = _AMOUNT(shape)
+    if m is None or (m['open'] is None) != (m['close'] is None):
+        return _INVALID
+    if shape.replace('9', '').strip(_SEPARATORS):
+        return _OTHER
+    negative = bool(m['open'] or m['lead'] or m['lead2'] or m['trail'])
+    frac = m['id_frac'] or m['en_frac']
+    if frac is None:
+        return -1 if negative else 1
+    return len(frac), '0' * len(frac), '-' if negative else '', f"E-{len(frac)}"
+
+
+def parse_column(values):
+    """
+    Mem-parse satu kolom (iterable nilai sel) sekaligus dan mengembalikan list
+    dengan hasil yang sama seperti parse_amount() per sel. Bentuk sel dan
+    deretan angkanya dihitung untuk seluruh kolom dengan str.translate(), lalu
+    setiap bentuk hanya dicocokkan dengan regex sekali.
+    """
+    if values.__class__ is not list:
+        values = list(values)
+    try:
+        joined = '\n'.join(values)
+    except TypeError:
+        # Sel kosong (None) paling sering; tipe lain diubah dengan str(). Nilai
+        # falsy bukan string (0, 0.0) menjadi '' dan diparse ulang di bawah.
+        texts = [value or '' for value in values]
+        try:
+            joined = '\n'.join(texts)
+        except TypeError:
+            joined = '\n'.join(map(str, texts))
+    shapes = joined.translate(_SHAPE).split('\n')
+    if len(shapes) != len(values):
+        # Ada sel yang mengandung baris baru; jatuh ke parse per sel.
+        return [parse_amount(value) for value in values]
+
+    recipes = _RECIPES
+    if len(recipes) > _RECIPES_MAX:
+        recipes.clear()
+    column_recipes = list(map(recipes.get, shapes))
+    if None in column_recipes:
+        for shape in set(shapes).difference(recipes):
+            recipes[shape] = _recipe(shape)
+        column_recipes = list(map(recipes.__getitem__, shapes))
+    digit_runs = joined.translate(_STRIP_SEPARATORS).split('\n')
+
+    return [
+        (int(digits) if recipe > 0 else -int(digits)) if recipe.__class__ is int
+        else 0 if recipe is _ZERO
+        else None if recipe is _INVALID and (value is None or value.__class__ is str)
+        else _finish_cell(value, recipe, digits)
+        for value, recipe, digits in zip(values, column_recipes, digit_runs)
+    ]
+
+
+def _finish_cell(value, recipe, digits):
+    if recipe.__class__ is str or value.__class__ is not str:
+        # _OTHER, atau nilai bukan string (float, int, ...).
+        return parse_amount(value)
+    frac_len, zeros, sign, suffix = recipe
+    if digits.endswith(zeros):
+        number = int(digits[:-frac_len])
+        return -number if sign else number
+    return Decimal(sign + digits + suffix)
+
+
+def format_amount(value):
+    """
+    Bentuk kirim (wire) nilai hasil parse: int maupun Decimal selalu menjadi
+    string desimal eksak tanpa notasi eksponen (1000 -> "1000", -2500.75 ->
+    "-2500.75", 1E-7 -> "0.0000001"), sehingga setiap "value" di respons API
+    bertipe sama dan tidak pernah dibulatkan seperti float. None tetap None.
+    """
+    if value is None:
+        return None
+    if isinstance(value, Decimal):
+        return format(value, "f")
+    return str(value)
+
+
+def json_default(obj):
+    """`default` untuk json.dumps: Decimal ditulis seperti format_amount()."""
+    if isinstance(obj, Decimal):
+        return format_amount(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
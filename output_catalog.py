@@ -0,0 +1,204 @@
+"""
+Katalog in-memory untuk file JSON di direktori output.
+
+Katalog dibangun sekali saat startup lalu dijaga tetap mutakhir oleh thread
+watcher yang memantau mtime direktori. Saat direktori berubah hanya nama baru
+(atau nama yang inode-nya berganti karena ditulis ulang lewat rename) yang
+di-stat ulang, sehingga biaya per perubahan tidak tumbuh dengan jumlah file.
+"""
+import base64
+import bisect
+import json
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+SORT_FIELDS = ("name", "created", "size")
+
+# File yang lebih muda dari ini di-stat ulang setiap poll, karena penulisan
+# langsung (tanpa rename) tidak mengubah mtime direktori.
+SETTLE_SECONDS = 30
+
+
+class CatalogEntry:
+    __slots__ = ("name", "inode", "created", "size")
+
+    def __init__(self, name, inode, created, size):
+        self.name = name
+        self.inode = inode
+        self.created = created
+        self.size = size
+
+    def sort_key(self, sort):
+        if sort == "name":
+            return (self.name,)
+        return (getattr(self, sort), self.name)
+
+    def to_dict(self):
+        return {"name": self.name, "size": self.size, "created": self.created}
+
+
+def encode_cursor(sort_key):
+    raw = json.dumps(list(sort_key), ensure_ascii=False).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii')
+
+
+def decode_cursor(cursor, sort):
+    """ValueError jika cursor rusak atau dibuat untuk field sort lain."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode('ascii'))
+        key = tuple(json.loads(raw))
+    except Exception as e:
+        raise ValueError(f"cursor tidak valid: {e}") from None
+    expected = (str,) if sort == "name" else ((int, float), str)
+    if len(key) != len(expected) or not all(isinstance(k, t) for k, t in zip(key, expected)):
+        raise ValueError("cursor tidak cocok dengan parameter sort")
+    return key
+
+
+class OutputCatalog:
+    def __init__(self, folder, poll_interval=2.0, suffix=".json"):
+        self.folder = folder
+        self.poll_interval = poll_interval
+        self.suffix = suffix
+        self._entries = {}
+        self._sorted = {}
+        self._dir_mtime_ns = None
+        self._lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+
+    @staticmethod
+    def _created(st):
+        # st_birthtime tidak tersedia di Linux; bot tidak pernah mengubah file
+        # setelah ditulis, jadi mtime adalah waktu pembuatan.
+        return getattr(st, "st_birthtime", st.st_mtime)
+
+    def refresh(self, force=False):
+        """
+        Menyinkronkan katalog dengan isi direktori. Tidak melakukan apa pun
+        jika mtime direktori belum berubah, kecuali force=True.
+        """
+        try:
+            dir_mtime_ns = os.stat(self.folder).st_mtime_ns
+        except FileNotFoundError:
+            dir_mtime_ns = None
+        if not force and dir_mtime_ns == self._dir_mtime_ns:
+            return self._restat_young()
+
+        current = self._entries
+        entries = {}
+        if dir_mtime_ns is not None:
+            with os.scandir(self.folder) as it:
+                for dir_entry in it:
+                    name = dir_entry.name
+                    if not name.endswith(self.suffix):
+                        continue
+                    inode = dir_entry.inode()
+                    known = current.get(name)
+                    if known is not None and known.inode == inode and not force:
+                        entries[name] = known
+                        continue
+                    try:
+                        st = dir_entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    entries[name] = CatalogEntry(name, inode, self._created(st), st.st_size)
+
+        with self._lock:
+            self._entries = entries
+            self._sorted = {}
+            self._dir_mtime_ns = dir_mtime_ns
+        return True
+
+    def _restat_young(self):
+        """Memperbarui ukuran file yang baru dibuat dan mungkin masih ditulis."""
+        threshold = time.time() - SETTLE_SECONDS
+        changed = False
+        for entry in [e for e in self._entries.values() if e.created >= threshold]:
+            try:
+                st = os.stat(os.path.join(self.folder, entry.name))
+            except FileNotFoundError:
+                continue
+            if st.st_size != entry.size:
+                entry.size = st.st_size
+                changed = True
+        if changed:
+            with self._lock:
+                self._sorted.pop("size", None)
+        return changed
+
+    def _sorted_view(self, sort):
+        """(keys, entries) terurut untuk field sort; di-cache sampai katalog berubah."""
+        with self._lock:
+            view = self._sorted.get(sort)
+            if view is None:
+                ordered = sorted(self._entries.values(), key=lambda e: e.sort_key(sort))
+                view = ([e.sort_key(sort) for e in ordered], ordered)
+                self._sorted[sort] = view
+            return view
+
+    def query(self, limit, cursor=None, prefix=None, contains=None,
+              sort="name", descending=False, since=None):
+        """
+        Mengembalikan (entries, next_cursor). Cursor menyimpan kunci sort item
+        terakhir, jadi halaman berikutnya tetap konsisten walau file baru masuk.
+        """
+        if sort not in SORT_FIELDS:
+            raise ValueError(f"sort harus salah satu dari: {', '.join(SORT_FIELDS)}")
+        keys, ordered = self._sorted_view(sort)
+
+        if descending:
+            stop = len(keys) if cursor is None else bisect.bisect_left(keys, decode_cursor(cursor, sort))
+            indices = range(stop - 1, -1, -1)
+        else:
+            start = 0 if cursor is None else bisect.bisect_right(keys, decode_cursor(cursor, sort))
+            if since is not None and sort == "created":
+                start = max(start, bisect.bisect_right(keys, (since, "\U0010ffff")))
+            indices = range(start, len(keys))
+
+        page = []
+        for i in indices:
+            entry = ordered[i]
+            if since is not None and entry.created <= since:
+                if sort == "created" and descending:
+                    break
+                continue
+            if prefix and not entry.name.startswith(prefix):
+                continue
+            if contains and contains not in entry.name:
+                continue
+            if len(page) == limit:
+                return page, encode_cursor(page[-1].sort_key(sort))
+            page.append(entry)
+        return page, None
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _watch(self):
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.error(f"Gagal memperbarui katalog output: {e}", exc_info=True)
+
+    def ensure_started(self):
+        """Membangun katalog (sekali) dan menjalankan thread watcher jika belum jalan."""
+        with self._start_lock:
+            # Setelah fork (mis. worker server produksi) thread lama tidak ikut,
+            # jadi cek is_alive() dan bukan sekadar keberadaan objek thread.
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self.refresh(force=True)
+            logger.info(f"Katalog output dibangun: {len(self)} file di {self.folder}")
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._watch, name="output-catalog", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
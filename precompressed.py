@@ -0,0 +1,123 @@
+"""
+Varian terkompresi file output untuk /api/download.
+
+Untuk setiap file output disimpan
+
+    output/.compressed/<nama_file>.gz     (gzip, selalu)
+    output/.compressed/<nama_file>.br     (brotli, jika paket brotli terpasang)
+    output/.compressed/<nama_file>.zst    (zstd, jika paket zstandard terpasang)
+
+mtime varian disamakan dengan mtime file sumber (seperti view di
+statement_views); varian yang mtime-nya berbeda dianggap basi dan tidak
+dilayani. Varian yang tidak lebih kecil dari sumbernya tidak disimpan.
+Varian dibuat bot saat menulis file output, atau sekaligus untuk semua file:
+
+    python precompressed.py [folder_output]
+"""
+import logging
+import os
+import sys
+import tempfile
+
+import response_compression
+
+logger = logging.getLogger(__name__)
+
+COMPRESSED_DIRNAME = ".compressed"
+# File yang lebih kecil dari ini tidak dikompresi (header Content-Encoding
+# dan dekompresi di klien lebih mahal daripada byte yang dihemat).
+PRECOMPRESS_MIN_BYTES = int(os.getenv("PRECOMPRESS_MIN_BYTES", 1024))
+BLOCK_SIZE = 64 * 1024
+
+
+def variant_path(folder, filename, suffix):
+    return os.path.join(folder, COMPRESSED_DIRNAME, filename + suffix)
+
+
+def write_variants(folder, filename):
+    """Membuat (ulang) semua varian terkompresi satu file output secara atomik."""
+    source_path = os.path.join(folder, filename)
+    st = os.stat(source_path)
+    directory = os.path.join(folder, COMPRESSED_DIRNAME)
+    os.makedirs(directory, exist_ok=True)
+    for encoding in response_compression.ENCODINGS:
+        path = variant_path(folder, filename, response_compression.SUFFIXES[encoding])
+        if st.st_size < PRECOMPRESS_MIN_BYTES:
+            _remove(path)
+            continue
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as dst, open(source_path, "rb") as src:
+                for chunk in response_compression.compress_chunks(iter(lambda: src.read(BLOCK_SIZE), b""), encoding):
+                    dst.write(chunk)
+            if os.path.getsize(tmp_path) >= st.st_size:
+                _remove(path)
+                continue
+            os.utime(tmp_path, ns=(st.st_mtime_ns, st.st_mtime_ns))
+            os.replace(tmp_path, path)
+        finally:
+            _remove(tmp_path)
+
+
+def remove_variants(folder, filename):
+    """Menghapus semua varian terkompresi satu file output."""
+    for suffix in response_compression.SUFFIXES.values():
+        _remove(variant_path(folder, filename, suffix))
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def find_variant(folder, filename, accept_encodings, source_mtime_ns):
+    """
+    Memilih varian segar dengan q-value tertinggi di Accept-Encoding klien
+    (seri: preferensi server di response_compression) hanya dengan os.stat,
+    tanpa membuka file, dan mengembalikan (path, content-coding), atau None
+    jika tidak ada.
+    """
+    for encoding in response_compression.preferred(accept_encodings):
+        path = variant_path(folder, filename, response_compression.SUFFIXES[encoding])
+        try:
+            if os.stat(path).st_mtime_ns != source_mtime_ns:
+                continue
+        except FileNotFoundError:
+            continue
+        return path, encoding
+    return None
+
+
+def rebuild_all(folder):
+    """
+    Membuat varian untuk semua file output dan menghapus varian milik file yang
+    sudah tidak ada. Mengembalikan jumlah file yang diproses.
+    """
+    names = sorted(name for name in os.listdir(folder) if name.endswith(".json"))
+    count = 0
+    for name in names:
+        try:
+            write_variants(folder, name)
+            count += 1
+        except OSError as e:
+            logger.warning(f"Gagal mengompresi {name}: {e}")
+
+    directory = os.path.join(folder, COMPRESSED_DIRNAME)
+    existing = set(names)
+    suffixes = tuple(response_compression.SUFFIXES[encoding] for encoding in response_compression.ENCODINGS)
+    for variant in os.listdir(directory) if os.path.isdir(directory) else ():
+        if variant.startswith("."):
+            # File sementara milik penulis lain yang sedang berjalan.
+            continue
+        source, ext = os.path.splitext(variant)
+        if ext not in suffixes or source not in existing:
+            _remove(os.path.join(directory, variant))
+    return count
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    target = sys.argv[1] if len(sys.argv) > 1 else "output"
+    print(f"{rebuild_all(target)} file dikompresi di {os.path.join(target, COMPRESSED_DIRNAME)}")
@@ -0,0 +1,86 @@
+"""
+Cache in-process untuk body respons laporan balance-sheet yang sudah jadi.
+
+Entri disimpan per (filename, jenis laporan, content-coding) bersama stempel (mtime_ns, size)
+file sumber. Jika bot menulis ulang file di 'output/', stempel berubah dan
+entri lama otomatis dibuang saat diakses. Eviksi memakai LRU dengan batas
+total byte yang bisa dikonfigurasi.
+"""
+import threading
+from collections import OrderedDict
+
+# Perkiraan overhead per entri (tuple kunci, objek bytes, node OrderedDict).
+ENTRY_OVERHEAD = 256
+
+
+class ReportCache:
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _entry_size(body):
+        return len(body) + ENTRY_OVERHEAD
+
+    def get(self, filename, statement_type, mtime_ns, size, encoding=None):
+        """
+        Mengembalikan (body, status) jika masih valid untuk stempel file, selain
+        itu None. encoding: content-coding body (None = tidak dikompresi).
+        """
+        key = (filename, statement_type, encoding)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry[0] != mtime_ns or entry[1] != size:
+                # File sumber sudah ditulis ulang sejak entri ini dibuat.
+                del self._entries[key]
+                self._bytes -= self._entry_size(entry[2])
+                self.invalidations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[2], entry[3]
+
+    def put(self, filename, statement_type, mtime_ns, size, body, status, encoding=None):
+        entry_size = self._entry_size(body)
+        if entry_size > self.max_bytes:
+            return
+        key = (filename, statement_type, encoding)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= self._entry_size(old[2])
+            self._entries[key] = (mtime_ns, size, body, status)
+            self._bytes += entry_size
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= self._entry_size(evicted[2])
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+                "invalidations": self.invalidations,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+            }
@@ -0,0 +1,100 @@
+"""
+Kompresi respons HTTP (Content-Encoding) yang dinegosiasikan lewat
+Accept-Encoding.
+
+Codec: gzip (selalu), br (jika paket brotli terpasang), dan zstd (jika paket
+zstandard terpasang). Urutan preferensi server saat q-value klien seri diatur
+dengan COMPRESS_ENCODINGS (default "br,zstd,gzip"); codec yang paketnya tidak
+terpasang dilewati. Body lebih kecil dari COMPRESS_MIN_BYTES tidak dikompresi.
+"""
+import os
+import zlib
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+COMPRESS_MIN_BYTES = int(os.getenv("COMPRESS_MIN_BYTES", 1024))
+GZIP_LEVEL = int(os.getenv("COMPRESS_GZIP_LEVEL", 6))
+BROTLI_QUALITY = int(os.getenv("COMPRESS_BROTLI_QUALITY", 5))
+ZSTD_LEVEL = int(os.getenv("COMPRESS_ZSTD_LEVEL", 6))
+
+# Akhiran file untuk body terkompresi yang disimpan di disk.
+SUFFIXES = {"gzip": ".gz", "br": ".br", "zstd": ".zst"}
+
+_AVAILABLE = {"gzip": True, "br": brotli is not None, "zstd": zstandard is not None}
+ENCODINGS = tuple(
+    encoding
+    for encoding in (e.strip() for e in os.getenv("COMPRESS_ENCODINGS", "br,zstd,gzip").split(","))
+    if _AVAILABLE.get(encoding)
+)
+
+
+class _BrotliCompressor:
+    """Antarmuka compress()/flush() seperti zlib untuk brotli.Compressor."""
+
+    def __init__(self):
+        self._compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+
+    def compress(self, data):
+        return self._compressor.process(data)
+
+    def flush(self):
+        return self._compressor.finish()
+
+
+def compressor(encoding):
+    """Objek kompresi streaming (compress(bytes) -> bytes, flush() -> bytes)."""
+    if encoding == "gzip":
+        # wbits=31: format gzip (header + trailer CRC), bukan zlib mentah.
+        return zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+    if encoding == "br":
+        return _BrotliCompressor()
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+    raise ValueError(f"content-coding tidak didukung: {encoding}")
+
+
+def preferred(accept_encodings, encodings=ENCODINGS):
+    """
+    Codec yang diterima klien (q > 0), urut q-value tertinggi lalu urutan
+    preferensi server. accept_encodings adalah request.accept_encodings.
+    """
+    ranked = sorted(
+        ((accept_encodings.quality(encoding), -rank, encoding) for rank, encoding in enumerate(encodings)),
+        reverse=True,
+    )
+    return [encoding for quality, _, encoding in ranked if quality > 0]
+
+
+def negotiate(accept_encodings):
+    """Codec terbaik untuk klien, atau None jika tidak ada yang diterima."""
+    encodings = preferred(accept_encodings)
+    return encodings[0] if encodings else None
+
+
+def compress(data, encoding):
+    c = compressor(encoding)
+    return c.compress(data) + c.flush()
+
+
+def compress_chunks(chunks, encoding):
+    """Mengompresi iterator bytes secara streaming; chunk keluaran kosong dilewati."""
+    c = compressor(encoding)
+    try:
+        for chunk in chunks:
+            out = c.compress(chunk)
+            if out:
+                yield out
+        yield c.flush()
+    finally:
+        # Klien terputus: generator sumber (mis. tee ke view) ikut ditutup.
+        close = getattr(chunks, "close", None)
+        if close is not None:
+            close()
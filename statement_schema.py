@@ -0,0 +1,316 @@
+"""
+Registry skema laporan keuangan (laba-rugi dan laporan keuangan) untuk endpoint
+balance-sheet, beserta mesin normalisasi yang mem-pivot baris tabel hasil
+ekstraksi menjadi record per tahun.
+
+Skema dikompilasi sekali saat modul di-import, dan pivot dilakukan dalam satu
+kali lintasan atas baris sehingga biayanya O(baris), bukan O(tahun x baris).
+"""
+import hashlib
+import json
+
+from label_index import LabelIndex
+from numeric_parser import format_amount, parse_column
+
+# Naikkan jika logika pivot/pembersihan nilai berubah sehingga output lama
+# (ETag, view yang dimaterialisasi) harus dianggap basi.
+ENGINE_VERSION = 7
+
+
+def is_year_key(key):
+    """Kolom tahun dikenali sebagai string 4 digit angka, misalnya '2023'."""
+    return len(key) == 4 and key.isdigit()
+
+
+class StatementSchema:
+    """
+    Skema satu jenis laporan: peta 'Akun' -> kunci output dan urutan kunci
+    output. Kunci 'year' di dalam urutan diisi dengan tahun (int). Label
+    'Akun' dicocokkan lewat LabelIndex (persis, ternormalisasi, lalu fuzzy).
+    """
+
+    __slots__ = ("statement_type", "account_map", "key_order", "labels", "version")
+
+    def __init__(self, statement_type, account_map, key_order):
+        self.statement_type = statement_type
+        self.account_map = dict(account_map)
+        self.key_order = tuple(key_order)
+        self.labels = LabelIndex(self.account_map)
+        # Versi skema berubah otomatis jika peta/urutan kunci atau ambang/margin fuzzy diubah.
+        fingerprint = json.dumps(
+            [ENGINE_VERSION, self.account_map, self.key_order, self.labels.min_confidence, self.labels.min_margin],
+            ensure_ascii=False
+        )
+        self.version = hashlib.sha1(fingerprint.encode('utf-8')).hexdigest()[:12]
+
+    def pivot(self, rows):
+        """
+        Mem-pivot baris tabel menjadi list record per tahun (urut ascending).
+
+        Tahun dikumpulkan dari semua baris, baris dengan kunci output yang sama
+        menimpa nilai sebelumnya kecuali labelnya kurang cocok (confidence lebih
+        rendah: persis > ternormalisasi > fuzzy), dan kunci yang tidak ditemukan diisi
+        {"value": None, "conUidence": None}. "conUidence" berisi confidence
+        pencocokan label (1.0 untuk label persis, 0.99 untuk label ternormalisasi).
+        "value" berupa string desimal eksak (numeric_parser.format_amount).
+        """
+        return list(self.iter_records(rows))
+
+    def iter_records(self, rows):
+        """
+        Seperti pivot(), tetapi record per tahun dibuat satu per satu saat
+        diiterasi (baris tetap dikumpulkan seluruhnya pada iterasi pertama).
+        rows boleh berupa iterator.
+        """
+        values_by_year = self._collect(rows)
+        for year in sorted(values_by_year):
+            year_values = values_by_year.pop(year)
+            entry = {}
+            for key in self.key_order:
+                if key == "year":
+                    entry['year'] = int(year)
+                elif key in year_values:
+                    value, confidence = year_values[key]
+                    entry[key] = {
+                        "value": format_amount(value),
+                        "conUidence": confidence
+                    }
+                else:
+                    entry[key] = {"value": None, "conUidence": None}
+            yield entry
+
+    def line_items(self, rows):
+        """
+        Menghasilkan (tahun, kunci output, nilai int/Decimal) untuk setiap akun
+        yang terpetakan dan bernilai, dengan semantik timpa yang sama seperti pivot().
+        """
+        for year, year_values in sorted(self._collect(rows).items()):
+            for key, (value, _) in year_values.items():
+                if value is not None:
+                    yield int(year), key, value
+
+    def _collect(self, rows):
+        """
+        Satu lintasan atas baris:
+        {tahun: {kunci output: (nilai int/Decimal/None, confidence)}}.
+        Nilai semua tahun di-parse sekaligus dengan satu panggilan parse_column().
+        """
+        resolve = self.labels.resolve
+        values_by_year = {}
+        other_keys = set()
+
+        for item in rows:
+            output_key, confidence = resolve(item.get('Akun'))
+            for key, value in item.items():
+                year_values = values_by_year.get(key)
+                if year_values is None:
+                    if key in other_keys:
+                        continue
+                    if not is_year_key(key):
+                        other_keys.add(key)
+                        continue
+                    year_values = values_by_year[key] = {}
+                if output_key is None:
+                    continue
+                if confidence != 1.0:
+                    # Label ternormalisasi/fuzzy tidak menimpa nilai dari label
+                    # yang lebih cocok; label persis (1.0) selalu menimpa.
+                    previous = year_values.get(output_key)
+                    if previous is not None and previous[1] > confidence:
+                        continue
+                year_values[output_key] = (value, confidence)
+
+        raw_values = [pair[0] for year_values in values_by_year.values() for pair in year_values.values()]
+        parsed = iter(parse_column(raw_values))
+        return {
+            year: {key: (next(parsed), pair[1]) for key, pair in year_values.items()}
+            for year, year_values in values_by_year.items()
+        }
+
+
+_LABA_RUGI_SYARIAH_MAP = {
+    "Pendapatan bunga": "interest_income",
+    "Jumlah partisipasi anggota": "member_participation",
+    "PARTISIPASI ANGGOTA": "member_participation_category",
+    "BEBAN USAHA": "operating_expenses_category",
+    "Beban penyisihan": "allowance_expense",
+    "Beban kepegawaian": "personnel_expense",
+    "Beban administrasi dan umum": "administrative_general_expenses",
+    "Beban penyusutan dan amortisasi": "depreciation_amortization_expenses",
+    "Jumlah beban usaha": "business_expense",
+    "SISA HASIL USAHA BRUTO": "remaining_profit_bruto",
+    "Hasil investasi": "investment_result",
+    "Beban perkoperasian": "cooperative_expense",
+    "PENDAPATAN & BEBAN LAIN": "other_income_expense_category",
+    "Pendapatan lain": "other_income",
+    "Beban lain": "other_expense",
+    "Sisa hasil usaha sebelum pajak": "remaining_profit_before_tax",
+    "Beban pajak penghasilan": "income_tax_expense",
+    "SISA HASIL USAHA": "remaining_profit",
+    "Penghasilan komprehensif lain": "other_comprehensive_income",
+    "PENGHASILAN KOMPREHENSIF": "comprehensive_income",
+}
+
+# Catatan: urutan syariah laba-rugi memang tidak memuat 'year'.
+_LABA_RUGI_SYARIAH_ORDER = [
+    "interest_income",
+    "other_business_income",
+    "member_participation",
+    "member_participation_category",
+    "operating_expenses_category",
+    "interest_expense",
+    "allowance_expense",
+    "personnel_expense",
+    "administrative_general_expenses",
+    "depreciation_amortization_expenses",
+    "other_business_expense",
+    "business_expense",
+    "investment_result",
+    "cooperative_expense",
+    "other_income",
+    "other_expense",
+    "remaining_profit_before_tax",
+    "income_tax_expense",
+    "remaining_profit",
+    "other_comprehensive_income",
+    "comprehensive_income"
+]
+
+_LABA_RUGI_KONVENSIONAL_MAP = {
+    "PARTISIPASI ANGGOTA": "member_participation_category",
+    "Pendapatan bunga": "interest_income",
+    "Jumlah partisipasi anggota": "member_participation",
+    "BEBAN USAHA": "operating_expenses_category",
+    "Beban bunga": "interest_expense",
+    "Beban penyisihan": "allowance_expense",
+    "Beban kepegawaian": "personnel_expense",
+    "Beban administrasi dan umum": "administrative_general_expenses",
+    "Beban penyusutan dan amortisasi": "depreciation_amortization_expenses",
+    "Beban usaha lainnya": "other_business_expense",
+    "Jumlah beban usaha": "business_expense",
+    "SISA HASIL USAHA BRUTO": "remaining_profit_bruto",
+    "Hasil investasi": "investment_result",
+    "Beban perkoperasian": "cooperative_expense",
+    "PENDAPATAN & BEBAN LAIN": "other_income_expense_category",
+    "Pendapatan lain": "other_income",
+    "Beban lain": "other_expense",
+    "Sisa hasil usaha sebelum pajak": "remaining_profit_before_tax",
+    "Beban pajak penghasilan": "income_tax_expense",
+    "SISA HASIL USAHA": "remaining_profit",
+    "Penghasilan komprehensif lain": "other_comprehensive_income",
+    "PENGHASILAN KOMPREHENSIF": "comprehensive_income",
+}
+
+_LABA_RUGI_KONVENSIONAL_ORDER = [
+    "year",
+    "member_participation",
+    "interest_income",
+    "interest_expense",
+    "allowance_expense",
+    "personnel_expense",
+    "administrative_general_expenses",
+    "depreciation_amortization_expenses",
+    "other_business_expense",
+    "business_expense",
+    "remaining_profit_bruto",
+    "investment_result",
+    "cooperative_expense",
+    "other_income_expense_category",
+    "other_income",
+    "other_expense",
+    "remaining_profit_before_tax",
+    "income_tax_expense",
+    "remaining_profit",
+    "other_comprehensive_income",
+    "comprehensive_income"
+]
+
+# Syariah dan konvensional memakai peta laporan keuangan yang sama.
+_LAPORAN_KEUANGAN_MAP = {
+    "Kas dan setara kas": "cash_and_cash_equivalents",
+    "Piutang bunga": "interest_receivable",
+    "Pinjaman anggota": "member_loans",
+    "Penyisihan pinjaman": "loan_loss_provision",
+    "Pinjaman koperasi lain": "loans_to_other_cooperatives",
+    "Aset tetap": "fixed_assets",
+    "Akumulasi penyusutan": "accumulated_depreciation",
+    "Aset takberwujud": "intangible_assets",
+    "Akumulasi amortisasi": "accumulated_amortization",
+    "Aset lain": "other_assets",
+    "Total aset": "total_assets",
+    "Utang bunga": "interest_payable",
+    "Simpanan anggota": "member_deposits",
+    "Simpanan koperasi lain": "other_cooperative_deposits",
+    "Utang pinjaman": "loan_payable",
+    "Liabilitas imbalan kerja": "employee_benefit_liabilities",
+    "Liabilitas lain": "other_liabilities",
+    "Total liabilitas": "total_liabilities",
+    "Simpanan Pokok": "principal_savings",
+    "Simpanan Wajib": "mandatory_savings",
+    "Cadangan umum": "general_reserve",
+    "Sisa hasil usaha": "retained_earnings",
+    "Ekuitas lain": "other_equity",
+    "Total ekuitas": "total_equity",
+    "Total liabilitas dan ekuitas": "total_liabilities_and_equity",
+}
+
+_LAPORAN_KEUANGAN_ORDER = [
+    "year",
+    "cash_and_cash_equivalents",
+    "interest_receivable",
+    "member_loans",
+    "loan_loss_provision",
+    "loans_to_other_cooperatives",
+    "fixed_assets",
+    "accumulated_depreciation",
+    "intangible_assets",
+    "accumulated_amortization",
+    "other_assets",
+    "total_assets",
+    "interest_payable",
+    "member_deposits",
+    "other_cooperative_deposits",
+    "loan_payable",
+    "employee_benefit_liabilities",
+    "other_liabilities",
+    "total_liabilities",
+    "principal_savings",
+    "mandatory_savings",
+    "general_reserve",
+    "retained_earnings",
+    "other_equity",
+    "total_equity",
+    "total_liabilities_and_equity"
+]
+
+# Kunci registry mengikuti segmen URL endpoint /balance-sheet/ep/<jenis>/<laporan>.
+SCHEMAS = {
+    schema.statement_type: schema
+    for schema in (
+        StatementSchema("syariah/laba-rugi", _LABA_RUGI_SYARIAH_MAP, _LABA_RUGI_SYARIAH_ORDER),
+        StatementSchema("konvesional/laba-rugi", _LABA_RUGI_KONVENSIONAL_MAP, _LABA_RUGI_KONVENSIONAL_ORDER),
+        StatementSchema("syariah/laporan-keuangan", _LAPORAN_KEUANGAN_MAP, _LAPORAN_KEUANGAN_ORDER),
+        StatementSchema("konvesional/laporan-keuangan", _LAPORAN_KEUANGAN_MAP, _LAPORAN_KEUANGAN_ORDER),
+    )
+}
+
+
+def get_schema(statement_type):
+    """Mengambil skema terkompilasi; KeyError jika jenis laporan tidak dikenal."""
+    return SCHEMAS[statement_type]
+
+
+# Kunci status/reason payload; "read" selalu menjadi kunci terakhir.
+SUCCESS_HEADER = {"status": "SUCCESS", "reason": "File Successfully Read"}
+FAILED_HEADER = {"status": "FAILED", "reason": "No year data found in the file."}
+
+
+def build_statement_payload(rows, statement_type):
+    """
+    Membangun payload respons endpoint balance-sheet.
+    Mengembalikan (payload, http_status).
+    """
+    records = get_schema(statement_type).pivot(rows)
+    if not records:
+        return dict(FAILED_HEADER, read=[]), 404
+    return dict(SUCCESS_HEADER, read=records), 200
@@ -0,0 +1,218 @@
+"""
+View laporan (laba-rugi / laporan keuangan) yang dimaterialisasi saat file
+output ditulis.
+
+Untuk setiap file output dan setiap jenis laporan, body respons endpoint
+balance-sheet dihitung sekali dan disimpan sebagai bytes di
+
+    output/.views/<jenis_laporan>/<versi_skema>/<nama_file>        (status 200)
+    output/.views/<jenis_laporan>/<versi_skema>/<nama_file>.404    (tidak ada data tahun)
+
+ditambah varian terkompresi dengan akhiran content-coding (.gz/.br/.zst, lihat
+response_compression) yang ditulis main.py saat body terkompresi pertama kali
+dibutuhkan.
+
+Versi skema ada di path, sehingga view otomatis dianggap tidak ada jika peta
+akun berubah. mtime view disamakan dengan mtime file sumber; view yang
+mtime-nya berbeda dianggap basi. View yang hilang/basi dibangun ulang saat
+dibaca, atau sekaligus untuk semua file lewat:
+
+    python statement_views.py [folder_output]
+"""
+import json
+import logging
+import os
+import shutil
+import sys
+import tempfile
+
+from numeric_parser import json_default
+from response_compression import SUFFIXES
+from statement_schema import SCHEMAS, SUCCESS_HEADER, build_statement_payload, get_schema
+
+logger = logging.getLogger(__name__)
+
+VIEWS_DIRNAME = ".views"
+STATEMENT_TYPES = tuple(SCHEMAS)
+
+
+def _type_dir(folder, statement_type):
+    return os.path.join(folder, VIEWS_DIRNAME, statement_type.replace("/", "__"))
+
+
+def view_path(folder, filename, statement_type, status=200, encoding=None):
+    path = os.path.join(_type_dir(folder, statement_type), get_schema(statement_type).version, filename)
+    if status != 200:
+        path = f"{path}.{status}"
+    return path if encoding is None else path + SUFFIXES[encoding]
+
+
+def iter_view_chunks(rows, statement_type):
+    """
+    Versi streaming render_view(): mengembalikan (status, iterator bytes).
+    Baris (boleh iterator) dikumpulkan sebelum fungsi kembali, sehingga error
+    pada data sumber terjadi sebelum byte pertama dikirim; setelah itu header
+    status/reason dan setiap record tahun di-encode satu per satu. Hasil
+    gabungannya identik byte demi byte dengan
+    json.dumps(payload, default=json_default).
+    """
+    records = get_schema(statement_type).iter_records(rows)
+    first = next(records, None)
+    if first is None:
+        payload, status = build_statement_payload((), statement_type)
+        return status, iter((json.dumps(payload, sort_keys=False).encode('utf-8'),))
+    return 200, _chunks(first, records)
+
+
+def _chunks(first, records):
+    # '{"status": ..., "reason": ..., "read": [' lalu record dipisah ', ' seperti json.dumps.
+    head = json.dumps(dict(SUCCESS_HEADER, read=[]), sort_keys=False)[:-2]
+    yield head.encode('utf-8') + json.dumps(first, default=json_default).encode('utf-8')
+    for record in records:
+        yield b', ' + json.dumps(record, default=json_default).encode('utf-8')
+    yield b']}'
+
+
+def render_view(rows, statement_type):
+    """Body respons (bytes) dan status HTTP untuk baris tabel dan jenis laporan."""
+    status, chunks = iter_view_chunks(rows, statement_type)
+    return b''.join(chunks), status
+
+
+def open_view(folder, filename, statement_type, source_mtime_ns, encoding=None):
+    """
+    Membuka view (body terkompresi jika encoding diberikan) yang masih segar
+    dan mengembalikan (file biner, status), atau None. Pemanggil wajib menutup file.
+    """
+    for status in (200, 404):
+        path = view_path(folder, filename, statement_type, status, encoding)
+        try:
+            f = open(path, 'rb')
+        except FileNotFoundError:
+            continue
+        if os.fstat(f.fileno()).st_mtime_ns != source_mtime_ns:
+            f.close()
+            return None
+        return f, status
+    return None
+
+
+def read_view(folder, filename, statement_type, source_mtime_ns):
+    """Mengembalikan (body, status) view yang masih segar, atau None."""
+    view = open_view(folder, filename, statement_type, source_mtime_ns)
+    if view is None:
+        return None
+    f, status = view
+    with f:
+        return f.read(), status
+
+
+def tee_to_view(folder, filename, statement_type, source_mtime_ns, status, chunks, encoding=None):
+    """
+    Generator yang meneruskan chunks body sambil menulisnya ke file sementara;
+    view baru dipasang (atomik) setelah seluruh chunk lewat. File sementara
+    baru dibuat saat chunk pertama diminta dan dihapus jika generator ditutup
+    lebih awal, sehingga body yang tidak pernah dibaca sampai habis (HEAD,
+    klien putus) tidak meninggalkan file. Error membuat atau menulis file
+    hanya membatalkan penyimpanan view.
+    """
+    path = view_path(folder, filename, statement_type, status, encoding)
+    f = tmp_path = None
+    try:
+        try:
+            directory = os.path.dirname(path)
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".", suffix=".tmp")
+            f = os.fdopen(fd, 'wb')
+        except OSError as e:
+            logger.warning(f"Gagal menyimpan view {statement_type} untuk {filename}: {e}")
+        for chunk in chunks:
+            if f is not None:
+                try:
+                    f.write(chunk)
+                except OSError as e:
+                    logger.warning(f"Gagal menulis view {statement_type} untuk {filename}: {e}")
+                    f.close()
+                    f = None
+            yield chunk
+        if f is not None:
+            f.close()
+            f = None
+            os.utime(tmp_path, ns=(source_mtime_ns, source_mtime_ns))
+            os.replace(tmp_path, path)
+            other = view_path(folder, filename, statement_type, 404 if status == 200 else 200, encoding)
+            if os.path.exists(other):
+                os.remove(other)
+    finally:
+        if f is not None:
+            f.close()
+        if tmp_path is not None and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def write_view(folder, filename, statement_type, source_mtime_ns, body, status, encoding=None):
+    """Menulis view secara atomik dan menghapus varian status lainnya."""
+    for _ in tee_to_view(folder, filename, statement_type, source_mtime_ns, status, (body,), encoding):
+        pass
+
+
+def materialize(folder, filename, rows=None, statement_types=STATEMENT_TYPES):
+    """
+    Membangun view semua jenis laporan untuk satu file output. Jika rows None,
+    file sumber dibaca dari disk.
+    """
+    source_path = os.path.join(folder, filename)
+    source_mtime_ns = os.stat(source_path).st_mtime_ns
+    if rows is None:
+        with open(source_path, 'r', encoding='utf-8') as f:
+            rows = json.load(f)
+    for statement_type in statement_types:
+        body, status = render_view(rows, statement_type)
+        write_view(folder, filename, statement_type, source_mtime_ns, body, status)
+
+
+def rebuild_all(folder):
+    """
+    Membangun ulang view untuk semua file output dan menghapus direktori versi
+    skema lama serta view milik file yang sudah tidak ada. Mengembalikan
+    jumlah file yang diproses.
+    """
+    names = sorted(name for name in os.listdir(folder) if name.endswith('.json'))
+    count = 0
+    for name in names:
+        try:
+            materialize(folder, name)
+            count += 1
+        except (OSError, ValueError) as e:
+            logger.warning(f"Gagal membangun view untuk {name}: {e}")
+
+    existing = set(names)
+    for statement_type in STATEMENT_TYPES:
+        type_dir = _type_dir(folder, statement_type)
+        current = get_schema(statement_type).version
+        for version in os.listdir(type_dir) if os.path.isdir(type_dir) else ():
+            version_dir = os.path.join(type_dir, version)
+            if version != current:
+                shutil.rmtree(version_dir, ignore_errors=True)
+                continue
+            for view_name in os.listdir(version_dir):
+                if view_name.startswith('.'):
+                    continue
+                source = _source_name(view_name)
+                if source not in existing:
+                    os.remove(os.path.join(version_dir, view_name))
+    return count
+
+
+def _source_name(view_name):
+    """Nama file sumber dari nama view ('a.json.404.gz' -> 'a.json')."""
+    stem, ext = os.path.splitext(view_name)
+    if ext in SUFFIXES.values():
+        view_name = stem
+    return view_name[:-4] if view_name.endswith('.404') else view_name
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    target = sys.argv[1] if len(sys.argv) > 1 else 'output'
+    print(f"{rebuild_all(target)} file dimaterialisasi di {os.path.join(target, VIEWS_DIRNAME)}")
@@ -0,0 +1,176 @@
+"""
+Ekstraksi tabel dari PDF dan DOCX menjadi JSON array of objects.
+
+Modul ini sengaja tidak bergantung pada telegram/gemini supaya murah di-import
+oleh proses worker di extraction_pool.
+
+Sumber dokumen berupa path file, atau bytes untuk upload yang diunduh bot
+langsung ke memori (lihat INTAKE_MEMORY_MAX_BYTES di bot.py).
+"""
+import io
+import logging
+
+import docx
+import pdfplumber
+from pdfminer.pdftypes import resolve1
+
+logger = logging.getLogger(__name__)
+
+# Naikkan jika hasil ekstraksi berubah, supaya cache hasil lama tidak dipakai.
+EXTRACTOR_VERSION = 2
+
+
+def open_source(source):
+    """Path apa adanya; bytes dibungkus BytesIO untuk pdfplumber/python-docx."""
+    if isinstance(source, (bytes, bytearray)):
+        return io.BytesIO(source)
+    return source
+
+
+def describe_source(source):
+    """Keterangan sumber untuk log (bytes tidak dicetak isinya)."""
+    if isinstance(source, (bytes, bytearray)):
+        return f"<{len(source)} byte di memori>"
+    return source
+
+
+def pdf_page_count(pdf_path):
+    """Jumlah halaman PDF tanpa mem-parse isi halaman."""
+    with pdfplumber.open(open_source(pdf_path)) as pdf:
+        count = resolve1(pdf.doc.catalog.get("Pages"))
+        if isinstance(count, dict) and isinstance(count.get("Count"), int):
+            return count["Count"]
+        return len(pdf.pages)
+
+
+def iter_pdf_tables(pdf_path, start=0, stop=None):
+    """
+    Generator (page_index, table) untuk setiap tabel pada halaman [start, stop).
+    page_index dimulai dari 0. Halaman dibuka satu per satu dan cache-nya
+    dilepas setelah diproses, sehingga memori tidak tumbuh dengan jumlah halaman.
+    """
+    pages = None if stop is None else range(start + 1, stop + 1)
+    with pdfplumber.open(open_source(pdf_path), pages=pages) as pdf:
+        for page in pdf.pages:
+            page_index = page.page_number - 1
+            if page_index < start:
+                page.close()
+                continue
+            try:
+                for table in page.extract_tables():
+                    if table:
+                        yield page_index, table
+            finally:
+                page.close()
+
+
+def extract_pdf_page_tables(pdf_path, start, stop):
+    """
+    Versi list dari iter_pdf_tables untuk satu potongan halaman, dipakai
+    sebagai job di extraction_pool (hasil generator tidak bisa di-pickle).
+    """
+    return list(iter_pdf_tables(pdf_path, start, stop))
+
+
+def _normalize_header(row):
+    return tuple(" ".join(str(cell).split()) if cell is not None else "" for cell in row)
+
+
+class TableStitcher:
+    """
+    Versi bertahap stitch_tables, untuk tabel yang datang per potongan
+    halaman (mis. hasil job extraction_pool) sesuai urutan halaman. Hanya
+    tabel yang sedang disambung yang disimpan.
+    """
+
+    def __init__(self):
+        # [halaman awal, header, baris data, halaman terakhir, header ternormalisasi]
+        self._current = None
+
+    def feed(self, tables):
+        """Menambahkan tabel (page_index, rows); menghasilkan tabel yang sudah pasti selesai."""
+        for page_index, table in tables:
+            header_key = _normalize_header(table[0])
+            current = self._current
+            if (current is not None and page_index > current[3]
+                    and header_key == current[4]):
+                current[2].extend(table[1:])
+                current[3] = page_index
+                continue
+            if current is not None:
+                yield current[0], current[1], current[2]
+            self._current = [page_index, table[0], list(table[1:]), page_index, header_key]
+
+    def close(self):
+        """Menghasilkan tabel terakhir yang masih terbuka."""
+        current, self._current = self._current, None
+        if current is not None:
+            yield current[0], current[1], current[2]
+
+
+def stitch_tables(tables):
+    """
+    Menggabungkan tabel lanjutan: tabel pada halaman berikutnya yang baris
+    pertamanya sama dengan header tabel sebelumnya dianggap kelanjutannya.
+    Menghasilkan generator (page_index, headers, data_rows); page_index adalah
+    halaman tempat tabel dimulai.
+    """
+    stitcher = TableStitcher()
+    yield from stitcher.feed(tables)
+    yield from stitcher.close()
+
+
+def iter_table_rows(stitched_tables, start=1):
+    """
+    Mengubah tabel hasil stitch_tables menjadi generator object per baris.
+    Setiap baris membawa '_page' (nomor halaman, mulai dari 1) dan '_table'
+    (urutan tabel dalam dokumen, mulai dari `start`).
+    """
+    for table_number, (page_index, headers, rows) in enumerate(stitched_tables, start=start):
+        for row in rows:
+            obj = {}
+            for i, cell in enumerate(row):
+                key = headers[i] if i < len(headers) else f"col_{i+1}"
+                obj[key] = cell if cell not in [None, ""] else None
+            obj["_page"] = page_index + 1
+            obj["_table"] = table_number
+            yield obj
+
+
+def pdf_to_json(pdf_path):
+    """
+    Ekstrak semua tabel di semua halaman PDF dan konversi ke JSON array of objects.
+    Tabel yang terpotong ke halaman berikutnya (header sama) digabungkan.
+    """
+    logger.info(f"Membuka PDF: {describe_source(pdf_path)}")
+    data = list(iter_table_rows(stitch_tables(iter_pdf_tables(pdf_path))))
+    if not data:
+        logger.warning(f"Tidak ditemukan tabel di PDF: {describe_source(pdf_path)}")
+        return []
+    logger.info(f"Berhasil mengekstrak {len(data)} baris dari PDF.")
+    return data
+
+
+def docx_to_json(docx_path):
+    """
+    Ekstrak tabel dari DOCX dan konversi ke JSON array of objects.
+    Hanya mengambil tabel pertama.
+    """
+    logger.info(f"Membuka DOCX: {describe_source(docx_path)}")
+    doc = docx.Document(open_source(docx_path))
+    if not doc.tables:
+        logger.warning(f"Tidak ditemukan tabel di DOCX: {describe_source(docx_path)}")
+        return []
+    table = doc.tables[0]
+    rows = list(table.rows)
+    headers = [cell.text.strip() for cell in rows[0].cells]
+    data = []
+    for row in rows[1:]:
+        obj = {}
+        for i, cell in enumerate(row.cells):
+            key = headers[i] if i < len(headers) else f"col_{i+1}"
+            value = cell.text.strip()
+            obj[key] = value if value else None
+        data.append(obj)
+    logger.info(f"Berhasil mengekstrak {len(data)} baris dari DOCX.")
+    return data
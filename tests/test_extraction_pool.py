@@ -0,0 +1,112 @@
+"""
+Test ExtractionPool: event loop tetap responsif selama dokumen diparse di
+worker, timeout per job, dan pemulihan setelah worker mati mendadak.
+
+Jalankan dari root repo:
+    python -m pytest -q tests
+"""
+import asyncio
+import io
+import os
+import sys
+import time
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from extraction_pool import ExtractionPool, ExtractionTimeout  # noqa: E402
+from table_extractor import docx_to_json  # noqa: E402
+
+
+def _busy(seconds):
+    """Job berat CPU (seperti parse PDF besar) yang memegang GIL di worker."""
+    deadline = time.perf_counter() + seconds
+    n = 0
+    while time.perf_counter() < deadline:
+        n += 1
+    return n
+
+
+def _crash():
+    os._exit(1)
+
+
+def _docx_bytes(rows):
+    import docx
+
+    document = docx.Document()
+    table = document.add_table(rows=rows + 1, cols=3)
+    for col, header in enumerate(("Akun", "2022", "2023")):
+        table.cell(0, col).text = header
+    for row in range(1, rows + 1):
+        table.cell(row, 0).text = f"Akun {row}"
+        table.cell(row, 1).text = f"{row}.000"
+        table.cell(row, 2).text = f"{row * 2}.000"
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+
+async def _max_tick_lag(until, interval=0.01):
+    """Keterlambatan terbesar asyncio.sleep(interval) sampai future `until` selesai."""
+    lag = 0.0
+    while not until.done():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        lag = max(lag, time.perf_counter() - start - interval)
+    return lag
+
+
+@pytest.fixture
+def pool():
+    pool = ExtractionPool(max_workers=2, timeout=30)
+    yield pool
+    pool.shutdown()
+
+
+def test_event_loop_stays_responsive_while_documents_parse(pool):
+    document = _docx_bytes(80)
+    busy_seconds = 1.0
+
+    async def main():
+        # Worker dipanaskan dulu supaya waktu spawn tidak ikut diukur.
+        await pool.run(_busy, 0.01)
+        jobs = asyncio.ensure_future(asyncio.gather(
+            pool.run(docx_to_json, document),
+            pool.run(docx_to_json, document),
+            pool.run(_busy, busy_seconds),
+            pool.run(_busy, busy_seconds),
+        ))
+        lag = await _max_tick_lag(jobs)
+        return lag, await jobs
+
+    lag, (rows, rows_again, _, _) = asyncio.run(main())
+    assert len(rows) == 80 and rows == rows_again
+    assert rows[0] == {"Akun": "Akun 1", "2022": "1.000", "2023": "2.000"}
+    # Parse berjalan di proses lain; event loop hanya menunggu hasil. Batasnya
+    # dikaitkan ke durasi job _busy (yang akan menahan loop selama itu bila
+    # jalan di proses utama), bukan angka absolut kecil: di mesin satu CPU
+    # scheduler OS sesekali menunda proses utama ~200 ms saat worker sibuk.
+    assert lag < busy_seconds / 2, f"event loop tertahan {lag * 1e3:.0f} ms"
+
+
+def test_timeout_does_not_kill_pool(pool):
+    async def main():
+        with pytest.raises(ExtractionTimeout):
+            await pool.run(_busy, 5.0, timeout=0.2)
+        return await pool.run(_busy, 0.01)
+
+    assert asyncio.run(main()) > 0
+
+
+def test_pool_recovers_after_worker_crash(pool):
+    async def main():
+        await pool.run(_busy, 0.01)
+        with pytest.raises(BrokenProcessPool):
+            await pool.run(_crash)
+        # Job berikutnya berjalan di executor baru, bukan BrokenProcessPool terus-menerus.
+        return [await pool.run(_busy, 0.01) for _ in range(3)]
+
+    assert all(n > 0 for n in asyncio.run(main()))
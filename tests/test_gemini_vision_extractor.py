@@ -0,0 +1,131 @@
+"""
+Test gemini_vision_extractor dengan model palsu lokal (set_model_factory):
+rate limiter token-bucket, retry dengan backoff, batas konkurensi, error
+yang diteruskan setelah percobaan habis, dan pemakaian dari beberapa
+asyncio.run() berturut-turut.
+
+Jalankan dari root repo:
+    python -m pytest -q tests
+"""
+import asyncio
+import io
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("GEMINI_API_KEY", "test")
+
+import PIL.Image  # noqa: E402
+from google.api_core import exceptions as google_exceptions  # noqa: E402
+
+import gemini_vision_extractor as gemini  # noqa: E402
+from gemini_vision_extractor import TokenBucket  # noqa: E402
+
+
+class _Chunk:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeModel:
+    """Model palsu: gagal `failures` kali dulu, lalu men-stream `text` per potongan."""
+
+    def __init__(self, text='[{"Akun": "Kas"}]', failures=0, delay=0.0):
+        self.text = text
+        self.failures = failures
+        self.delay = delay
+        self.calls = 0
+        self.active = 0
+        self.max_active = 0
+
+    async def generate_content_async(self, contents, stream=True):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise google_exceptions.ServiceUnavailable("model sibuk")
+        return self._stream()
+
+    async def _stream(self):
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            await asyncio.sleep(self.delay)
+            for i in range(0, len(self.text), 4):
+                yield _Chunk(self.text[i:i + 4])
+        finally:
+            self.active -= 1
+
+
+def _png():
+    buffer = io.BytesIO()
+    PIL.Image.new("RGB", (8, 8), "white").save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def model(monkeypatch):
+    model = FakeModel()
+    gemini.set_model_factory(lambda name: model)
+    monkeypatch.setattr(gemini, "_rate_limiter", TokenBucket(60000, 100))
+    monkeypatch.setattr(gemini, "GEMINI_BACKOFF_BASE", 0.001)
+    yield model
+    gemini.set_model_factory(None)
+
+
+async def _collect(source):
+    return "".join([text async for text in gemini.stream_json_output(source)])
+
+
+def test_streams_text_from_fake_model(model):
+    assert asyncio.run(_collect(_png())) == model.text
+
+
+def test_retries_until_model_recovers(model):
+    model.failures = 2
+    assert asyncio.run(_collect(_png())) == model.text
+    assert model.calls == 3
+
+
+def test_error_propagates_when_retries_run_out(model, monkeypatch):
+    monkeypatch.setattr(gemini, "GEMINI_MAX_RETRIES", 2)
+    model.failures = 10
+    with pytest.raises(google_exceptions.ServiceUnavailable):
+        asyncio.run(_collect(_png()))
+    assert model.calls == 3
+
+
+def test_concurrency_is_limited(model, monkeypatch):
+    monkeypatch.setattr(gemini, "GEMINI_MAX_CONCURRENCY", 2)
+    model.delay = 0.05
+
+    async def main():
+        return await asyncio.gather(*(_collect(_png()) for _ in range(6)))
+
+    assert asyncio.run(main()) == [model.text] * 6
+    assert model.max_active == 2
+
+
+def test_token_bucket_limits_request_rate():
+    bucket = TokenBucket(rate_per_minute=600, capacity=2)  # 10 token/detik
+
+    async def main():
+        start = time.perf_counter()
+        for _ in range(5):
+            await bucket.acquire()
+        return time.perf_counter() - start
+
+    # 2 token awal langsung, 3 sisanya menunggu masing-masing 0,1 detik.
+    assert 0.25 <= asyncio.run(main()) < 1.0
+
+
+def test_usable_from_consecutive_event_loops(model):
+    # Lock/semaphore tidak boleh terikat ke event loop pertama.
+    model.delay = 0.01
+
+    async def main():
+        return await asyncio.gather(*(_collect(_png()) for _ in range(8)))
+
+    for _ in range(3):
+        assert asyncio.run(main()) == [model.text] * 8
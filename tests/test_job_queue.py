@@ -0,0 +1,115 @@
+"""
+Tes antrean job persisten (job_queue.py) dan loop worker (worker.py).
+
+Jalankan dari root repo:
+    python -m pytest -q tests
+"""
+import asyncio
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import worker  # noqa: E402
+from job_queue import JobQueue  # noqa: E402
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return JobQueue(str(tmp_path / "jobs.sqlite3"), lease_seconds=0.2, max_attempts=3)
+
+
+def _enqueue(queue, chat_id=1, message_id=1):
+    return queue.enqueue("pdf", chat_id, message_id, {"path": f"/tmp/{chat_id}-{message_id}.pdf"})
+
+
+def test_expired_lease_is_reclaimed_by_another_worker(queue):
+    job_id = _enqueue(queue)
+    job, _ = queue.claim("worker-a")
+    assert job["id"] == job_id
+    # Worker A masih memegang lease: job tidak bisa diklaim ulang.
+    assert queue.claim("worker-b") == (None, [])
+
+    time.sleep(queue.lease_seconds + 0.05)
+    job, exhausted = queue.claim("worker-b")
+    assert job["id"] == job_id and job["attempts"] == 2 and exhausted == []
+    # Worker A yang kembali hidup tidak bisa lagi memperpanjang atau menyelesaikan job.
+    assert not queue.heartbeat(job_id, "worker-a")
+    assert not queue.complete(job_id, "worker-a")
+    assert queue.complete(job_id, "worker-b")
+    assert queue.stats()["done"] == 1
+
+
+def test_expired_lease_gives_up_after_max_attempts(queue):
+    job_id = _enqueue(queue)
+    for attempt in range(queue.max_attempts):
+        job, exhausted = queue.claim(f"worker-{attempt}")
+        assert job["id"] == job_id and exhausted == []
+        time.sleep(queue.lease_seconds + 0.05)
+
+    job, exhausted = queue.claim("worker-last")
+    assert job is None
+    assert [dead["id"] for dead in exhausted] == [job_id]
+    assert queue.stats()["failed"] == 1
+
+
+def test_worker_takes_over_job_from_dead_worker(queue):
+    job_id = _enqueue(queue)
+    # Worker lain mengklaim job lalu mati tanpa heartbeat.
+    queue.claim("dead-worker")
+    handled = []
+
+    async def main():
+        stop = asyncio.Event()
+
+        async def handle(job):
+            handled.append((job["id"], job["attempts"]))
+            stop.set()
+
+        await asyncio.wait_for(worker.work(queue, handle, concurrency=1, poll_interval=0.02, stop=stop), 5)
+
+    asyncio.run(main())
+    assert handled == [(job_id, 2)]
+
+
+def test_purge_removes_only_old_finished_jobs(queue):
+    old_done, old_failed, recent, waiting = (_enqueue(queue, message_id=n) for n in range(4))
+    for job_id in (old_done, old_failed, recent):
+        job, _ = queue.claim("worker")
+        assert job["id"] == job_id
+    queue.complete(old_done, "worker")
+    queue.fail(old_failed, "worker", RuntimeError("rusak"))
+    time.sleep(0.1)
+    queue.complete(recent, "worker")
+
+    assert queue.purge(0.05) == 2
+    stats = queue.stats()
+    assert (stats["queued"], stats["running"], stats["done"], stats["failed"]) == (1, 0, 1, 0)
+    assert queue.position(waiting) == 1
+
+
+def test_worker_purges_jobs_past_retention(queue):
+    queue.retention_seconds = 0
+    job_id = _enqueue(queue)
+    queue.claim("worker")
+    queue.complete(job_id, "worker")
+
+    async def main():
+        stop = asyncio.Event()
+
+        async def handle(job):
+            raise AssertionError("tidak ada job antre")
+
+        task = asyncio.ensure_future(worker.work(queue, handle, concurrency=1, poll_interval=0.02, stop=stop))
+        for _ in range(100):
+            if queue.stats()["done"] == 0:
+                break
+            await asyncio.sleep(0.02)
+        stop.set()
+        await asyncio.wait_for(task, 5)
+
+    asyncio.run(main())
+    assert queue.stats()["done"] == 0
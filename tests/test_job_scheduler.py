@@ -0,0 +1,115 @@
+"""
+Tes penjadwal job ekstraksi (job_scheduler.py): keadilan antar chat, batas
+job berjalan, dan antrean berbatas.
+
+Jalankan dari root repo:
+    python -m pytest -q tests
+"""
+import asyncio
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from job_scheduler import JobScheduler, QueueFull  # noqa: E402
+
+
+def _recorder(started, release):
+    """Factory job yang mencatat urutan mulai lalu menunggu sampai dilepas."""
+    def factory_for(name):
+        async def job():
+            started.append(name)
+            await release.wait()
+        return lambda: job()
+    return factory_for
+
+
+async def _drain(scheduler):
+    while scheduler._tasks:
+        await asyncio.gather(*list(scheduler._tasks))
+
+
+def test_backlog_of_one_chat_does_not_starve_another_chat():
+    started = []
+
+    async def main():
+        scheduler = JobScheduler(max_in_flight=1)
+        release = asyncio.Event()
+        job = _recorder(started, release)
+        positions = [scheduler.submit(1, "pdf", job(f"a{n}")) for n in range(10)]
+        position_b = scheduler.submit(2, "pdf", job("b0"))
+        await asyncio.sleep(0)
+        release.set()
+        await _drain(scheduler)
+        return positions, position_b, scheduler.stats()
+
+    positions, position_b, stats = asyncio.run(main())
+    assert positions == list(range(10))
+    # Job tunggal chat 2 menunggu paling lama satu giliran chat 1 (yang sudah
+    # di kepala rotasi saat chat 2 bergabung), bukan sembilan job sisanya.
+    assert position_b == 2
+    assert started[:3] == ["a0", "a1", "b0"]
+    assert sorted(started) == sorted([f"a{n}" for n in range(10)] + ["b0"])
+    assert stats["completed"] == 11 and stats["queue_depth"] == 0
+
+
+def test_chats_alternate_while_both_have_backlog():
+    started = []
+
+    async def main():
+        scheduler = JobScheduler(max_in_flight=1)
+        release = asyncio.Event()
+        job = _recorder(started, release)
+        for n in range(3):
+            scheduler.submit(1, "pdf", job(f"a{n}"))
+        for n in range(3):
+            scheduler.submit(2, "docx", job(f"b{n}"))
+        release.set()
+        await _drain(scheduler)
+
+    asyncio.run(main())
+    assert started == ["a0", "a1", "b0", "a2", "b1", "b2"]
+
+
+def test_type_limit_lets_other_document_types_run():
+    started = []
+
+    async def main():
+        scheduler = JobScheduler(max_in_flight=3, type_limits={"pdf": 1})
+        release = asyncio.Event()
+        job = _recorder(started, release)
+        for n in range(3):
+            scheduler.submit(1, "pdf", job(f"pdf{n}"))
+        scheduler.submit(2, "image", job("image0"))
+        await asyncio.sleep(0)
+        in_flight = scheduler.stats()["in_flight_by_type"]
+        release.set()
+        await _drain(scheduler)
+        return in_flight
+
+    in_flight = asyncio.run(main())
+    assert in_flight == {"pdf": 1, "image": 1}
+    assert started[:2] == ["pdf0", "image0"]
+
+
+def test_full_queue_rejects_and_failures_are_counted():
+    async def main():
+        scheduler = JobScheduler(max_in_flight=1, max_queued=2)
+        release = asyncio.Event()
+
+        async def broken():
+            await release.wait()
+            raise RuntimeError("rusak")
+
+        for chat_id in (1, 2, 3):
+            scheduler.submit(chat_id, "image", broken)
+        with pytest.raises(QueueFull):
+            scheduler.submit(4, "image", broken)
+        release.set()
+        await _drain(scheduler)
+        return scheduler.stats()
+
+    stats = asyncio.run(main())
+    assert (stats["submitted"], stats["rejected"], stats["failed"], stats["completed"]) == (3, 1, 3, 0)
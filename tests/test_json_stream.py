@@ -0,0 +1,152 @@
+"""
+Test json_stream: IncrementalRowParser dengan chunk terpotong di setiap
+posisi, pagar markdown, penolakan dini output yang bukan JSON array, serta
+iter_json_array/iter_rows untuk batas chunk/blok dan data tambahan.
+
+Jalankan dari root repo:
+    python -m pytest -q tests
+"""
+import io
+import json
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from json_stream import (IncrementalRowParser, JSONStreamError, NotJSONArrayError,  # noqa: E402
+                         dumps_rows, is_compact, iter_json_array, iter_rows)
+
+ROWS = [
+    {"Akun": "Kas", "2023": "1.000", "catatan": "kurung } dan [ di string"},
+    {"Akun": "Piutang \"usaha\"", "2023": None, "nested": {"a": [1, 2, {"b": "\\\\"}]}},
+    {"Akun": "Ünïcode ✓", "2023": -12.5e3},
+]
+
+
+def _feed(chunks):
+    parser = IncrementalRowParser()
+    rows = []
+    for chunk in chunks:
+        rows.extend(parser.feed(chunk))
+    parser.close()
+    return rows
+
+
+def _split(text, rng, pieces):
+    cuts = sorted(rng.sample(range(1, len(text)), pieces))
+    return [text[i:j] for i, j in zip([0, *cuts], [*cuts, len(text)])]
+
+
+@pytest.mark.parametrize("text", [
+    json.dumps(ROWS, ensure_ascii=False),
+    json.dumps(ROWS, indent=2),
+    "```json\n" + json.dumps(ROWS) + "\n```",
+    "  \n```\n" + json.dumps(ROWS) + "\n```\n",
+])
+def test_parser_every_two_way_split(text):
+    for cut in range(len(text) + 1):
+        assert _feed([text[:cut], text[cut:]]) == ROWS, cut
+
+
+def test_parser_random_chunking():
+    rng = random.Random(0)
+    text = "```json\n" + json.dumps(ROWS * 20, indent=1) + "\n```"
+    for _ in range(200):
+        assert _feed(_split(text, rng, rng.randrange(1, 60))) == ROWS * 20
+    assert _feed(list(text)) == ROWS * 20
+
+
+def test_parser_returns_rows_as_soon_as_they_close():
+    parser = IncrementalRowParser()
+    assert parser.feed('[{"Akun": "Kas"}, {"Akun": ') == [{"Akun": "Kas"}]
+    assert parser.feed('"Bank"}') == [{"Akun": "Bank"}]
+    assert not parser.done
+    assert parser.feed("]\n```") == []
+    assert parser.done and parser.row_count == 2
+    parser.close()
+
+
+@pytest.mark.parametrize("chunk", ["Maaf, saya", "{\"Akun\": 1}", "```json\nTabel:"])
+def test_parser_rejects_non_array_on_first_chunk(chunk):
+    with pytest.raises(NotJSONArrayError):
+        IncrementalRowParser().feed(chunk)
+
+
+def test_parser_waits_for_ambiguous_prefix():
+    parser = IncrementalRowParser()
+    assert parser.feed("``") == []
+    assert parser.feed("`js") == []
+    assert parser.feed("on\n[") == []
+    assert parser.feed('{"a": 1}]') == [{"a": 1}]
+
+
+@pytest.mark.parametrize("text", ['[1, 2]', '[{"a": 1}, "x"]', '[{"a": 1} x]', '[[{"a": 1}]]'])
+def test_parser_rejects_non_object_elements(text):
+    with pytest.raises(JSONStreamError):
+        _feed([text])
+
+
+@pytest.mark.parametrize("text", ['[{"a": 1}', '', '   ', '[{"a": tru}]'])
+def test_parser_close_rejects_incomplete_or_invalid(text):
+    with pytest.raises(JSONStreamError):
+        _feed([text])
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 64, 1 << 16])
+@pytest.mark.parametrize("text", [
+    json.dumps(ROWS + [1, "x", None, [1, 2]], indent=2),
+    "\n\n  " + json.dumps(ROWS) + "  \n",
+    "[]",
+    " [ ] ",
+])
+def test_iter_json_array_chunk_boundaries(text, chunk_size):
+    assert list(iter_json_array(io.StringIO(text), chunk_size)) == json.loads(text)
+
+
+def test_iter_json_array_number_split_at_chunk_end():
+    # Angka "12345" tidak boleh dibaca sebagai 12 saat chunk berakhir di tengahnya.
+    assert list(iter_json_array(io.StringIO("[12345, 6]"), chunk_size=3)) == [12345, 6]
+
+
+@pytest.mark.parametrize("text, error", [
+    ('{"a": 1}', NotJSONArrayError),
+    ('', NotJSONArrayError),
+    ('[1, 2', JSONStreamError),
+    ('[1 2]', JSONStreamError),
+    ('[1, 2] ekstra', JSONStreamError),
+    ('[1, 2]]', JSONStreamError),
+    ('[1, nul]', JSONStreamError),
+])
+def test_iter_json_array_malformed(text, error):
+    with pytest.raises(error):
+        list(iter_json_array(io.StringIO(text), chunk_size=4))
+
+
+@pytest.mark.parametrize("block_size", [1, 10, 100, 1 << 18])
+@pytest.mark.parametrize("rows", [ROWS * 50, [], [{"a": 1}]])
+def test_iter_rows_compact_blocks(rows, block_size):
+    text = dumps_rows(rows)
+    assert is_compact(io.StringIO(text))
+    assert list(iter_rows(io.StringIO(text), block_size)) == rows
+    assert json.loads(text) == rows
+
+
+def test_iter_rows_falls_back_for_indented_files():
+    text = json.dumps(ROWS, indent=2)
+    assert not is_compact(io.StringIO(text))
+    assert list(iter_rows(io.StringIO(text))) == ROWS
+
+
+@pytest.mark.parametrize("text", [
+    '[\n{"a":1},\n{"a":2}\n',          # tanpa ']'
+    '[\n{"a":1},\n{"a":2},\n]\n',      # koma sebelum ']'
+    '[\n{"a":1}\n{"a":2}\n]\n',        # koma hilang
+    '[\n{"a":1}\n]\nekstra\n',         # data tambahan
+    '[\n{"a":\n]\n',                   # elemen rusak
+])
+def test_iter_rows_compact_malformed(text):
+    with pytest.raises(JSONStreamError):
+        list(iter_rows(io.StringIO(text), block_size=4))
@@ -0,0 +1,76 @@
+"""
+Test LabelIndex: tingkat confidence persis/ternormalisasi/fuzzy, penolakan
+kandidat yang hampir seri, dan recall varian satu huruf hilang/tertukar dari
+label semua skema.
+
+Jalankan dari root repo:
+    python -m pytest -q tests
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from label_index import NORMALIZED_CONFIDENCE, LabelIndex, normalize_label  # noqa: E402
+from statement_schema import SCHEMAS  # noqa: E402
+
+LABA_RUGI = ("syariah/laba-rugi", "konvesional/laba-rugi")
+LAPORAN_KEUANGAN = ("syariah/laporan-keuangan", "konvesional/laporan-keuangan")
+
+
+def _typo_variants(label):
+    """Semua varian satu huruf hilang dan dua huruf bersebelahan tertukar."""
+    for i, char in enumerate(label):
+        if char.isalpha():
+            yield label[:i] + label[i + 1:]
+    for i in range(len(label) - 1):
+        if label[i] != label[i + 1] and label[i].isalpha() and label[i + 1].isalpha():
+            yield label[:i] + label[i + 1] + label[i] + label[i + 2:]
+
+
+def test_confidence_tiers():
+    index = SCHEMAS["konvesional/laporan-keuangan"].labels
+    assert index.resolve("Total aset") == ("total_assets", 1.0)
+    assert index.resolve("TOTAL  ASET.") == ("total_assets", NORMALIZED_CONFIDENCE)
+    key, confidence = index.resolve("Total aest")
+    assert key == "total_assets" and confidence < NORMALIZED_CONFIDENCE
+
+
+@pytest.mark.parametrize("statement_type", LABA_RUGI)
+def test_near_tie_resolves_to_closer_account(statement_type):
+    # "lan" hanya satu huruf dari "... lain", tetapi trigram juga mirip
+    # "Penghasilan komprehensif" (comprehensive_income).
+    key, _ = SCHEMAS[statement_type].labels.resolve("Penghasilan komprehensif lan")
+    assert key == "other_comprehensive_income"
+
+
+@pytest.mark.parametrize("statement_type", LAPORAN_KEUANGAN)
+def test_missing_letter(statement_type):
+    index = SCHEMAS[statement_type].labels
+    assert index.resolve("Piutang bnga")[0] == "interest_receivable"
+    assert index.resolve("Aset tetp")[0] == "fixed_assets"
+
+
+def test_ambiguous_candidates_are_rejected():
+    index = LabelIndex({"Utang bunga": "interest_payable", "Piutang bunga": "interest_receivable"})
+    # Sama jauhnya (satu edit) dari kedua label.
+    assert index.resolve("Putang bunga") == (None, None)
+    assert index.resolve("Biaya sewa") == (None, None)
+
+
+@pytest.mark.parametrize("statement_type", sorted(SCHEMAS))
+def test_typo_corpus_never_maps_to_wrong_account(statement_type):
+    schema = SCHEMAS[statement_type]
+    index = LabelIndex(schema.account_map)
+    total = matched = 0
+    for label, key in schema.account_map.items():
+        for variant in _typo_variants(label):
+            if normalize_label(variant) in index._normalized:
+                continue
+            resolved, _ = index.resolve(variant)
+            assert resolved in (key, None), (variant, resolved, key)
+            total += 1
+            matched += resolved == key
+    assert matched / total >= 0.99, f"{matched}/{total}"
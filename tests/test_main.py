@@ -0,0 +1,173 @@
+"""
+Test endpoint Flask di main.py dengan test client: /api/download (ETag/304
+tanpa membuka file, Range 206/416, If-Range, varian terkompresi) dan endpoint
+laporan /balance-sheet/ep/... (ETag/304 serta status error 400/404/500).
+
+Jalankan dari root repo:
+    python -m pytest -q tests
+"""
+import gzip
+import json
+import os
+import sys
+import tempfile
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("LINE_ITEM_DB_PATH", os.path.join(tempfile.mkdtemp(), "line_items.sqlite3"))
+
+import main  # noqa: E402
+import precompressed  # noqa: E402
+import statement_views  # noqa: E402
+from json_stream import dumps_rows  # noqa: E402
+
+ROWS = [{"Akun": "Total aset", "2022": f"{i}.000", "2023": f"({i},5)"} for i in range(200)]
+
+
+@pytest.fixture
+def output(tmp_path, monkeypatch):
+    monkeypatch.setitem(main.app.config, 'OUTPUT_FOLDER', str(tmp_path))
+    main.report_cache.clear()
+    (tmp_path / "laporan.json").write_text(dumps_rows(ROWS), encoding="utf-8")
+    return tmp_path
+
+
+@pytest.fixture
+def client(output):
+    return main.app.test_client()
+
+
+@pytest.fixture
+def opened(monkeypatch):
+    """Nama file yang dibuka main.py/precompressed.py/statement_views.py selama test."""
+    paths = []
+
+    def spy(path, *args, **kwargs):
+        paths.append(os.path.basename(path))
+        return open(path, *args, **kwargs)
+
+    for module in (main, precompressed, statement_views):
+        monkeypatch.setattr(module, "open", spy, raising=False)
+    return paths
+
+
+def test_download_full_and_validators(client, output):
+    response = client.get("/api/download/laporan.json")
+    assert response.status_code == 200
+    assert response.data == (output / "laporan.json").read_bytes()
+    assert response.headers["Accept-Ranges"] == "bytes"
+    assert response.headers["Content-Length"] == str(len(response.data))
+    assert "attachment" in response.headers["Content-Disposition"]
+    assert response.headers["ETag"]
+
+
+def test_download_not_modified_does_not_open_file(client, opened):
+    etag = client.get("/api/download/laporan.json").headers["ETag"]
+    opened.clear()
+    response = client.get("/api/download/laporan.json", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.data == b""
+    assert opened == []
+
+
+def test_download_precompressed_variant(client, output, opened):
+    precompressed.write_variants(str(output), "laporan.json")
+    response = client.get("/api/download/laporan.json", headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert gzip.decompress(response.data) == (output / "laporan.json").read_bytes()
+    etag = response.headers["ETag"]
+    assert etag != client.get("/api/download/laporan.json").headers["ETag"]
+
+    opened.clear()
+    response = client.get("/api/download/laporan.json",
+                          headers={"Accept-Encoding": "gzip", "If-None-Match": etag})
+    assert response.status_code == 304 and opened == []
+
+
+def test_download_range(client, output):
+    body = (output / "laporan.json").read_bytes()
+    response = client.get("/api/download/laporan.json", headers={"Range": "bytes=10-19"})
+    assert response.status_code == 206
+    assert response.data == body[10:20]
+    assert response.headers["Content-Range"] == f"bytes 10-19/{len(body)}"
+    assert response.headers["Content-Length"] == "10"
+
+    response = client.get("/api/download/laporan.json", headers={"Range": "bytes=-5"})
+    assert response.status_code == 206 and response.data == body[-5:]
+
+
+def test_download_unsatisfiable_range(client, output):
+    size = (output / "laporan.json").stat().st_size
+    response = client.get("/api/download/laporan.json", headers={"Range": f"bytes={size + 10}-"})
+    assert response.status_code == 416
+    assert response.headers["Content-Range"] == f"bytes */{size}"
+
+
+def test_download_if_range(client, output):
+    body = (output / "laporan.json").read_bytes()
+    etag = client.get("/api/download/laporan.json").headers["ETag"]
+    response = client.get("/api/download/laporan.json", headers={"Range": "bytes=0-9", "If-Range": etag})
+    assert response.status_code == 206 and response.data == body[:10]
+    # Validator basi: seluruh file dikirim ulang.
+    response = client.get("/api/download/laporan.json", headers={"Range": "bytes=0-9", "If-Range": '"basi"'})
+    assert response.status_code == 200 and response.data == body
+
+
+def test_download_errors(client):
+    response = client.get("/api/download/laporan.txt")
+    assert response.status_code == 400 and "error" in response.get_json()
+    assert client.get("/api/download/tidak-ada.json").status_code == 404
+    assert client.get("/api/download/..%2Fmain.json").status_code == 404
+
+
+STATEMENT_URL = "/balance-sheet/ep/konvesional/laporan-keuangan/"
+
+
+def test_statement_etag_and_not_modified(client, opened):
+    response = client.get(STATEMENT_URL + "laporan.json")
+    assert response.status_code == 200
+    payload = json.loads(response.data)
+    # Baris terakhir dengan akun yang sama menimpa nilai sebelumnya.
+    assert [record["total_assets"]["value"] for record in payload["read"]] == ["199000", "-199.5"]
+    etag = response.headers["ETag"]
+    assert etag and "Accept-Encoding" in response.headers["Vary"]
+
+    opened.clear()
+    main.report_cache.clear()
+    response = client.get(STATEMENT_URL + "laporan.json", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.data == b"" and response.headers["ETag"] == etag
+    assert opened == []
+
+
+def test_statement_etag_changes_with_file(client, output):
+    etag = client.get(STATEMENT_URL + "laporan.json").headers["ETag"]
+    path = output / "laporan.json"
+    path.write_text(dumps_rows(ROWS[:10]), encoding="utf-8")
+    os.utime(path, ns=(path.stat().st_mtime_ns + 10**9,) * 2)
+    response = client.get(STATEMENT_URL + "laporan.json", headers={"If-None-Match": etag})
+    assert response.status_code == 200 and response.headers["ETag"] != etag
+
+
+@pytest.mark.parametrize("filename, status", [
+    ("laporan.txt", 400),
+    ("tidak-ada.json", 404),
+    ("rusak.json", 400),
+])
+def test_statement_error_statuses(client, output, filename, status):
+    (output / "rusak.json").write_text("[{\"Akun\": ", encoding="utf-8")
+    response = client.get(STATEMENT_URL + filename)
+    assert response.status_code == status
+    assert set(response.get_json()) == {"error"}
+
+
+def test_statement_internal_error_status(client, monkeypatch):
+    def fail(*args):
+        raise RuntimeError("rusak")
+
+    monkeypatch.setattr(main, "_statement_body", fail)
+    response = client.get(STATEMENT_URL + "laporan.json")
+    assert response.status_code == 500
+    assert response.get_json() == {"error": "rusak"}
@@ -0,0 +1,61 @@
+"""
+Test bentuk kirim nilai: setiap "value" (int, pecahan, negatif, sangat kecil,
+sangat besar) diserialisasi sebagai string desimal eksak, baik lewat
+format_amount/json_default maupun di payload laporan.
+
+Jalankan dari root repo:
+    python -m pytest -q tests
+"""
+import json
+import os
+import sys
+from decimal import Decimal
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from numeric_parser import format_amount, json_default, parse_column  # noqa: E402
+from statement_schema import build_statement_payload  # noqa: E402
+
+
+@pytest.mark.parametrize("raw, wire", [
+    ("Rp 1.000", "1000"),
+    ("1.234,50", "1234.50"),
+    ("(2.500,75)", "-2500.75"),
+    ("1.234-", "-1234"),
+    ("-", "0"),
+    ("0,0000001", "0.0000001"),
+    ("12.345.678.901.234.567,891", "12345678901234567.891"),
+    ("", None),
+])
+def test_every_amount_has_one_wire_type(raw, wire):
+    value, = parse_column([raw])
+    assert format_amount(value) == wire
+
+
+def test_json_default_writes_decimal_as_exact_string():
+    encoded = json.dumps([Decimal("1E-7"), Decimal("-2500.75")], default=json_default)
+    assert json.loads(encoded) == ["0.0000001", "-2500.75"]
+    with pytest.raises(TypeError):
+        json.dumps(object(), default=json_default)
+
+
+def test_statement_payload_values_are_strings():
+    rows = [
+        {"Akun": "Total aset", "2022": "Rp 1.000", "2023": "(2.500,75)"},
+        {"Akun": "Kas dan setara kas", "2022": "0,0000001", "2023": ""},
+    ]
+    payload, _ = build_statement_payload(rows, "konvesional/laporan-keuangan")
+    payload = json.loads(json.dumps(payload, default=json_default))
+    values = [
+        (record["year"], key, record[key]["value"])
+        for record in payload["read"]
+        for key in ("total_assets", "cash_and_cash_equivalents")
+    ]
+    assert values == [
+        (2022, "total_assets", "1000"),
+        (2022, "cash_and_cash_equivalents", "0.0000001"),
+        (2023, "total_assets", "-2500.75"),
+        (2023, "cash_and_cash_equivalents", None),
+    ]
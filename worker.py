@@ -0,0 +1,154 @@
+"""
+Proses worker untuk antrean job persisten (job_queue.py).
+
+Bot yang dijalankan dengan JOB_BACKEND=sqlite hanya memasukkan job ke antrean;
+satu atau lebih proses worker ini (di mesin yang sama dengan bot, karena
+database SQLite dan direktori file sementara harus berada di disk lokal)
+mengklaim job, menjalankan pipeline PDF/DOCX/Gemini, lalu mengirim hasilnya
+langsung ke chat pengguna. Job yang gagal dicoba lagi sampai JOB_MAX_ATTEMPTS.
+Worker juga menghapus job selesai/gagal yang lebih tua dari JOB_RETENTION_SECONDS
+supaya tabel jobs tidak tumbuh tanpa batas.
+
+Jalankan:
+    python worker.py
+Konfigurasi: WORKER_CONCURRENCY (job paralel per proses, default 2),
+WORKER_POLL_INTERVAL (detik, default 1), WORKER_PURGE_INTERVAL (detik antar
+purge, default 3600), serta JOB_QUEUE_PATH, JOB_LEASE_SECONDS, JOB_MAX_ATTEMPTS,
+JOB_RETENTION_SECONDS (default 7 hari) seperti di bot.
+"""
+import asyncio
+import logging
+import os
+import socket
+import uuid
+from types import SimpleNamespace
+
+from job_queue import JobQueue
+
+logger = logging.getLogger(__name__)
+
+
+async def _heartbeat(queue, job_id, worker_id, job_task):
+    """Memperpanjang lease secara berkala; membatalkan job jika lease hilang."""
+    while True:
+        await asyncio.sleep(queue.lease_seconds / 3)
+        if not await asyncio.to_thread(queue.heartbeat, job_id, worker_id):
+            logger.warning(f"Lease job {job_id} hilang; membatalkan pemrosesan.")
+            job_task.cancel()
+            return
+
+
+async def _give_up(job, on_exhausted):
+    logger.error(f"Job {job['id']} gagal setelah {job['attempts']} percobaan.")
+    if on_exhausted is not None:
+        try:
+            await on_exhausted(job)
+        except Exception as e:
+            logger.error(f"Gagal memberi tahu kegagalan job {job['id']}: {e}")
+
+
+async def _purge_loop(queue, interval, stop):
+    """Menghapus job selesai/gagal yang melewati masa retensi, setiap `interval` detik."""
+    while not stop.is_set():
+        try:
+            purged = await asyncio.to_thread(queue.purge, queue.retention_seconds)
+            if purged:
+                logger.info(f"Menghapus {purged} job lama dari antrean.")
+        except Exception as e:
+            logger.error(f"Gagal menghapus job lama: {e}")
+        try:
+            await asyncio.wait_for(stop.wait(), interval)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def _work_loop(queue, worker_id, handle, on_exhausted, poll_interval, stop):
+    while not stop.is_set():
+        job, exhausted = await asyncio.to_thread(queue.claim, worker_id)
+        for dead in exhausted:
+            await _give_up(dead, on_exhausted)
+        if job is None:
+            try:
+                await asyncio.wait_for(stop.wait(), poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            continue
+
+        logger.info(f"Worker {worker_id} mengklaim job {job['id']} ({job['doc_type']}, percobaan {job['attempts']}).")
+        job_task = asyncio.create_task(handle(job))
+        heartbeat = asyncio.create_task(_heartbeat(queue, job["id"], worker_id, job_task))
+        try:
+            await job_task
+            await asyncio.to_thread(queue.complete, job["id"], worker_id)
+        except asyncio.CancelledError:
+            if stop.is_set():
+                raise
+            # Lease diambil alih worker lain; biarkan job dijalankan di sana.
+        except Exception as e:
+            logger.error(f"Job {job['id']} gagal: {e}", exc_info=True)
+            if job["attempts"] < queue.max_attempts:
+                await asyncio.to_thread(queue.retry, job["id"], worker_id, e)
+            elif await asyncio.to_thread(queue.fail, job["id"], worker_id, e):
+                await _give_up(job, on_exhausted)
+        finally:
+            heartbeat.cancel()
+
+
+async def work(queue, handle, concurrency=2, poll_interval=1.0, on_exhausted=None, stop=None, worker_id=None,
+               purge_interval=3600.0):
+    """
+    Menjalankan `concurrency` loop klaim-proses sampai event stop di-set.
+    handle(job) adalah coroutine yang memproses satu job (dict dari JobQueue)
+    dan harus melempar exception jika job gagal, supaya job dicoba lagi atau
+    ditandai gagal; on_exhausted(job) dipanggil untuk job yang menyerah.
+    Setiap `purge_interval` detik job lama dihapus (queue.retention_seconds).
+    """
+    worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+    stop = stop or asyncio.Event()
+    await asyncio.gather(
+        _purge_loop(queue, purge_interval, stop),
+        *(
+            _work_loop(queue, f"{worker_id}/{n}", handle, on_exhausted, poll_interval, stop)
+            for n in range(concurrency)
+        ),
+    )
+
+
+async def main():
+    # Diimpor di sini supaya work() bisa dipakai tanpa token bot (mis. benchmark).
+    from telegram import Bot
+
+    import bot
+
+    queue = bot.job_queue or JobQueue.from_env()
+    async with Bot(bot.TELEGRAM_BOT_TOKEN) as telegram_bot:
+        context = SimpleNamespace(bot=telegram_bot)
+
+        async def handle(job):
+            await bot.run_job(context, job["doc_type"], job["chat_id"], job["message_id"], job["payload"],
+                              keep_upload_on_failure=job["attempts"] < queue.max_attempts)
+
+        async def on_exhausted(job):
+            bot.discard_upload(job["payload"]["path"], job["doc_type"])
+            await telegram_bot.edit_message_text(
+                text="❌ Pemrosesan file gagal berulang kali. Silakan kirim ulang file.",
+                chat_id=job["chat_id"],
+                message_id=job["message_id"]
+            )
+
+        logger.info("Worker mulai mengambil job dari antrean...")
+        try:
+            await work(
+                queue, handle,
+                concurrency=int(os.getenv("WORKER_CONCURRENCY", 2)),
+                poll_interval=float(os.getenv("WORKER_POLL_INTERVAL", 1.0)),
+                purge_interval=float(os.getenv("WORKER_PURGE_INTERVAL", 3600)),
+                on_exhausted=on_exhausted,
+            )
+        finally:
+            bot.extraction_pool.shutdown()
+            bot.output_writer.shutdown(wait=True)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,8 @@
+"""
+Entry point WSGI untuk server produksi:
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+"""
+from main import app
+
+__all__ = ["app"]